@@ -1,7 +1,13 @@
 import argparse
 from datetime import datetime, timedelta
 from stock_analyzer.main import StockAnalyzer
-import io
+from stock_analyzer.summary import SummaryWriter
+from stock_analyzer.rendering import RenderPool
+from stock_analyzer.documents import AnalysisDocument, reportlab_available, write_pdfs
+from stock_analyzer.logger import AnalysisLog
+from stock_analyzer.config import API_CONFIG, CHART_CONFIG, REPORT_CONFIG
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import threading
 import os
 import subprocess
 import logging
@@ -9,27 +15,7 @@ import time
 import tempfile
 import shutil
 from pathlib import Path
-import re
 
-# 尝试导入reportlab库
-try:
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-    from reportlab.lib.units import inch
-    reportlab_available = True
-except ImportError:
-    reportlab_available = False
-
-# 尝试导入markdown库
-try:
-    import markdown
-    markdown_available = True
-except ImportError:
-    markdown_available = False
 
 def parse_args():
     """解析命令行参数"""
@@ -55,9 +41,44 @@ def parse_args():
     
     parser.add_argument(
         '--format',
-        choices=['excel', 'csv', 'json'],
+        choices=['excel', 'csv', 'json', 'parquet'],
         default='excel',
-        help='报告输出格式，默认为excel'
+        help='报告输出格式：excel、csv、json（JSON Lines）或parquet（批量分析推荐，需要pyarrow），默认为excel'
+    )
+    
+    parser.add_argument(
+        '--summary',
+        type=str,
+        default=None,
+        help='全市场汇总表路径，按扩展名选择格式（.csv、.db/.sqlite、.parquet），每分析完一只股票追加一行'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='并行分析的工作数（每个工作使用独立的分析器），默认1为顺序分析'
+    )
+    
+    parser.add_argument(
+        '--worker-type',
+        choices=['process', 'thread'],
+        default='process',
+        help='并行方式：process（进程池，计算与网络等待均并行）或thread（线程池，适合以网络等待为主的分析）'
+    )
+    
+    parser.add_argument(
+        '--render-workers',
+        type=int,
+        default=REPORT_CONFIG['render_workers'],
+        help='报告渲染进程数（Excel、Markdown、PDF在后台并行生成，与分析重叠），0为同步渲染'
+    )
+    
+    parser.add_argument(
+        '--charts',
+        action='store_true',
+        default=CHART_CONFIG['enabled'],
+        help='是否生成PNG图表（价格/均线/布林带图和得分雷达图）'
     )
     
     parser.add_argument(
@@ -98,109 +119,239 @@ def validate_symbol(symbol):
         return False
     return symbol  # 返回标准化的股票代码
 
-class LogCapture:
-    """捕获标准输出的类"""
-    def __init__(self):
-        self.log_buffer = io.StringIO()
-        self.terminal = None
-        self.log_content = ""
-    
-    def start(self):
-        """开始捕获"""
-        import sys
-        self.terminal = sys.stdout
-        sys.stdout = self
-    
-    def stop(self):
-        """停止捕获"""
-        import sys
-        sys.stdout = self.terminal
-        self.log_content = self.log_buffer.getvalue()
-        return self.log_content
-    
-    def write(self, message):
-        """写入消息到终端和缓冲区"""
-        self.terminal.write(message)
-        self.log_buffer.write(message)
-    
-    def flush(self):
-        """刷新缓冲区"""
-        self.terminal.flush()
-        self.log_buffer.flush()
+# 每个工作线程/进程各自的分析器
+_worker_state = threading.local()
+# 当前进程创建的全部分析器（分析结束后统一关闭，释放连接池和线程池）
+_analyzers = []
+_analyzers_lock = threading.Lock()
+
+def init_worker(charts, requests_per_hour=None):
+    """
+    工作进程池的初始化：同步子进程中的运行时配置（线程池共享主进程的配置，只通过参数传给各自的分析器）
+    params:
+        charts: bool - 是否生成图表
+        requests_per_hour: int - 每个工作的StockTwits每小时请求上限
+    """
+    CHART_CONFIG['enabled'] = charts
+    if requests_per_hour:
+        API_CONFIG['stocktwits']['requests_per_hour'] = requests_per_hour
+
+def get_analyzer(render_pool=None, charts=None, requests_per_hour=None):
+    """
+    当前线程/进程的分析器（首次使用时创建，之后复用）
+    params:
+        render_pool: RenderPool - 报告渲染池
+        charts: bool - 是否生成图表
+        requests_per_hour: int - 该分析器的StockTwits每小时请求上限
+    """
+    analyzer = getattr(_worker_state, 'analyzer', None)
+    if analyzer is None:
+        analyzer = StockAnalyzer(render_pool=render_pool, charts=charts, requests_per_hour=requests_per_hour)
+        _worker_state.analyzer = analyzer
+        with _analyzers_lock:
+            _analyzers.append(analyzer)
+    return analyzer
+
+def close_analyzers():
+    """关闭当前进程创建的分析器（工作进程中的分析器随进程退出释放），之后重新创建"""
+    global _worker_state
+    _worker_state = threading.local()
+    with _analyzers_lock:
+        analyzers = list(_analyzers)
+        _analyzers.clear()
+    for analyzer in analyzers:
+        analyzer.close()
+
+def analyze_symbol(symbol, args, wait_render=True, requests_per_hour=None):
+    """
+    分析单只股票（可在工作线程或进程中执行）
+    params:
+        symbol: str - 标准化的股票代码
+        args: argparse.Namespace - 命令行参数
+        wait_render: bool - 是否等待报告渲染完成；为False时结果中带context，由调用方取回报告
+        requests_per_hour: int - 每个工作的StockTwits每小时请求上限，默认取配置
+    returns:
+        dict - symbol、error、report_path、chart_paths、factor_analysis、last_bar_date、log_content
+    """
+    outcome = {
+        'symbol': symbol, 'error': None, 'report_path': None, 'chart_paths': {},
+        'factor_analysis': None, 'last_bar_date': None, 'log_content': None
+    }
+    try:
+        if args.verbose:
+            print(f"正在分析 {symbol}...")
+        
+        # 分析日志只记录当前线程/进程中这只股票的消息，并行分析时不会串入其他股票的输出
+        analyzer = get_analyzer(charts=args.charts, requests_per_hour=requests_per_hour)
+        with AnalysisLog(symbol) as analysis_log:
+            context = analyzer.run_pipeline(symbol, args.days, args.export_md, report_format=args.format)
+        outcome['factor_analysis'] = context.factor_analysis
+        if context.factor_analysis:
+            outcome['last_bar_date'] = context.price_data.index[-1]
+        if args.export_log_md:
+            outcome['log_content'] = analysis_log.text()
+        
+        if wait_render:
+            outcome['report_path'] = analyzer.collect_render(context)
+            outcome['chart_paths'] = context.chart_paths
+        else:
+            # 报告已交给渲染池，只保留渲染future，不保留行情和指标数据
+            context.release_data()
+            outcome['context'] = context
+    except Exception as e:
+        outcome['error'] = str(e)
+        print(f"分析 {symbol} 时发生错误: {str(e)}")
+    return outcome
+
+def _render_done(outcome):
+    """报告是否已渲染完成（分析失败、没有提交渲染的结果视为已完成）"""
+    context = outcome.get('context')
+    return context is None or context.render_future is None or context.render_future.done()
+
+def _collect_outcome(analyzer, outcome):
+    """取回渲染结果，丢弃上下文"""
+    context = outcome.pop('context', None)
+    if context is not None:
+        outcome['report_path'] = analyzer.collect_render(context)
+        outcome['chart_paths'] = context.chart_paths
+    return outcome
+
+def iter_analyses(symbols, args, render_pool):
+    """
+    依次或并行分析股票，按完成顺序返回结果
+    --workers大于1时每个工作进程/线程使用自己的分析器，报告在工作内渲染；
+    否则在当前进程顺序分析，报告交给渲染池，不等待渲染完成即继续分析下一只。
+    """
+    if args.workers <= 1:
+        analyzer = get_analyzer(render_pool, args.charts)
+        pending = []
+        for symbol in symbols:
+            pending.append(analyze_symbol(symbol, args, wait_render=False))
+            # 渲染已完成的股票立即返回，等待中的只有渲染池里排队的几只
+            waiting = []
+            for outcome in pending:
+                if _render_done(outcome):
+                    yield _collect_outcome(analyzer, outcome)
+                else:
+                    waiting.append(outcome)
+            pending = waiting
+        for outcome in pending:
+            yield _collect_outcome(analyzer, outcome)
+        return
+    
+    # 每个工作各自限速，总请求数不超过配置的每小时上限
+    requests_per_hour = max(API_CONFIG['stocktwits'].get('requests_per_hour', 500) // args.workers, 1)
+    if args.worker_type == 'process':
+        executor = ProcessPoolExecutor(
+            max_workers=args.workers, initializer=init_worker, initargs=(args.charts, requests_per_hour)
+        )
+    else:
+        executor = ThreadPoolExecutor(max_workers=args.workers)
+    with executor:
+        futures = {
+            executor.submit(analyze_symbol, symbol, args, True, requests_per_hour): symbol
+            for symbol in symbols
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                symbol = futures[future]
+                print(f"分析 {symbol} 时发生错误: {str(e)}")
+                yield {'symbol': symbol, 'error': str(e), 'factor_analysis': None, 'log_content': None}
 
 def analyze_stocks(args):
     """分析多个股票"""
-    analyzer = StockAnalyzer()
+    render_pool = RenderPool(args.render_workers)
     results = {}
     log_captures = {}
+    summary = SummaryWriter(args.summary) if args.summary else None
     
+    symbols = []
     for symbol in args.symbols:
         valid_symbol = validate_symbol(symbol)
         if not valid_symbol:
             print(f"无效的股票代码: {symbol}")
             continue
-            
-        try:
-            if args.verbose:
-                print(f"正在分析 {symbol}...")
-            
-            # 如果需要导出日志，开始捕获输出
-            log_capture = None
-            if args.export_log_md:
-                log_capture = LogCapture()
-                log_capture.start()
-            
-            # 分析股票
-            report_path = analyzer.analyze_stock(valid_symbol, args.days, args.export_md)
-            
-            # 如果需要导出日志，停止捕获并保存
-            if args.export_log_md and log_capture:
-                log_content = log_capture.stop()
-                log_captures[valid_symbol] = log_content
-            
-            if report_path:
-                results[valid_symbol] = {
-                    'status': 'success',
-                    'report_path': report_path
-                }
-                if args.verbose:
-                    print(f"成功生成 {valid_symbol} 的分析报告: {report_path}")
-            else:
-                results[valid_symbol] = {
-                    'status': 'failed',
-                    'error': '分析失败'
-                }
-                print(f"分析 {valid_symbol} 失败")
-                
-        except Exception as e:
-            # 如果捕获了日志，需要停止捕获
-            if args.export_log_md and 'log_capture' in locals() and log_capture:
-                log_capture.stop()
-                
+        symbols.append(valid_symbol)
+    
+    for outcome in iter_analyses(symbols, args, render_pool):
+        valid_symbol = outcome['symbol']
+        
+        # 追加到全市场汇总表
+        if summary is not None and outcome['factor_analysis']:
+            summary.append(valid_symbol, outcome['factor_analysis'], outcome['last_bar_date'])
+        if outcome['log_content'] is not None:
+            log_captures[valid_symbol] = outcome['log_content']
+        
+        if outcome['error']:
             results[valid_symbol] = {
                 'status': 'error',
-                'error': str(e)
+                'error': outcome['error']
+            }
+        elif outcome['report_path']:
+            results[valid_symbol] = {
+                'status': 'success',
+                'report_path': outcome['report_path']
+            }
+            if args.verbose:
+                print(f"成功生成 {valid_symbol} 的分析报告: {outcome['report_path']}")
+                for chart_path in outcome['chart_paths'].values():
+                    print(f"成功生成 {valid_symbol} 的图表: {chart_path}")
+        else:
+            results[valid_symbol] = {
+                'status': 'failed',
+                'error': '分析失败'
             }
-            print(f"分析 {valid_symbol} 时发生错误: {str(e)}")
+            print(f"分析 {valid_symbol} 失败")
+    
+    close_analyzers()
+    
+    # 汇总表去重并按最终得分排序
+    if summary is not None:
+        ranking = summary.finalize()
+        print(f"全市场汇总表: {summary.path}（{len(ranking)}只股票）")
     
     # 导出日志为Markdown文件
+    pdf_jobs = []
     if args.export_log_md:
         for symbol, log_content in log_captures.items():
             md_file = export_log_to_markdown(symbol, log_content, args.output)
             
-            # 如果需要导出PDF，将Markdown转换为PDF
+            # 如果需要导出PDF，直接由日志内容生成文档结构（不再回读Markdown文件）
             if args.export_pdf and md_file:
-                convert_markdown_to_pdf(md_file)
+                document = AnalysisDocument.from_text(log_content, title=log_title(symbol))
+                pdf_jobs.append((document, os.path.splitext(md_file)[0] + '.pdf'))
+    
+    # 按渲染进程数分批生成PDF，每批只准备一次字体和样式
+    if pdf_jobs and not reportlab_available:
+        print("需要安装reportlab库才能转换PDF")
+        print("请运行: pip install reportlab")
+    elif pdf_jobs:
+        batches = max(render_pool.workers, 1)
+        futures = [render_pool.submit(write_pdfs, pdf_jobs[i::batches]) for i in range(batches)]
+        for future in futures:
+            try:
+                for pdf_file in future.result():
+                    if pdf_file:
+                        print(f"成功导出PDF: {pdf_file}")
+            except Exception as e:
+                print(f"转换PDF时发生错误: {str(e)}")
+    render_pool.close()
     
     return results
 
+def log_title(symbol):
+    """分析日志的标题"""
+    return f"{symbol} 股票分析日志 ({datetime.now().strftime('%Y-%m-%d')})"
+
 def export_log_to_markdown(symbol, log_content, output_dir):
     """将日志导出为Markdown文件"""
     timestamp = datetime.now().strftime('%Y-%m-%d')
     filename = f"{output_dir}/{symbol}_analysis_log_{timestamp}.md"
     
     with open(filename, 'w', encoding='utf-8') as f:
-        f.write(f"# {symbol} 股票分析日志 ({timestamp})\n\n")
+        f.write(f"# {log_title(symbol)}\n\n")
         # 不使用代码块标记，直接写入内容
         f.write(log_content)
     
@@ -209,7 +360,7 @@ def export_log_to_markdown(symbol, log_content, output_dir):
 
 def convert_markdown_to_pdf(markdown_file, pdf_file=None):
     """
-    将Markdown文件转换为PDF文件，保留所有原始内容和格式，包括中文字符和段落格式
+    将Markdown文件转换为PDF文件
     
     Args:
         markdown_file: Markdown文件路径
@@ -221,162 +372,12 @@ def convert_markdown_to_pdf(markdown_file, pdf_file=None):
     if pdf_file is None:
         pdf_file = os.path.splitext(markdown_file)[0] + '.pdf'
     
-    if not reportlab_available or not markdown_available:
-        print("需要安装reportlab和markdown库才能转换PDF")
-        print("请运行: pip install reportlab markdown")
-        return None
-    
-    try:
-        # 读取Markdown文件内容
-        with open(markdown_file, 'r', encoding='utf-8') as f:
-            md_content = f.read()
-        
-        # 提取代码块内容（保留原始格式）
-        code_blocks = []
-        code_block_pattern = r'```(.*?)```'
-        for i, match in enumerate(re.finditer(code_block_pattern, md_content, re.DOTALL)):
-            code_blocks.append(match.group(1))
-            # 替换为标记，以便后续处理
-            md_content = md_content.replace(match.group(0), f"__CODE_BLOCK_{i}__")
-        
-        # 将Markdown转换为HTML
-        html_content = markdown.markdown(md_content)
-        
-        # 提取纯文本内容（简单处理，实际应用可能需要更复杂的HTML解析）
-        text_content = re.sub(r'<[^>]+>', '\n', html_content)
-        
-        # 恢复代码块
-        for i, code_block in enumerate(code_blocks):
-            text_content = text_content.replace(f"__CODE_BLOCK_{i}__", code_block)
-        
-        # 创建PDF文档
-        doc = SimpleDocTemplate(
-            pdf_file,
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # 注册中文字体（使用系统字体）
-        try:
-            pdfmetrics.registerFont(TTFont('SimSun', '/System/Library/Fonts/PingFang.ttc'))
-            chinese_font = 'SimSun'
-        except:
-            try:
-                pdfmetrics.registerFont(TTFont('SimSun', '/System/Library/Fonts/STHeiti Light.ttc'))
-                chinese_font = 'SimSun'
-            except:
-                chinese_font = 'Helvetica'  # 如果找不到中文字体，使用默认字体
-                print("警告：未找到中文字体，PDF中的中文可能无法正确显示")
-        
-        # 创建样式
-        styles = getSampleStyleSheet()
-        styles.add(ParagraphStyle(
-            name='Chinese',
-            fontName=chinese_font,
-            fontSize=12,
-            leading=14,
-            firstLineIndent=0  # 移除首行缩进
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='ChineseHeading',
-            fontName=chinese_font,
-            fontSize=16,
-            leading=20,
-            spaceAfter=12,
-            spaceBefore=12,
-            alignment=0  # 左对齐
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='CodeBlock',
-            fontName='Courier',
-            fontSize=10,
-            leading=12,
-            leftIndent=20,
-            rightIndent=20,
-            spaceAfter=12,
-            spaceBefore=12,
-            backColor='#f5f5f5'
-        ))
-        
-        # 处理内容
-        story = []
-        
-        # 分割文本为行，保留原始格式
-        lines = text_content.split('\n')
-        
-        # 处理标题和内容
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            # 处理标题
-            if line.startswith('#'):
-                heading_level = len(re.match(r'^#+', line).group())
-                heading_text = line[heading_level:].strip()
-                
-                if heading_level == 1:
-                    story.append(Paragraph(heading_text, styles['Title']))
-                elif heading_level == 2:
-                    story.append(Paragraph(heading_text, styles['ChineseHeading']))
-                else:
-                    story.append(Paragraph(heading_text, styles['Heading3']))
-                
-                story.append(Spacer(1, 0.2 * inch))
-                i += 1
-                continue
-            
-            # 检查是否在代码块内
-            if i < len(lines) - 1 and lines[i+1].strip() == '```':
-                # 找到代码块的结束位置
-                start_idx = i + 2
-                end_idx = start_idx
-                while end_idx < len(lines) and lines[end_idx].strip() != '```':
-                    end_idx += 1
-                
-                # 提取代码块内容
-                code_content = '\n'.join(lines[start_idx:end_idx])
-                story.append(Paragraph(code_content, styles['CodeBlock']))
-                
-                i = end_idx + 1 if end_idx < len(lines) else len(lines)
-                continue
-            
-            # 处理普通段落，保留原始格式
-            # 收集连续的非空行作为一个段落
-            paragraph_lines = []
-            while i < len(lines) and lines[i].strip():
-                paragraph_lines.append(lines[i])
-                i += 1
-            
-            if paragraph_lines:
-                # 保留原始格式，不合并行
-                for para_line in paragraph_lines:
-                    if para_line.strip():  # 跳过空行
-                        # 使用XML转义字符，确保特殊字符正确显示
-                        para_line = para_line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                        story.append(Paragraph(para_line, styles['Chinese']))
-            
-            # 跳过连续的空行
-            while i < len(lines) and not lines[i].strip():
-                i += 1
-                
-            # 在段落之间添加间距
-            if paragraph_lines:
-                story.append(Spacer(1, 0.1 * inch))
-        
-        # 生成PDF
-        doc.build(story)
-        
+    with open(markdown_file, 'r', encoding='utf-8') as f:
+        document = AnalysisDocument.from_text(f.read())
+    pdf_file = write_pdfs([(document, pdf_file)])[0]
+    if pdf_file:
         print(f"成功将 {markdown_file} 转换为 {pdf_file}")
-        return pdf_file
-    
-    except Exception as e:
-        print(f"转换PDF时发生错误: {str(e)}")
-        return None
+    return pdf_file
 
 def main():
     """主函数"""
@@ -0,0 +1,272 @@
+import argparse
+import copy
+import itertools
+import json
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from .config import FACTOR_CONFIG
+from .models import MultiFactorModel
+
+# 进程池工作进程中共享的因子矩阵（通过initializer传入，避免每个任务重复序列化）
+_worker_state = {}
+
+def _init_worker(factors, forward_returns, metric):
+    _worker_state['factors'] = factors
+    _worker_state['forward_returns'] = forward_returns
+    _worker_state['metric'] = metric
+
+def _evaluate_chunk(factor_weights):
+    """在工作进程中评估一批候选权重"""
+    return _evaluate(
+        _worker_state['factors'],
+        _worker_state['forward_returns'],
+        factor_weights,
+        _worker_state['metric']
+    )
+
+def _evaluate(factors, forward_returns, factor_weights, metric='ic'):
+    """
+    评估候选权重与远期收益的相关性
+    params:
+        factors: np.ndarray - 观测数×因子数的因子得分矩阵
+        forward_returns: np.ndarray - 观测数的远期收益
+        factor_weights: np.ndarray - 候选数×因子数的有效因子权重
+        metric: str - ic（Pearson）或rank_ic（Spearman）
+    returns:
+        np.ndarray - 每个候选权重的相关系数
+    """
+    if metric == 'rank_ic':
+        from scipy.stats import rankdata
+        composite = factors @ factor_weights.T  # 观测数×候选数
+        composite = rankdata(composite, axis=0)
+        composite -= composite.mean(axis=0)
+        target = rankdata(forward_returns)
+        target -= target.mean()
+        numerator = composite.T @ target
+        denominator = np.linalg.norm(composite, axis=0) * np.linalg.norm(target)
+    else:
+        # Pearson相关只依赖因子协方差和因子-收益协方差，无需展开组合得分矩阵
+        centered = factors - factors.mean(axis=0)
+        target = forward_returns - forward_returns.mean()
+        covariance = centered.T @ centered
+        exposure = centered.T @ target
+        numerator = factor_weights @ exposure
+        variance = np.einsum('ij,jk,ik->i', factor_weights, covariance, factor_weights)
+        denominator = np.sqrt(np.clip(variance, 0, None)) * np.linalg.norm(target)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator, 0.0)
+
+
+class WeightCalibrator:
+    """
+    因子权重校准
+    先在历史价格上一次性计算所有因子得分序列，再把候选权重组织成矩阵，
+    通过矩阵乘法批量评估其与远期收益的相关性（IC），可分块交给进程池并行计算。
+    基本面和情绪因子没有历史序列，其类别权重保持配置值不变。
+    """
+    def __init__(self, model=None, horizon=20, metric='ic'):
+        self.model = model or MultiFactorModel()
+        self.base_weights = copy.deepcopy(self.model.weights)
+        self.horizon = horizon
+        self.metric = metric
+        self.factors = None
+        self.forward_returns = None
+        self.factor_names = []
+        self.categories = []
+
+    def prepare(self, price_panel):
+        """
+        计算因子得分序列和远期收益
+        params:
+            price_panel: dict - 股票代码到价格数据(pd.DataFrame)的映射
+        returns:
+            int - 有效观测数
+        """
+        frames = []
+        for symbol, price_data in price_panel.items():
+            factor_scores = self.model.calculate_factor_history(price_data, weights=self.base_weights)
+            close = price_data['Close']
+            factor_scores['forward_return'] = close.shift(-self.horizon) / close - 1
+            frames.append(factor_scores)
+
+        panel = pd.concat(frames, ignore_index=True).dropna()
+
+        # 只校准有历史序列的类别
+        self.categories = [
+            category for category, spec in self.base_weights.items()
+            if any(f in panel.columns for f in spec['factors'])
+        ]
+        self.factor_names = [
+            f for category in self.categories
+            for f in self.base_weights[category]['factors'] if f in panel.columns
+        ]
+        self.factors = panel[self.factor_names].to_numpy(dtype=float)
+        self.forward_returns = panel['forward_return'].to_numpy(dtype=float)
+        return len(panel)
+
+    def _category_slices(self):
+        slices = []
+        start = 0
+        for category in self.categories:
+            count = sum(1 for f in self.base_weights[category]['factors'] if f in self.factor_names)
+            slices.append(slice(start, start + count))
+            start += count
+        return slices
+
+    def sample_candidates(self, n_samples=10000, method='random', step=0.1, seed=None):
+        """
+        生成候选权重
+        params:
+            n_samples: int - 随机搜索的候选数量
+            method: str - random（Dirichlet随机采样）或grid（按step枚举单纯形网格）
+            step: float - 网格步长
+            seed: int - 随机种子
+        returns:
+            tuple - (类别权重矩阵, 类别内因子权重矩阵)，均为候选数×维度
+        """
+        slices = self._category_slices()
+        if method == 'grid':
+            category_grid = self._simplex_grid(len(self.categories), step)
+            factor_grids = [self._simplex_grid(s.stop - s.start, step) for s in slices]
+            combos = list(itertools.product(range(len(category_grid)), *[range(len(g)) for g in factor_grids]))
+            combos = np.array(combos)
+            category_weights = category_grid[combos[:, 0]]
+            factor_weights = np.hstack([
+                grid[combos[:, i + 1]] for i, grid in enumerate(factor_grids)
+            ])
+        else:
+            rng = np.random.default_rng(seed)
+            category_weights = rng.dirichlet(np.ones(len(self.categories)), n_samples)
+            factor_weights = np.hstack([
+                rng.dirichlet(np.ones(s.stop - s.start), n_samples) for s in slices
+            ])
+        return category_weights, factor_weights
+
+    @staticmethod
+    def _simplex_grid(dimension, step):
+        """枚举和为1、步长为step的非负权重"""
+        units = int(round(1 / step))
+        points = [
+            p for p in itertools.product(range(units + 1), repeat=dimension - 1)
+            if sum(p) <= units
+        ]
+        grid = np.array([list(p) + [units - sum(p)] for p in points], dtype=float)
+        return grid / units
+
+    def _effective_weights(self, category_weights, factor_weights):
+        """类别权重×类别内因子权重，得到每个因子的有效权重"""
+        effective = np.empty_like(factor_weights)
+        for i, s in enumerate(self._category_slices()):
+            effective[:, s] = factor_weights[:, s] * category_weights[:, [i]]
+        return effective
+
+    def search(self, n_samples=10000, method='random', step=0.1, workers=1, chunk_size=2000, seed=None):
+        """
+        搜索最优权重
+        params:
+            n_samples: int - 随机搜索的候选数量
+            method: str - random或grid
+            step: float - 网格步长
+            workers: int - 进程数，大于1时分块并行评估
+            chunk_size: int - 每个任务的候选数量
+            seed: int - 随机种子
+        returns:
+            dict - 最优权重配置及评估结果
+        """
+        if self.factors is None or len(self.factors) == 0:
+            raise ValueError("没有可用的历史因子数据，请先调用prepare")
+
+        category_weights, factor_weights = self.sample_candidates(n_samples, method, step, seed)
+        effective = self._effective_weights(category_weights, factor_weights)
+        chunks = [effective[i:i + chunk_size] for i in range(0, len(effective), chunk_size)]
+
+        if workers > 1:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(self.factors, self.forward_returns, self.metric)
+            ) as executor:
+                scores = np.concatenate(list(executor.map(_evaluate_chunk, chunks)))
+        else:
+            scores = np.concatenate([
+                _evaluate(self.factors, self.forward_returns, chunk, self.metric)
+                for chunk in chunks
+            ])
+
+        best = int(np.argmax(scores))
+        return {
+            'weights': self._to_config(category_weights[best], factor_weights[best]),
+            'score': float(scores[best]),
+            'baseline_score': float(self.evaluate_config(self.base_weights)),
+            'metric': self.metric,
+            'horizon': self.horizon,
+            'observations': len(self.forward_returns),
+            'candidates': len(scores)
+        }
+
+    def evaluate_config(self, weights):
+        """评估一组FACTOR_CONFIG格式的权重"""
+        effective = np.array([[
+            weights[category]['weight'] * weights[category]['factors'][f]
+            for category in self.categories
+            for f in self.base_weights[category]['factors'] if f in self.factor_names
+        ]])
+        return _evaluate(self.factors, self.forward_returns, effective, self.metric)[0]
+
+    def _to_config(self, category_weights, factor_weights):
+        """将最优候选转换回FACTOR_CONFIG['weights']格式"""
+        weights = copy.deepcopy(self.base_weights)
+        # 被校准类别按原有总权重重新分配，其余类别保持不变
+        calibrated_total = sum(weights[c]['weight'] for c in self.categories)
+        for i, (category, s) in enumerate(zip(self.categories, self._category_slices())):
+            weights[category]['weight'] = round(float(category_weights[i] * calibrated_total), 4)
+            names = [f for f in self.base_weights[category]['factors'] if f in self.factor_names]
+            for name, value in zip(names, factor_weights[s]):
+                weights[category]['factors'][name] = round(float(value), 4)
+        return weights
+
+    @staticmethod
+    def write_config(result, path):
+        """将校准结果写入JSON文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='因子权重校准')
+    parser.add_argument('symbols', nargs='+', help='用于校准的股票代码')
+    parser.add_argument('--days', type=int, default=1825, help='历史数据天数，默认1825天')
+    parser.add_argument('--horizon', type=int, default=20, help='远期收益天数，默认20天')
+    parser.add_argument('--method', choices=['random', 'grid'], default='random', help='搜索方式')
+    parser.add_argument('--samples', type=int, default=50000, help='随机搜索的候选数量')
+    parser.add_argument('--step', type=float, default=0.1, help='网格搜索步长')
+    parser.add_argument('--metric', choices=['ic', 'rank_ic'], default='ic', help='评估指标')
+    parser.add_argument('--workers', type=int, default=1, help='并行进程数')
+    parser.add_argument('--output', default='calibrated_weights.json', help='输出文件')
+    args = parser.parse_args()
+
+    from .data_fetcher import DataFetcher
+    fetcher = DataFetcher()
+    start_date = (datetime.now() - timedelta(days=args.days)).strftime('%Y-%m-%d')
+    price_panel = {}
+    for symbol in args.symbols:
+        stock_data = fetcher.get_stock_data(symbol.upper(), start_date)
+        if stock_data is not None:
+            price_panel[symbol.upper()] = stock_data['price_data']
+
+    calibrator = WeightCalibrator(horizon=args.horizon, metric=args.metric)
+    observations = calibrator.prepare(price_panel)
+    print(f"有效观测数: {observations}")
+
+    result = calibrator.search(args.samples, args.method, args.step, args.workers)
+    calibrator.write_config(result, args.output)
+    print(f"候选权重数: {result['candidates']}")
+    print(f"原始权重{result['metric']}: {result['baseline_score']:.4f}")
+    print(f"最优权重{result['metric']}: {result['score']:.4f}")
+    print(f"最优权重已写入: {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # 批量渲染不需要显示设备
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+from .config import CHART_CONFIG, REPORT_CONFIG
+
+# 价格图各线条的样式
+LINE_STYLES = {
+    'Close': {'color': 'black', 'linewidth': 1.2},
+    'upper': {'color': 'gray', 'linewidth': 0.6, 'linestyle': '--'},
+    'lower': {'color': 'gray', 'linewidth': 0.6, 'linestyle': '--'}
+}
+MA_STYLE = {'linewidth': 0.8}
+
+
+class ChartRenderer:
+    """
+    图表渲染器（Agg后端）
+    价格图和雷达图的Figure、坐标轴和线条在多只股票间复用，每次只更新数据后保存为PNG，
+    不经过pyplot，批量渲染时不会累积Figure。
+    """
+    def __init__(self, dpi=None):
+        """
+        params:
+            dpi: int - 输出分辨率，默认取CHART_CONFIG['dpi']
+        """
+        self.dpi = dpi or CHART_CONFIG['dpi']
+        # PNG压缩级别越低编码越快，文件略大
+        self.png_options = {'compress_level': CHART_CONFIG['png_compress_level']}
+
+        self.price_figure = Figure(figsize=CHART_CONFIG['price_size'])
+        FigureCanvasAgg(self.price_figure)
+        self.price_ax = self.price_figure.add_subplot()
+        self.price_ax.grid(alpha=0.3)
+        # 横轴为K线序号，刻度显示对应日期（跳过非交易日）
+        self.price_ax.xaxis.set_major_locator(MaxNLocator(8, integer=True))
+        self.price_ax.xaxis.set_major_formatter(FuncFormatter(self._format_date))
+        self.price_lines = {}
+        self.band = None
+        self.dates = []
+
+        self.radar_figure = Figure(figsize=CHART_CONFIG['radar_size'])
+        FigureCanvasAgg(self.radar_figure)
+        self.radar_ax = self.radar_figure.add_subplot(projection='polar')
+        self.radar_line, = self.radar_ax.plot([], [])
+        self.radar_fill = None
+
+    def _format_date(self, x, pos=None):
+        i = int(round(x))
+        return str(self.dates[i])[:10] if 0 <= i < len(self.dates) else ''
+
+    def _line(self, label):
+        line = self.price_lines.get(label)
+        if line is None:
+            line, = self.price_ax.plot([], [], label=label, **LINE_STYLES.get(label, MA_STYLE))
+            self.price_lines[label] = line
+        return line
+
+    def render_price_chart(self, symbol, price_data, path, ma_data=None, bollinger_data=None):
+        """
+        绘制收盘价、均线和布林带
+        params:
+            symbol: str - 股票代码
+            price_data: pd.DataFrame - 价格数据（需要Close列）
+            path: str - PNG路径
+            ma_data: pd.DataFrame - 均线（每列一条）
+            bollinger_data: pd.DataFrame - 布林带（upper、lower列）
+        returns:
+            str - PNG路径
+        """
+        close = price_data['Close']
+        x = np.arange(len(close))
+        self.dates = list(close.index)
+
+        series = {'Close': close}
+        if ma_data is not None:
+            series.update(ma_data.items())
+        if bollinger_data is not None:
+            series.update(upper=bollinger_data['upper'], lower=bollinger_data['lower'])
+
+        for label, line in self.price_lines.items():
+            line.set_visible(label in series)
+        for label, values in series.items():
+            line = self._line(label)
+            line.set_data(x, np.asarray(values, dtype=float))
+            line.set_visible(True)
+
+        if self.band is not None:
+            self.band.remove()
+            self.band = None
+        if bollinger_data is not None:
+            self.band = self.price_ax.fill_between(
+                x, np.asarray(bollinger_data['lower'], dtype=float), np.asarray(bollinger_data['upper'], dtype=float),
+                color='gray', alpha=0.1, linewidth=0
+            )
+
+        ax = self.price_ax
+        ax.relim(visible_only=True)
+        ax.autoscale_view()
+        ax.set_title(symbol)
+        ax.legend(handles=[self.price_lines[label] for label in series if label != 'lower'],
+                  loc='upper left', fontsize='small')
+        self.price_figure.savefig(path, dpi=self.dpi, pil_kwargs=self.png_options)
+        return path
+
+    def render_score_radar(self, symbol, scores, path):
+        """
+        绘制类别得分雷达图
+        params:
+            symbol: str - 股票代码
+            scores: dict - 类别 -> 得分
+            path: str - PNG路径
+        returns:
+            str - PNG路径
+        """
+        values = np.array(list(scores.values()), dtype=float)
+        angles = np.linspace(0, 2 * np.pi, len(values), endpoint=False)
+        closed_angles = np.append(angles, angles[:1])  # 闭合图形
+        closed_values = np.append(values, values[:1])
+
+        ax = self.radar_ax
+        self.radar_line.set_data(closed_angles, closed_values)
+        if self.radar_fill is not None:
+            self.radar_fill.remove()
+        self.radar_fill, = ax.fill(closed_angles, closed_values, alpha=0.25, color=self.radar_line.get_color())
+        ax.set_xticks(angles)
+        ax.set_xticklabels(list(scores))
+        ax.set_ylim(min(-1.0, np.nanmin(values)), max(1.0, np.nanmax(values)))
+        ax.set_title(symbol)
+        self.radar_figure.savefig(path, dpi=self.dpi, pil_kwargs=self.png_options)
+        return path
+
+
+# 渲染器复用的Figure不是线程安全的，线程池模式下每个线程各自持有一个渲染器
+_local = threading.local()
+
+def get_renderer():
+    """当前线程的图表渲染器（首次使用时创建，之后复用）"""
+    renderer = getattr(_local, 'renderer', None)
+    if renderer is None:
+        renderer = _local.renderer = ChartRenderer()
+    return renderer
+
+
+def render_charts(symbol, price_data, ma_data=None, bollinger_data=None, scores=None, output_path=None):
+    """
+    生成一只股票的图表（可在渲染进程中执行）
+    params:
+        symbol: str - 股票代码
+        price_data: pd.DataFrame - 价格数据
+        ma_data: pd.DataFrame - 均线
+        bollinger_data: pd.DataFrame - 布林带
+        scores: dict - 类别得分，为空时不生成雷达图
+        output_path: str - 输出目录，默认取REPORT_CONFIG['output_path']
+    returns:
+        dict - 图表名称 -> PNG路径
+    """
+    output_path = output_path or REPORT_CONFIG['output_path']
+    os.makedirs(output_path, exist_ok=True)
+    timestamp = datetime.now().strftime(REPORT_CONFIG['date_format'])
+    renderer = get_renderer()
+
+    paths = {'price': renderer.render_price_chart(
+        symbol, price_data, f"{output_path}/{symbol}_price_{timestamp}.png", ma_data, bollinger_data
+    )}
+    if scores:
+        paths['scores'] = renderer.render_score_radar(
+            symbol, scores, f"{output_path}/{symbol}_scores_{timestamp}.png"
+        )
+    return paths
+
+
+def _sample_data(n, seed=0):
+    """基准测试用的合成价格、均线和布林带"""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2000-01-03', periods=n).strftime('%Y-%m-%d')
+    close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, n))), index=index)
+    ma_data = pd.DataFrame({f'MA{p}': close.rolling(p).mean() for p in (5, 10, 20, 60)})
+    std = close.rolling(20).std()
+    bollinger_data = pd.DataFrame({'upper': ma_data['MA20'] + 2 * std, 'lower': ma_data['MA20'] - 2 * std})
+    scores = {'technical': 0.4, 'fundamental': -0.2, 'risk': 0.1, 'sentiment': 0.6}
+    return close.to_frame('Close'), ma_data, bollinger_data, scores
+
+
+def _memory_usage():
+    """当前进程常驻内存（字节），非Linux系统退化为峰值常驻内存"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def benchmark(count=100, workers=0, bars=750, check_memory=False):
+    """
+    图表渲染吞吐量测试（每次渲染生成价格图和雷达图两张PNG）
+    params:
+        count: int - 渲染次数
+        workers: int - 渲染进程数，0为在当前进程渲染
+        bars: int - 每张价格图的K线数
+        check_memory: bool - 记录内存（仅当前进程渲染），检查是否随渲染次数增长
+    returns:
+        dict - 图表数、耗时、图表/秒，以及check_memory时各检查点的常驻内存
+    """
+    from .rendering import RenderPool
+
+    price_data, ma_data, bollinger_data, scores = _sample_data(bars)
+    memory = []
+    with tempfile.TemporaryDirectory() as output_path:
+        # 预热：创建渲染器和字体缓存，不计入耗时
+        render_charts('WARMUP', price_data, ma_data, bollinger_data, scores, output_path)
+
+        start = time.perf_counter()
+        if workers:
+            with RenderPool(workers, max_pending=4 * workers) as pool:
+                futures = [
+                    pool.submit(render_charts, f'S{i}', price_data, ma_data, bollinger_data, scores, output_path)
+                    for i in range(count)
+                ]
+                for future in futures:
+                    future.result()
+        else:
+            checkpoint = max(count // 10, 1)
+            for i in range(count):
+                render_charts(f'S{i}', price_data, ma_data, bollinger_data, scores, output_path)
+                if check_memory and (i + 1) % checkpoint == 0:
+                    gc.collect()
+                    memory.append((i + 1, _memory_usage()))
+        seconds = time.perf_counter() - start
+
+    return {
+        'charts': 2 * count,
+        'seconds': seconds,
+        'charts_per_second': 2 * count / seconds,
+        'memory': memory
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='图表渲染基准测试')
+    parser.add_argument('--count', type=int, default=100, help='渲染次数（每次两张图）')
+    parser.add_argument('--workers', type=int, default=0, help='渲染进程数，0为当前进程')
+    parser.add_argument('--bars', type=int, default=750, help='每张价格图的K线数')
+    parser.add_argument('--check-memory', action='store_true', help='检查内存是否随渲染次数增长')
+    parser.add_argument('--max-growth', type=float, default=20.0,
+                        help='--check-memory时允许的内存增长（MB），超出时返回非零')
+    args = parser.parse_args()
+
+    result = benchmark(args.count, args.workers, args.bars, args.check_memory)
+    print(f"图表数: {result['charts']}，耗时: {result['seconds']:.2f}s，吞吐量: {result['charts_per_second']:.1f} 图/秒")
+    if result['memory']:
+        for renders, current in result['memory']:
+            print(f"  {renders:>6}次渲染后: {current / 2 ** 20:.1f} MB")
+        growth = result['memory'][-1][1] - result['memory'][0][1]
+        print(f"内存增长（首个检查点至结束）: {growth / 2 ** 20:.1f} MB")
+        if growth > args.max_growth * 2 ** 20:
+            print(f"内存增长超过 {args.max_growth:.1f} MB")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,11 +12,29 @@ API_CONFIG = {
         'api_key': 'your_api_key_here',
         'base_url': 'https://api.stocktwits.com/api/2',
         'requests_per_hour': 500,
+        'timeout': 10,          # 单次请求超时（秒）
+        'max_pages': 10,        # 单只股票最多翻页数
+        'max_retries': 3,       # 超时/429/5xx重试次数
+        'pool_size': 16,        # 连接池大小
+        'max_concurrency': 8,   # 多股票并发请求数
+        'backoff': 1.0,         # 重试的初始退避时间（秒），每次翻倍
+        'use_stub': False,      # 为True时连接本地替身服务（stocktwits_stub）
         'sentiment_weights': {
             'Bullish': 1,
             'Bearish': -1,
             'Neutral': 0
         }
+    },
+    'stocktwits_stub': {
+        'host': '127.0.0.1',
+        'port': 8765,
+        'latency': 0.05,        # 每个请求的模拟延迟（秒）
+        'error_rate': 0.0,      # 返回503的比例
+        'rate_limit_rate': 0.0, # 返回429的比例
+        'retry_after': 1,       # 429响应的Retry-After（秒）
+        'page_size': 30,        # 每页消息数
+        'messages_per_symbol': 200,  # 没有录制数据时每只股票的合成消息数
+        'fixture_dir': None     # 录制消息目录（{SYMBOL}.json）
     }
 }
 
@@ -40,7 +58,46 @@ INDICATOR_CONFIG = {
 REPORT_CONFIG = {
     'output_path': './reports',
     'template_path': './templates',
-    'date_format': '%Y-%m-%d'
+    'date_format': '%Y-%m-%d',
+    'format': 'excel',         # 默认报告格式: excel、csv、json（JSON Lines）、parquet
+    'render_workers': 0,       # 报告渲染进程数，0为在分析进程内同步渲染
+    'excel_streaming': True,   # Excel报告使用只写模式逐行写入（内存与历史长度无关）
+    # PDF中文字体候选（按顺序使用第一个可用的）
+    'pdf_fonts': [
+        '/System/Library/Fonts/PingFang.ttc',
+        '/System/Library/Fonts/STHeiti Light.ttc',
+        '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc',
+        '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc',
+        'C:/Windows/Fonts/simsun.ttc'
+    ]
+}
+
+# 图表配置
+CHART_CONFIG = {
+    'enabled': False,          # 是否随报告生成PNG图表（价格/均线/布林带图、得分雷达图）
+    'dpi': 100,
+    'price_size': (10, 6),     # 价格图尺寸（英寸）
+    'radar_size': (6, 6),      # 雷达图尺寸（英寸）
+    'png_compress_level': 1    # PNG压缩级别（0-9）
+}
+
+# 缓存配置
+CACHE_CONFIG = {
+    'fetch_cache': {
+        'max_entries': 16            # DataFetcher内存缓存的最大条目数（LRU）
+    },
+    'score_cache': {
+        'enabled': True,
+        'path': './cache/scores.db'  # 多因子得分缓存（SQLite）
+    },
+    'regime_cache': {
+        'enabled': True,
+        'path': './cache/regime'     # 基准指数市场状态序列缓存目录（按日）
+    },
+    'sentiment_store': {
+        'enabled': True,
+        'path': './cache/sentiment.db'  # StockTwits消息存储（SQLite），增量获取
+    }
 }
 
 # 添加情绪分析配置
@@ -49,7 +106,14 @@ SENTIMENT_CONFIG = {
     'time_window': '7d',       # 情绪分析时间窗口
     'bullish_threshold': 0.6,  # 看多阈值
     'bearish_threshold': -0.3, # 看空阈值
-    'volume_factor': 0.3       # 成交量因子权重
+    'volume_factor': 0.3,      # 成交量因子权重
+    'decay_halflife': '3d',    # 情绪序列的时间衰减半衰期
+    'market_timezone': 'America/New_York',  # 消息按交易所时区归入交易日
+    'lexicon': {
+        'enabled': True,       # 用词典为没有情绪标签的消息打分
+        'path': None,          # 自定义词典（JSON: {词: 权重}），默认使用内置词典
+        'alpha': 4.0           # 得分归一化参数 s/sqrt(s²+alpha)
+    }
 }
 
 # 添加多因子模型配置
@@ -94,12 +158,25 @@ FACTOR_CONFIG = {
     # 因子标准化参数
     'normalization': {
         'method': 'zscore',  # 可选: zscore, minmax, rank
-        'winsorize': 0.05    # 去极值比例
+        'winsorize': 0.05,   # 去极值比例
+        'inverse_factors': ['debt_ratio', 'var', 'max_drawdown']  # 数值越小越好的因子
+    },
+    
+    # 历史得分序列参数
+    'history': {
+        'risk_window': 252,  # 风险指标滚动窗口
+        'min_periods': 20    # 最少样本数
     },
     
     # 市场状态阈值
     'market_state': {
         'bull_threshold': 0.2,   # 牛市判定阈值（20日涨幅）
         'bear_threshold': -0.2,  # 熊市判定阈值（20日跌幅）
+        'volatility_threshold': 0.3,  # 高波动判定阈值（年化波动率）
+        'window': 20,            # 市场状态分析窗口
+        'trend_short_window': 5,   # 趋势强度短期均线窗口
+        'trend_long_window': 20,   # 趋势强度长期均线窗口
+        'benchmark': 'SPY',      # 市场状态基准指数，设为None时按个股自身行情判断
+        'benchmark_days': 365    # 基准指数历史数据天数
     }
 } 
\ No newline at end of file
@@ -1,12 +1,14 @@
-import yfinance as yf
 import pandas as pd
-import requests
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from .config import API_CONFIG
+from .config import API_CONFIG, CACHE_CONFIG
+from .logger import log
 
 class DataFetcher:
-    def __init__(self):
-        self.cache = {}  # 简单的内存缓存
+    def __init__(self, max_entries=None):
+        # 内存缓存（LRU），限制条目数以免批量分析时占用的内存持续增长
+        self.cache = OrderedDict()
+        self.max_entries = max_entries or CACHE_CONFIG['fetch_cache']['max_entries']
         
     def get_stock_data(self, symbol: str, start_date: str, end_date: str = None):
         """获取股票基础数据"""
@@ -14,9 +16,11 @@ class DataFetcher:
             # 使用缓存键
             cache_key = f"{symbol}_{start_date}_{end_date}"
             if cache_key in self.cache:
+                self.cache.move_to_end(cache_key)
                 return self.cache[cache_key]
             
-            # 获取数据
+            # 获取数据（yfinance导入较慢，首次获取时才导入）
+            import yfinance as yf
             stock = yf.Ticker(symbol)
             hist = stock.history(start=start_date, end=end_date)
             
@@ -26,8 +30,9 @@ class DataFetcher:
             
             # 获取财务数据
             financial_data = {}
+            fundamentals_period = None
             try:
-                print(f"\n获取 {symbol} 的财务数据...")
+                log(f"\n获取 {symbol} 的财务数据...")
                 
                 # 获取基础信息
                 info = stock.info
@@ -36,6 +41,7 @@ class DataFetcher:
                 balance_sheet = stock.balance_sheet
                 if not balance_sheet.empty:
                     latest = balance_sheet.iloc[:, 0]
+                    fundamentals_period = str(balance_sheet.columns[0])[:10]  # 财报期
                     # 尝试更多可能的字段名
                     total_liabilities = float(
                         latest.get('Total Liabilities') or 
@@ -83,26 +89,29 @@ class DataFetcher:
                     financial_data['DebtRatio'] = 0
                 
                 # 打印获取到的数据
-                print("\n获取到的财务数据（百万）:")
+                log("\n获取到的财务数据（百万）:")
                 for key, value in financial_data.items():
-                    print(f"{key}: {value:,.2f}")
+                    log(f"{key}: {value:,.2f}")
                 
                 data = {
                     'price_data': hist,
                     'basic_info': info,
-                    'financial_data': financial_data
+                    'financial_data': financial_data,
+                    'fundamentals_period': fundamentals_period
                 }
                 
                 # 存入缓存
                 self.cache[cache_key] = data
+                while len(self.cache) > self.max_entries:
+                    self.cache.popitem(last=False)
                 return data
                 
             except Exception as e:
-                print(f"财务数据获取错误: {str(e)}")
+                log(f"财务数据获取错误: {str(e)}", 'error')
                 return None
                 
         except Exception as e:
-            print(f"数据获取失败: {str(e)}")
+            log(f"数据获取失败: {str(e)}", 'error')
             return None
     
     def clear_cache(self):
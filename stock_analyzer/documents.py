@@ -0,0 +1,379 @@
+import os
+import re
+from datetime import datetime
+from functools import lru_cache
+from importlib.util import find_spec
+from xml.sax.saxutils import escape
+from .config import REPORT_CONFIG
+from .logger import log
+
+# 可选依赖：PDF需要reportlab（只检查是否安装，生成PDF时才导入）
+reportlab_available = find_spec('reportlab') is not None
+
+HEADING_PATTERN = re.compile(r'^(#{1,6})\s*(.*)$')
+
+
+def analysis_lines(symbol, report_data):
+    """
+    分析报告正文（与分析日志格式一致的文本行）
+    params:
+        symbol: str - 股票代码
+        report_data: dict - 报告部分名称 -> 数据
+    returns:
+        list - 文本行
+    """
+    # 准备报告内容
+    report_content = []
+
+    # 添加财务指标
+    if '财务指标' in report_data:
+        financial_ratios = report_data['财务指标']
+        report_content.append(f"获取 {symbol} 的财务数据...")
+        report_content.append("")
+        report_content.append("获取到的财务数据（百万）:")
+
+        # 添加可用的财务数据
+        if 'ROE' in financial_ratios:
+            report_content.append(f"ROE: {financial_ratios['ROE']:.2f}")
+        if 'DebtRatio' in financial_ratios:
+            report_content.append(f"DebtRatio: {financial_ratios['DebtRatio']:.2f}")
+        report_content.append("")
+
+    # 添加多因子分析
+    if '多因子分析' in report_data:
+        factor_analysis = report_data['多因子分析']
+
+        # 确保raw_values存在
+        if 'raw_values' in factor_analysis:
+            report_content.append("原始指标值:")
+            if 'roe' in factor_analysis['raw_values']:
+                report_content.append(f"ROE: {factor_analysis['raw_values']['roe']:.2f}%")
+            if 'debt_ratio' in factor_analysis['raw_values']:
+                report_content.append(f"负债率: {factor_analysis['raw_values']['debt_ratio']:.2f}%")
+            report_content.append("")
+
+        # 确保normalized_scores存在
+        if 'normalized_scores' in factor_analysis:
+            report_content.append("标准化后得分:")
+            if 'roe' in factor_analysis['normalized_scores']:
+                report_content.append(f"roe: {factor_analysis['normalized_scores']['roe']:.2f}")
+            if 'debt_ratio' in factor_analysis['normalized_scores']:
+                report_content.append(f"debt_ratio: {factor_analysis['normalized_scores']['debt_ratio']:.2f}")
+            if 'fcf' in factor_analysis['normalized_scores']:
+                report_content.append(f"fcf: {factor_analysis['normalized_scores']['fcf']:.2f}")
+            if 'ev_ebitda' in factor_analysis['normalized_scores']:
+                report_content.append(f"ev_ebitda: {factor_analysis['normalized_scores']['ev_ebitda']:.2f}")
+            if 'dividend_coverage' in factor_analysis['normalized_scores']:
+                report_content.append(f"dividend_coverage: {factor_analysis['normalized_scores']['dividend_coverage']:.2f}")
+            report_content.append("")
+
+        # 确保category_scores存在
+        if 'category_scores' in factor_analysis and 'fundamental' in factor_analysis['category_scores']:
+            report_content.append(f"最终基本面得分: {factor_analysis['category_scores']['fundamental']:.2f}")
+            report_content.append("")
+
+        # 确保raw_values存在
+        if 'raw_values' in factor_analysis:
+            report_content.append("技术指标原始值:")
+            if 'ma_trend' in factor_analysis['raw_values']:
+                report_content.append(f"MA趋势: {factor_analysis['raw_values']['ma_trend']:.2f}%")
+            if 'atr' in factor_analysis['raw_values']:
+                report_content.append(f"ATR: {factor_analysis['raw_values']['atr']:.2f}")
+            if 'obv' in factor_analysis['raw_values']:
+                report_content.append(f"OBV: {factor_analysis['raw_values']['obv']:,.0f}")
+            if 'adx' in factor_analysis['raw_values']:
+                report_content.append(f"ADX: {factor_analysis['raw_values']['adx']:.2f}")
+            report_content.append("")
+
+        # 确保technical_trends存在
+        if 'technical_trends' in factor_analysis:
+            report_content.append("技术指标趋势:")
+            if 'atr_trend' in factor_analysis['technical_trends']:
+                report_content.append(f"atr_trend: {factor_analysis['technical_trends']['atr_trend']*100:.2f}%")
+            if 'obv_trend' in factor_analysis['technical_trends']:
+                report_content.append(f"obv_trend: {factor_analysis['technical_trends']['obv_trend']*100:.2f}%")
+            if 'adx_trend' in factor_analysis['technical_trends']:
+                report_content.append(f"adx_trend: {factor_analysis['technical_trends']['adx_trend']*100:.2f}%")
+            report_content.append("")
+
+        # 确保category_scores存在
+        if 'category_scores' in factor_analysis and 'technical' in factor_analysis['category_scores']:
+            report_content.append(f"最终技术面得分: {factor_analysis['category_scores']['technical']:.2f}")
+            report_content.append("")
+
+        # 确保raw_values存在
+        if 'raw_values' in factor_analysis:
+            report_content.append("风险指标原始值:")
+            if 'var' in factor_analysis['raw_values']:
+                report_content.append(f"VaR(95%): {factor_analysis['raw_values']['var']*100:.2f}%")
+            if 'sharpe' in factor_analysis['raw_values']:
+                report_content.append(f"夏普比率: {factor_analysis['raw_values']['sharpe']:.2f}")
+            if 'max_drawdown' in factor_analysis['raw_values']:
+                report_content.append(f"最大回撤: {factor_analysis['raw_values']['max_drawdown']*100:.2f}%")
+            report_content.append("")
+
+        # 确保risk_scores存在
+        if 'risk_scores' in factor_analysis:
+            report_content.append("风险指标标准化得分:")
+            if 'var' in factor_analysis['risk_scores']:
+                report_content.append(f"var: {factor_analysis['risk_scores']['var']:.2f}")
+            if 'sharpe' in factor_analysis['risk_scores']:
+                report_content.append(f"sharpe: {factor_analysis['risk_scores']['sharpe']:.2f}")
+            if 'max_drawdown' in factor_analysis['risk_scores']:
+                report_content.append(f"max_drawdown: {factor_analysis['risk_scores']['max_drawdown']:.2f}")
+            report_content.append("")
+
+        # 确保category_scores存在
+        if 'category_scores' in factor_analysis and 'risk' in factor_analysis['category_scores']:
+            report_content.append(f"最终风险得分: {factor_analysis['category_scores']['risk']:.2f}")
+            report_content.append("")
+
+        # 确保category_scores存在
+        if 'category_scores' in factor_analysis:
+            report_content.append("多因子分析结果:")
+            if 'fundamental' in factor_analysis['category_scores']:
+                report_content.append(f"基本面得分: {factor_analysis['category_scores']['fundamental']:.2f}")
+            if 'technical' in factor_analysis['category_scores']:
+                report_content.append(f"技术面得分: {factor_analysis['category_scores']['technical']:.2f}")
+            if 'risk' in factor_analysis['category_scores']:
+                report_content.append(f"风险得分: {factor_analysis['category_scores']['risk']:.2f}")
+            if 'sentiment' in factor_analysis['category_scores']:
+                report_content.append(f"情绪得分: {factor_analysis['category_scores']['sentiment']:.2f}")
+            report_content.append("")
+
+        # 确保final_score存在
+        if 'final_score' in factor_analysis:
+            report_content.append(f"最终得分: {factor_analysis['final_score']:.2f}")
+            report_content.append("")
+
+        # 确保interpretation存在
+        if 'interpretation' in factor_analysis:
+            report_content.append("投资建议:")
+            report_content.append(f"综合评级: {factor_analysis['interpretation']}")
+            report_content.append("")
+
+            report_content.append("主要优势:")
+            if 'category_scores' in factor_analysis:
+                if 'fundamental' in factor_analysis['category_scores'] and factor_analysis['category_scores']['fundamental'] > 0.3:
+                    report_content.append("- 基本面稳健")
+                if 'risk' in factor_analysis['category_scores'] and factor_analysis['category_scores']['risk'] > 0.6:
+                    report_content.append("- 风险可控")
+            report_content.append("")
+
+            report_content.append("需要关注:")
+            if 'category_scores' in factor_analysis:
+                if 'technical' in factor_analysis['category_scores'] and factor_analysis['category_scores']['technical'] < 0.3:
+                    report_content.append("- 技术面偏弱")
+                if 'sentiment' in factor_analysis['category_scores'] and factor_analysis['category_scores']['sentiment'] == 0:
+                    report_content.append("- 缺乏市场情绪数据")
+            report_content.append("")
+    
+    return report_content
+
+
+class AnalysisDocument:
+    """
+    结构化的分析文档
+    由标题和若干块组成，每块为 (类型, 文本行)，类型为heading1-3、text或code；
+    可直接输出为Markdown或PDF，不经过Markdown文本的解析。
+    """
+    def __init__(self, title=None, blocks=None):
+        """
+        params:
+            title: str - 文档标题
+            blocks: list - [(类型, 文本行列表)]
+        """
+        self.title = title
+        self.blocks = blocks or []
+
+    def add(self, kind, lines):
+        """添加一块内容"""
+        self.blocks.append((kind, list(lines)))
+        return self
+
+    @classmethod
+    def from_report(cls, symbol, report_data, timestamp=None):
+        """
+        由报告数据生成分析报告文档（正文为一个代码块，与分析日志格式一致）
+        params:
+            symbol: str - 股票代码
+            report_data: dict - 报告部分名称 -> 数据
+            timestamp: str - 报告日期，默认为今天
+        returns:
+            AnalysisDocument
+        """
+        timestamp = timestamp or datetime.now().strftime(REPORT_CONFIG['date_format'])
+        return cls(f"{symbol} 股票分析报告 ({timestamp})").add('code', analysis_lines(symbol, report_data))
+
+    @classmethod
+    def from_text(cls, text, title=None):
+        """
+        由日志文本生成文档：#开头的行为标题，```之间为代码块，空行分隔段落
+        params:
+            text: str - 日志或Markdown文本
+            title: str - 文档标题
+        returns:
+            AnalysisDocument
+        """
+        document = cls(title)
+        buffer = []
+        in_code = False
+
+        def flush(kind):
+            if buffer:
+                document.add(kind, buffer)
+                buffer.clear()
+
+        for line in text.splitlines():
+            stripped = line.strip()
+            if stripped.startswith('```'):
+                flush('code' if in_code else 'text')
+                in_code = not in_code
+                continue
+            if in_code:
+                buffer.append(line)
+                continue
+            if not stripped:
+                flush('text')
+                continue
+            match = HEADING_PATTERN.match(stripped)
+            if match:
+                flush('text')
+                document.add(f"heading{min(len(match.group(1)), 3)}", [match.group(2)])
+                continue
+            buffer.append(line)
+        flush('code' if in_code else 'text')
+        return document
+
+    def to_markdown(self):
+        """输出Markdown文本"""
+        parts = [f"# {self.title}\n\n"] if self.title else []
+        for kind, lines in self.blocks:
+            if kind.startswith('heading'):
+                parts.append(f"{'#' * int(kind[-1])} {lines[0]}\n\n")
+            elif kind == 'code':
+                parts.append("```\n" + "\n".join(lines) + "\n```\n")
+            else:
+                parts.append("\n".join(lines) + "\n\n")
+        return ''.join(parts)
+
+    def write_markdown(self, path):
+        """写入Markdown文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_markdown())
+        return path
+
+    def write_pdf(self, path):
+        """
+        直接由文档结构生成PDF（字体和样式每个进程只注册一次）
+        params:
+            path: str - PDF路径
+        returns:
+            str - PDF路径
+        """
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, XPreformatted
+
+        styles = pdf_styles()
+        story = []
+        if self.title:
+            story.append(Paragraph(escape(self.title), styles['Title']))
+            story.append(Spacer(1, 0.2 * inch))
+        for kind, lines in self.blocks:
+            if kind.startswith('heading'):
+                story.append(Paragraph(escape(lines[0]), styles[PDF_HEADING_STYLES[kind]]))
+                story.append(Spacer(1, 0.2 * inch))
+            elif kind == 'code':
+                # 代码块保留原始换行和缩进，整块作为一个可跨页的元素
+                story.append(XPreformatted(escape('\n'.join(lines)), styles['CodeBlock']))
+            else:
+                # 每行一个段落，保留原始格式，长行自动换行
+                story.extend(Paragraph(escape(line), styles['Chinese']) for line in lines)
+                story.append(Spacer(1, 0.1 * inch))
+
+        SimpleDocTemplate(
+            path, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72
+        ).build(story)
+        return path
+
+
+PDF_HEADING_STYLES = {'heading1': 'Title', 'heading2': 'ChineseHeading', 'heading3': 'Heading3'}
+
+
+@lru_cache(maxsize=None)
+def pdf_styles():
+    """
+    注册中文字体并创建段落样式（每个进程只执行一次）
+    returns:
+        reportlab.lib.styles.StyleSheet1
+    """
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+    chinese_font = 'Helvetica'  # 如果找不到中文字体，使用默认字体
+    for path in REPORT_CONFIG['pdf_fonts']:
+        if not os.path.exists(path):
+            continue
+        try:
+            pdfmetrics.registerFont(TTFont('SimSun', path))
+            chinese_font = 'SimSun'
+            break
+        except Exception:
+            continue
+    if chinese_font == 'Helvetica':
+        log("警告：未找到中文字体，PDF中的中文可能无法正确显示", 'warning')
+
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name='Chinese',
+        fontName=chinese_font,
+        fontSize=12,
+        leading=14,
+        firstLineIndent=0
+    ))
+    styles.add(ParagraphStyle(
+        name='ChineseHeading',
+        fontName=chinese_font,
+        fontSize=16,
+        leading=20,
+        spaceAfter=12,
+        spaceBefore=12,
+        alignment=0  # 左对齐
+    ))
+    styles.add(ParagraphStyle(
+        name='CodeBlock',
+        fontName=chinese_font,
+        fontSize=10,
+        leading=12,
+        leftIndent=20,
+        rightIndent=20,
+        spaceAfter=12,
+        spaceBefore=12,
+        backColor='#f5f5f5'
+    ))
+    return styles
+
+
+def write_pdfs(jobs):
+    """
+    批量生成PDF（一个渲染任务处理一批文档，字体和样式只准备一次）
+    params:
+        jobs: list - [(AnalysisDocument, PDF路径)]
+    returns:
+        list - 生成成功的PDF路径，失败的为None
+    """
+    if not reportlab_available:
+        log("需要安装reportlab库才能生成PDF", 'warning')
+        log("请运行: pip install reportlab", 'warning')
+        return [None] * len(jobs)
+
+    paths = []
+    for document, path in jobs:
+        try:
+            paths.append(document.write_pdf(path))
+        except Exception as e:
+            log(f"生成PDF时发生错误 {path}: {str(e)}", 'error')
+            paths.append(None)
+    return paths
@@ -0,0 +1,343 @@
+import numpy as np
+from .config import FACTOR_CONFIG, SENTIMENT_CONFIG
+from .logger import log
+from .indicators import TechnicalIndicators
+from .risk_metrics import RiskMetrics
+
+# 因子可以引用的原始数据源（与StockAnalyzer整合的all_data键一致）
+DATA_SOURCES = (
+    'price_data',
+    'technical_indicators',
+    'financial_ratios',
+    'risk_metrics',
+    'sentiment_data',
+    'sentiment_series'
+)
+
+class FactorInputError(Exception):
+    """因子输入缺失"""
+
+
+class Factor:
+    """
+    因子定义
+    params:
+        name: str - 因子名称
+        inputs: tuple - 依赖的输入，可以是其他因子名，或数据源字段（如'price_data.Close'）
+        compute: callable - 按inputs顺序接收参数并返回因子值
+        score_range: tuple - 单只股票打分时的参考范围(low, high)，None表示暂不计分
+        inverse: bool - 是否数值越小越好，默认取FACTOR_CONFIG的inverse_factors
+    可选的history/history_inputs用于一次性计算整段因子值序列。
+    """
+    def __init__(self, name, inputs, compute, score_range=None, inverse=None):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.compute = compute
+        self.score_range = score_range
+        if inverse is None:
+            inverse = name in FACTOR_CONFIG['normalization']['inverse_factors']
+        self.inverse = inverse
+        self.history = None
+        self.history_inputs = ()
+
+    def dependencies(self, history=False):
+        """返回计算所需的输入，history为True时优先使用序列版本"""
+        if history and self.history is not None:
+            return self.history_inputs
+        return self.inputs
+
+    def score(self, value):
+        """按参考范围将因子值映射到[0,1]，支持标量和数组"""
+        if self.score_range is None:
+            return np.zeros_like(value, dtype=float) if np.ndim(value) else 0.0
+        low, high = self.score_range
+        score = np.clip((np.asarray(value, dtype=float) - low) / (high - low), 0, 1)
+        if self.inverse:
+            score = 1 - score
+        return score if np.ndim(score) else float(score)
+
+    def __repr__(self):
+        return f"Factor({self.name!r}, inputs={self.inputs!r})"
+
+
+class FactorRegistry:
+    """因子注册表：根据声明的依赖关系构建计算图，按需惰性求值"""
+    _MISSING = object()
+
+    def __init__(self):
+        self.factors = {}
+
+    def register(self, name, inputs=(), score_range=None, inverse=None):
+        """以装饰器方式注册因子计算函数"""
+        def decorator(compute):
+            self.add(Factor(name, inputs, compute, score_range, inverse))
+            return compute
+        return decorator
+
+    def register_history(self, name, inputs=()):
+        """以装饰器方式为已注册因子添加序列版本的计算函数"""
+        def decorator(history):
+            factor = self.factors[name]
+            factor.history = history
+            factor.history_inputs = tuple(inputs)
+            return history
+        return decorator
+
+    def add(self, factor):
+        """添加因子定义，同名因子会被覆盖"""
+        self.factors[factor.name] = factor
+        return factor
+
+    def get(self, name):
+        return self.factors[name]
+
+    def __contains__(self, name):
+        return name in self.factors
+
+    def active_factors(self, weights):
+        """返回权重非零且已注册的因子名称"""
+        active = []
+        for category, spec in weights.items():
+            if not spec['weight']:
+                continue
+            for factor, weight in spec['factors'].items():
+                if weight and factor in self.factors:
+                    active.append(factor)
+        return active
+
+    def resolve_order(self, targets, history=False):
+        """
+        对目标因子及其依赖做拓扑排序
+        params:
+            targets: list - 目标因子名称
+            history: bool - 是否按序列版本解析依赖
+        returns:
+            list - 依赖在前的计算顺序
+        """
+        order = []
+        state = {}  # 1: 访问中, 2: 已完成
+
+        def visit(name, path):
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"因子依赖存在环: {' -> '.join(path + [name])}")
+            if name not in self.factors:
+                raise KeyError(f"未注册的因子: {name}")
+            state[name] = 1
+            for dependency in self.factors[name].dependencies(history):
+                if dependency.split('.', 1)[0] in DATA_SOURCES:
+                    continue
+                visit(dependency, path + [name])
+            state[name] = 2
+            order.append(name)
+
+        for target in targets:
+            visit(target, [])
+        return order
+
+    def evaluate(self, all_data, targets, history=False):
+        """
+        计算目标因子的值，中间结果在同一次求值中共享
+        params:
+            all_data: dict - 原始数据（price_data, technical_indicators等）
+            targets: list - 目标因子名称
+            history: bool - 是否计算整段因子值序列（没有序列版本的因子按原方式计算）
+        returns:
+            dict - 因子名称到因子值的映射，输入缺失的因子不包含在内
+        """
+        values = {}
+        for name in self.resolve_order(targets, history):
+            factor = self.factors[name]
+            use_history = history and factor.history is not None
+            compute = factor.history if use_history else factor.compute
+            try:
+                args = [
+                    self._resolve_input(item, all_data, values)
+                    for item in factor.dependencies(history)
+                ]
+                values[name] = compute(*args)
+            except FactorInputError:
+                values[name] = self._MISSING
+            except Exception as e:
+                log(f"因子 {name} 计算错误: {str(e)}", 'error')
+                values[name] = self._MISSING
+        return {
+            name: values[name]
+            for name in targets
+            if values[name] is not self._MISSING
+        }
+
+    def _resolve_input(self, item, all_data, values):
+        """解析单个输入：已计算的因子或数据源字段"""
+        source, _, field = item.partition('.')
+        if source not in DATA_SOURCES:
+            if values[item] is self._MISSING:
+                raise FactorInputError(item)
+            return values[item]
+
+        data = all_data.get(source)
+        if data is None or len(data) == 0:
+            raise FactorInputError(item)
+        if not field:
+            return data
+        if field not in data:
+            raise FactorInputError(item)
+        return data[field]
+
+
+def _clipped_change(series, lookback=20):
+    """最近lookback期的变化率，限制在±50%"""
+    if len(series) < lookback:
+        return 0
+    return min(max(series.iloc[-1] / series.iloc[-lookback] - 1, -0.5), 0.5)
+
+
+def _require_sentiment(sentiment_data):
+    if sentiment_data.get('status') != 'success':
+        raise FactorInputError('sentiment_data')
+    return sentiment_data
+
+
+# 默认因子注册表
+default_registry = FactorRegistry()
+register_factor = default_registry.register
+register_history = default_registry.register_history
+
+# 1. 基本面因子
+@register_factor('roe', inputs=('financial_ratios.ROE',), score_range=(0, 0.4))
+def _roe(roe):
+    return roe
+
+@register_factor('debt_ratio', inputs=('financial_ratios.DebtRatio',), score_range=(0, 1))
+def _debt_ratio(debt_ratio):
+    return debt_ratio
+
+@register_factor('fcf', inputs=('financial_ratios.FCF',))
+def _fcf(fcf):
+    return fcf
+
+@register_factor('ev_ebitda', inputs=('financial_ratios.EV/EBITDA',))
+def _ev_ebitda(ev_ebitda):
+    return ev_ebitda
+
+@register_factor('dividend_coverage', inputs=('financial_ratios.DividendCoverage',))
+def _dividend_coverage(dividend_coverage):
+    return dividend_coverage
+
+# 2. 技术面因子（指标序列作为共享的中间结果）
+@register_factor('atr_series', inputs=('technical_indicators', 'price_data'))
+def _atr_series(indicators, price_data):
+    if 'ATR' in indicators:
+        return indicators['ATR']
+    return TechnicalIndicators.calculate_atr(price_data['High'], price_data['Low'], price_data['Close'])
+
+@register_factor('obv_series', inputs=('technical_indicators', 'price_data'))
+def _obv_series(indicators, price_data):
+    if 'OBV' in indicators:
+        return indicators['OBV']
+    return TechnicalIndicators.calculate_obv(price_data['Close'], price_data['Volume'])
+
+@register_factor('adx_series', inputs=('technical_indicators', 'price_data'))
+def _adx_series(indicators, price_data):
+    if 'ADX' in indicators:
+        return indicators['ADX']
+    return TechnicalIndicators.calculate_adx(price_data['High'], price_data['Low'], price_data['Close'])
+
+@register_factor('ma_trend', inputs=('technical_indicators.MA5', 'technical_indicators.MA20'), score_range=(0, 1))
+def _ma_trend(ma_short, ma_long):
+    ma_short = ma_short.iloc[-1]
+    ma_long = ma_long.iloc[-1]
+    return (ma_short / ma_long - 1) if ma_long != 0 else 0
+
+@register_factor('atr', inputs=('atr_series',), score_range=(0, 1))
+def _atr(atr):
+    return atr.iloc[-1]
+
+@register_factor('obv', inputs=('obv_series',), score_range=(0, 1))
+def _obv(obv):
+    return obv.iloc[-1]
+
+@register_factor('adx', inputs=('adx_series',), score_range=(0, 1))
+def _adx(adx):
+    return adx.iloc[-1]
+
+@register_history('ma_trend', inputs=('technical_indicators.MA5', 'technical_indicators.MA20'))
+def _ma_trend_history(ma_short, ma_long):
+    return (ma_short / ma_long - 1).where(ma_long != 0, 0)
+
+@register_history('atr', inputs=('atr_series',))
+def _atr_history(atr):
+    return atr
+
+@register_history('obv', inputs=('obv_series',))
+def _obv_history(obv):
+    return obv
+
+@register_history('adx', inputs=('adx_series',))
+def _adx_history(adx):
+    return adx
+
+@register_factor('atr_trend', inputs=('atr_series',))
+def _atr_trend(atr):
+    return _clipped_change(atr)
+
+@register_factor('obv_trend', inputs=('obv_series',))
+def _obv_trend(obv):
+    return _clipped_change(obv)
+
+@register_factor('adx_trend', inputs=('adx_series',))
+def _adx_trend(adx):
+    return _clipped_change(adx)
+
+# 3. 风险因子
+@register_factor('var', inputs=('risk_metrics',), score_range=(0, 0.1))
+def _var(risk_metrics):
+    return abs(risk_metrics.get('VaR(95%)', 0))
+
+@register_factor('sharpe', inputs=('risk_metrics',), score_range=(-1, 1))
+def _sharpe(risk_metrics):
+    return risk_metrics.get('Sharpe Ratio', 0)
+
+@register_factor('max_drawdown', inputs=('risk_metrics',), score_range=(0, 0.5))
+def _max_drawdown(risk_metrics):
+    return abs(risk_metrics.get('Max Drawdown', 0))
+
+@register_factor('returns_series', inputs=('price_data.Close',))
+def _returns_series(close):
+    return close.pct_change()
+
+@register_history('var', inputs=('returns_series',))
+def _var_history(returns):
+    params = FACTOR_CONFIG['history']
+    return RiskMetrics.calculate_rolling_var(returns, params['risk_window'], min_periods=params['min_periods'])
+
+@register_history('sharpe', inputs=('returns_series',))
+def _sharpe_history(returns):
+    params = FACTOR_CONFIG['history']
+    return RiskMetrics.calculate_rolling_sharpe_ratio(returns, params['risk_window'], min_periods=params['min_periods'])
+
+@register_history('max_drawdown', inputs=('price_data.Close',))
+def _max_drawdown_history(close):
+    params = FACTOR_CONFIG['history']
+    return RiskMetrics.calculate_rolling_max_drawdown(close, params['risk_window'], params['min_periods'])
+
+# 4. 情绪因子
+@register_factor('social_score', inputs=('sentiment_data',), score_range=(0, 1))
+def _social_score(sentiment_data):
+    return _require_sentiment(sentiment_data)['average_sentiment']
+
+@register_factor('volume_sentiment', inputs=('sentiment_data',), score_range=(0, 1))
+def _volume_sentiment(sentiment_data):
+    return _require_sentiment(sentiment_data).get('volume_adjusted_sentiment', 0)
+
+@register_history('social_score', inputs=('sentiment_series',))
+def _social_score_history(sentiment):
+    return sentiment
+
+@register_history('volume_sentiment', inputs=('sentiment_series', 'price_data.Volume'))
+def _volume_sentiment_history(sentiment, volume):
+    volume_factor = SENTIMENT_CONFIG['volume_factor']
+    recent_volume_change = volume.pct_change().rolling(5).mean().to_numpy()
+    sentiment = np.asarray(sentiment, dtype=float)
+    return sentiment * (1 - volume_factor) + np.sign(sentiment) * recent_volume_change * volume_factor
@@ -0,0 +1,97 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# 命令行和渲染进程启动时不应导入的重型依赖（首次使用时才导入）
+# pyarrow不在其中：安装后pandas自身会在导入时加载
+HEAVY_MODULES = (
+    'yfinance', 'requests', 'scipy', 'matplotlib', 'openpyxl', 'reportlab', 'markdown'
+)
+
+# 导入耗时预算（秒）
+IMPORT_BUDGET = 1.0
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(output):
+    """
+    解析 python -X importtime 的输出
+    params:
+        output: str - 标准错误输出
+    returns:
+        list - (模块名, 嵌套层级, 自身耗时秒, 累计耗时秒)
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        # 格式: "import time: 自身[us] | 累计[us] | 缩进+模块名"，每层嵌套缩进2个空格
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        entries.append((name.strip(), depth, int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    return entries
+
+
+def measure_import(module, runs=3, python=None):
+    """
+    在新的解释器进程中测量模块导入耗时
+    params:
+        module: str - 模块名（如stock_analyzer.main、run）
+        runs: int - 测量次数，取最快一次
+        python: str - 解释器路径，默认为当前解释器
+    returns:
+        dict - seconds（最快一次的累计耗时）、timings（每次耗时）、
+               slowest（最快一次中耗时最多的直接依赖）、heavy（被导入的重型依赖）
+    """
+    # 导入后输出已加载的重型依赖（导入失败的尝试也会出现在importtime输出中，因此以sys.modules为准）
+    code = f"import {module}, sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    best = None
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [python or sys.executable, '-X', 'importtime', '-c', code],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        )
+        entries = parse_importtime(result.stderr)
+        # 子模块先于父模块输出：目标模块之前、上一个顶层模块之后的第1层即为其直接依赖
+        end = max(i for i, (name, depth, _, _) in enumerate(entries) if name == module and depth == 0)
+        start = max((i for i in range(end) if entries[i][1] == 0), default=-1) + 1
+        seconds = entries[end][3]
+        timings.append(seconds)
+        if best is None or seconds < best[0]:
+            direct = [(name, c) for name, depth, _, c in entries[start:end] if depth == 1]
+            best = (seconds, direct, result.stdout.strip())
+
+    seconds, direct, heavy = best
+    return {
+        'seconds': seconds,
+        'timings': timings,
+        'slowest': sorted(direct, key=lambda item: -item[1])[:10],
+        'heavy': heavy.split(',') if heavy else []
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='导入耗时基准测试（基于python -X importtime）')
+    parser.add_argument('modules', nargs='*', default=['stock_analyzer.main', 'run'], help='要测量的模块')
+    parser.add_argument('--runs', type=int, default=3, help='每个模块的测量次数（取最快一次）')
+    parser.add_argument('--budget', type=float, default=IMPORT_BUDGET, help='导入耗时预算（秒）')
+    args = parser.parse_args()
+
+    over_budget = False
+    for module in args.modules:
+        result = measure_import(module, args.runs)
+        status = 'OK' if result['seconds'] <= args.budget and not result['heavy'] else '超出预算'
+        over_budget |= status != 'OK'
+        print(f"{module}: {result['seconds']:.3f}s（预算 {args.budget:.3f}s）{status}")
+        for name, seconds in result['slowest']:
+            print(f"  {seconds:8.3f}s  {name}")
+        if result['heavy']:
+            print(f"  导入了重型依赖: {', '.join(result['heavy'])}")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
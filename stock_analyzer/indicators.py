@@ -1,6 +1,7 @@
 import numpy as np
 import pandas as pd
 from .config import INDICATOR_CONFIG
+from .logger import log
 
 class TechnicalIndicators:
     @staticmethod
@@ -59,16 +60,12 @@ class TechnicalIndicators:
     @staticmethod
     def calculate_obv(close, volume):
         """计算OBV"""
-        obv = pd.Series(index=close.index, dtype=float)
-        obv.iloc[0] = volume.iloc[0]
-        for i in range(1, len(close)):
-            if close.iloc[i] > close.iloc[i-1]:
-                obv.iloc[i] = obv.iloc[i-1] + volume.iloc[i]
-            elif close.iloc[i] < close.iloc[i-1]:
-                obv.iloc[i] = obv.iloc[i-1] - volume.iloc[i]
-            else:
-                obv.iloc[i] = obv.iloc[i-1]
-        return obv
+        # 上涨日加成交量、下跌日减成交量，首日取当日成交量
+        direction = np.sign(close.diff()).fillna(0)
+        signed_volume = (direction * volume).astype(float)
+        if len(signed_volume):
+            signed_volume.iloc[0] = volume.iloc[0]
+        return signed_volume.cumsum()
 
     @staticmethod
     def calculate_adx(high, low, close, period=14):
@@ -145,5 +142,5 @@ class FundamentalIndicators:
                 'DividendCoverage': dividend_coverage
             }
         except Exception as e:
-            print(f"财务指标计算错误: {str(e)}")
+            log(f"财务指标计算错误: {str(e)}", 'error')
             return None 
\ No newline at end of file
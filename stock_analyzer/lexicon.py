@@ -0,0 +1,108 @@
+import json
+import re
+from itertools import chain
+import numpy as np
+from .config import SENTIMENT_CONFIG
+
+# 默认金融社交媒体情绪词典（词 -> 权重，正为看多，负为看空）
+DEFAULT_LEXICON = {
+    # 看多
+    'bull': 1.5, 'bullish': 2.0, 'buy': 1.5, 'buying': 1.5, 'bought': 1.0, 'long': 1.0,
+    'calls': 1.5, 'call': 1.0, 'moon': 2.0, 'mooning': 2.0, 'rocket': 2.0, 'breakout': 2.0,
+    'rally': 1.5, 'rip': 1.0, 'ripping': 1.5, 'squeeze': 1.0, 'strong': 1.0, 'beat': 1.5,
+    'beats': 1.5, 'upgrade': 1.5, 'upgraded': 1.5, 'undervalued': 1.5, 'higher': 1.0,
+    'green': 1.0, 'support': 0.5, 'accumulate': 1.0, 'winner': 1.5, 'gains': 1.0,
+    'profit': 1.0, 'soar': 2.0, 'soaring': 2.0, 'surge': 1.5, 'record': 1.0, 'uptrend': 1.5,
+    '🚀': 2.0, '📈': 1.5, '💎': 1.0, '🔥': 1.0, '🐂': 1.5,
+    # 看空
+    'bear': -1.5, 'bearish': -2.0, 'sell': -1.5, 'selling': -1.5, 'sold': -1.0, 'short': -1.0,
+    'shorting': -1.5, 'puts': -1.5, 'put': -1.0, 'dump': -2.0, 'dumping': -2.0, 'crash': -2.0,
+    'crashing': -2.0, 'drop': -1.0, 'falling': -1.0, 'weak': -1.0, 'miss': -1.5, 'missed': -1.5,
+    'downgrade': -1.5, 'downgraded': -1.5, 'overvalued': -1.5, 'lower': -1.0, 'red': -1.0,
+    'resistance': -0.5, 'bagholder': -1.5, 'bagholders': -1.5, 'loser': -1.5, 'losses': -1.0,
+    'loss': -1.0, 'plunge': -2.0, 'tank': -1.5, 'tanking': -2.0, 'fraud': -2.0,
+    'bankruptcy': -2.0, 'downtrend': -1.5,
+    '📉': -1.5, '🐻': -1.5, '💩': -1.5
+}
+
+# 否定词：紧随其后的词情绪取反
+NEGATIONS = ('not', 'no', 'never', "don't", 'dont', "isn't", 'isnt', "won't", 'wont', "can't", 'cant')
+
+# 词（含撇号）或单个符号表情；$代码和网址不参与计分
+TOKEN_PATTERN = re.compile(
+    r"https?://\S+|\$[a-z.]+|[a-z]+(?:'[a-z]+)?|[\U0001F300-\U0001FAFF]"
+)
+
+
+class LexiconScorer:
+    """
+    词典情绪打分
+    批量分词后把全部消息展开为一个词ID数组，构建消息×词的稀疏矩阵（否定词后的词记为负），
+    再与词权重向量相乘得到每条消息的得分，按 s/sqrt(s²+alpha) 映射到[-1,1]。
+    """
+    def __init__(self, lexicon=None, alpha=None, negations=NEGATIONS):
+        config = SENTIMENT_CONFIG['lexicon']
+        if lexicon is None:
+            lexicon = self.load_lexicon(config['path']) if config.get('path') else DEFAULT_LEXICON
+        self.alpha = alpha if alpha is not None else config['alpha']
+
+        self.terms = list(lexicon) + [n for n in negations if n not in lexicon]
+        self.vocabulary = {term: i for i, term in enumerate(self.terms)}
+        self.weights = np.array([lexicon.get(term, 0.0) for term in self.terms], dtype=float)
+        self.is_negation = np.isin(np.arange(len(self.terms)), [self.vocabulary[n] for n in negations])
+
+    @staticmethod
+    def load_lexicon(path):
+        """从JSON文件读取词典（{词: 权重}）"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return {term.lower(): float(weight) for term, weight in json.load(f).items()}
+
+    def tokenize(self, texts):
+        """批量分词，返回每条消息的词列表"""
+        findall = TOKEN_PATTERN.findall
+        return [findall(text.lower()) if isinstance(text, str) else [] for text in texts]
+
+    def term_matrix(self, texts):
+        """
+        构建消息×词的稀疏矩阵
+        params:
+            texts: list - 消息正文
+        returns:
+            scipy.sparse.csr_matrix - 词典词出现次数，否定词之后的词为负
+        """
+        from scipy import sparse
+
+        tokens = self.tokenize(texts)
+        lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+        lookup = self.vocabulary.get
+        ids = np.fromiter(
+            (lookup(token, -1) for token in chain.from_iterable(tokens)),
+            dtype=np.int64,
+            count=int(lengths.sum())
+        )
+        rows = np.repeat(np.arange(len(tokens)), lengths)
+
+        known = ids >= 0
+        negated = np.zeros(len(ids), dtype=bool)
+        if len(ids) > 1:
+            # 前一个词是否定词且属于同一条消息
+            negated[1:] = known[:-1] & self.is_negation[np.where(known, ids, 0)][:-1] & (rows[1:] == rows[:-1])
+        values = np.where(negated, -1.0, 1.0)[known]
+        return sparse.csr_matrix(
+            (values, (rows[known], ids[known])),
+            shape=(len(tokens), len(self.terms))
+        )
+
+    def score(self, texts):
+        """
+        批量计算消息情绪得分
+        params:
+            texts: list - 消息正文
+        returns:
+            np.ndarray - [-1,1]的得分，没有命中词典的消息为NaN
+        """
+        matrix = self.term_matrix(texts)
+        raw = matrix @ self.weights
+        hits = abs(matrix) @ (self.weights != 0) > 0
+        scores = raw / np.sqrt(raw * raw + self.alpha)
+        return np.where(hits, scores, np.nan)
@@ -1,11 +1,16 @@
+import contextvars
 import logging
 import os
+import time
 from datetime import datetime
 
 class Logger:
     def __init__(self, name='stock_analyzer'):
         self.logger = logging.getLogger(name)
         self.logger.setLevel(logging.INFO)
+        # 同一进程中创建多个分析器时处理器只添加一次，避免每行重复输出
+        if self.logger.handlers:
+            return
         
         # 创建logs目录
         os.makedirs('logs', exist_ok=True)
@@ -40,4 +45,64 @@ class Logger:
         self.logger.warning(message)
         
     def debug(self, message):
-        self.logger.debug(message) 
\ No newline at end of file
+        self.logger.debug(message) 
+
+
+# 当前分析的日志：上下文变量在每个线程、asyncio任务中各自独立，子进程中互不共享
+_current_log = contextvars.ContextVar('analysis_log', default=None)
+
+class AnalysisLog:
+    """
+    一只股票分析过程的结构化日志
+    在with块内通过log()输出的消息记录为(时间, 级别, 消息)事件，只归属于当前上下文，
+    并行分析的股票互不串扰；不替换全局sys.stdout。
+    """
+    def __init__(self, symbol=None, echo=True):
+        """
+        params:
+            symbol: str - 股票代码
+            echo: bool - 是否同时输出到终端
+        """
+        self.symbol = symbol
+        self.echo = echo
+        self.events = []
+        self._tokens = []
+
+    def __enter__(self):
+        self._tokens.append(_current_log.set(self))
+        return self
+
+    def __exit__(self, *exc):
+        _current_log.reset(self._tokens.pop())
+
+    def record(self, message, level='info'):
+        """记录一条事件"""
+        self.events.append((time.time(), level, message))
+
+    def text(self):
+        """
+        按输出顺序拼接的日志文本（与终端输出一致）
+        returns:
+            str
+        """
+        return ''.join(f"{message}\n" for _, _, message in self.events)
+
+
+def current_log():
+    """当前上下文的分析日志，不在分析中时为None"""
+    return _current_log.get()
+
+
+def log(message='', level='info'):
+    """
+    输出分析消息：记录到当前上下文的分析日志，并按需输出到终端
+    params:
+        message: str - 消息
+        level: str - 级别（info、warning、error）
+    """
+    analysis_log = _current_log.get()
+    if analysis_log is not None:
+        analysis_log.record(str(message), level)
+        if not analysis_log.echo:
+            return
+    print(message)
@@ -1,126 +1,216 @@
 from stock_analyzer.data_fetcher import DataFetcher
 from stock_analyzer.indicators import TechnicalIndicators, FundamentalIndicators
-from stock_analyzer.report_generator import ReportGenerator
 from stock_analyzer.risk_metrics import RiskMetrics
 from stock_analyzer.validators import DataValidator
 from stock_analyzer.sentiment_analyzer import SentimentAnalyzer
 from stock_analyzer.models import MultiFactorModel
+import time
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
-from .logger import Logger
+from .logger import Logger, log
+from .score_cache import ScoreCache
+from .market_regime import MarketRegimeService
+from .pipeline import AnalysisContext, resolve_stages
+from .rendering import AnalysisResult, RenderPool
+from .config import CACHE_CONFIG, FACTOR_CONFIG
 
 class StockAnalyzer:
-    def __init__(self):
+    def __init__(self, render_pool=None, charts=None, requests_per_hour=None):
+        """
+        params:
+            render_pool: RenderPool - 报告渲染池，默认在当前进程同步渲染
+            charts: bool - 是否生成PNG图表，默认取CHART_CONFIG['enabled']
+            requests_per_hour: int - StockTwits每小时请求上限，默认取配置
+        """
         self.logger = Logger()
+        # 外部传入的渲染池由调用方关闭
+        self.owns_render_pool = render_pool is None
+        self.render_pool = render_pool or RenderPool(workers=0)
+        self.charts = charts
         self.data_fetcher = DataFetcher()
-        self.report_generator = ReportGenerator()
         self.validator = DataValidator()
-        self.sentiment_analyzer = SentimentAnalyzer()
+        self.sentiment_analyzer = SentimentAnalyzer(requests_per_hour=requests_per_hour)
         self.factor_model = MultiFactorModel()
+        self.score_cache = ScoreCache() if CACHE_CONFIG['score_cache']['enabled'] else None
+        self.regime_service = None
+        if FACTOR_CONFIG['market_state']['benchmark']:
+            self.regime_service = MarketRegimeService(data_fetcher=self.data_fetcher)
     
-    def analyze_stock(self, symbol: str, days: int = 365, export_md: bool = False):
-        """分析指定股票"""
+    def close(self):
+        """释放情绪分析客户端和自己创建的渲染池"""
+        self.sentiment_analyzer.close()
+        if self.owns_render_pool:
+            self.render_pool.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def analyze_stock(self, symbol: str, days: int = 365, export_md: bool = False,
+                      report_format: str = None):
+        """分析指定股票，返回报告路径（任一阶段失败时返回None）"""
+        context = self.run_pipeline(symbol, days, export_md, report_format=report_format)
+        return self.collect_render(context)
+    
+    def run_pipeline(self, symbol: str, days: int = 365, export_md: bool = False, until: str = None,
+                     report_format: str = None):
+        """
+        按阶段分析股票：fetch → validate → compute → score → render
+        任一阶段失败立即结束，无效或退市的股票只消耗一次数据获取
+        params:
+            symbol: str - 股票代码
+            days: int - 历史数据天数
+            export_md: bool - 是否导出Markdown报告
+            until: str - 最后执行的阶段，默认执行全部阶段
+            report_format: str - 报告格式（excel、csv、json、parquet），默认取REPORT_CONFIG['format']
+        returns:
+            AnalysisContext - 各阶段结果、耗时和失败阶段
+        """
         self.logger.info(f"开始分析股票: {symbol}")
-        # 计算日期范围
+        context = AnalysisContext(symbol, days, export_md, report_format)
+        for stage in resolve_stages(until):
+            start = time.perf_counter()
+            try:
+                succeeded = getattr(self, f'_stage_{stage}')(context)
+            except Exception as e:
+                # 阶段内未处理的异常按阶段失败处理，不中断批量分析
+                log(f"{symbol} 的{stage}阶段出错: {str(e)}", 'error')
+                context.error = str(e)
+                succeeded = False
+            finally:
+                context.timings[stage] = time.perf_counter() - start
+            if not succeeded:
+                context.failed_stage = stage
+                break
+            context.completed.append(stage)
+        
+        self.logger.info(f"{symbol} 各阶段耗时: {context.format_timings()}")
+        return context
+    
+    def _stage_fetch(self, context):
+        """获取价格和财务数据"""
         end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
+        start_date = end_date - timedelta(days=context.days)
         
-        # 获取数据
-        stock_data = self.data_fetcher.get_stock_data(
-            symbol,
+        context.stock_data = self.data_fetcher.get_stock_data(
+            context.symbol,
             start_date.strftime('%Y-%m-%d'),
             end_date.strftime('%Y-%m-%d')
         )
-        
-        if stock_data is None:
-            return None
+        if context.stock_data is None:
+            return False
+        context.price_data = context.stock_data['price_data']
+        return True
+    
+    def _stage_validate(self, context):
+        """验证价格和财务数据"""
+        price_validation = self.validator.validate_price_data(context.price_data)
+        if not price_validation['valid']:
+            log(f"价格数据验证失败: {price_validation['errors']}", 'error')
+            return False
             
-        # 计算收益率
-        price_data = stock_data['price_data']
-        returns = price_data['Close'].pct_change().dropna()
-        
-        # 计算风险指标
-        risk_metrics = {
-            'VaR(95%)': RiskMetrics.calculate_var(returns),
-            'VaR(99%)': RiskMetrics.calculate_var(returns, 0.99),
-        }
-        
-        # 计算最大回撤
-        max_dd, start_idx, end_idx = RiskMetrics.calculate_max_drawdown(price_data['Close'])
-        risk_metrics.update({
-            'Max Drawdown': max_dd,
-            'Max Drawdown Start': start_idx,
-            'Max Drawdown End': end_idx
-        })
-        
-        # 计算波动率
-        volatility = RiskMetrics.calculate_volatility(returns)
-        risk_metrics['Annual Volatility'] = volatility.iloc[-1]
-        
-        # 计算夏普比率
-        sharpe = RiskMetrics.calculate_sharpe_ratio(returns)
-        risk_metrics['Sharpe Ratio'] = sharpe
+        if price_validation.get('warnings'):
+            log(f"价格数据警告: {price_validation['warnings']}", 'warning')
+            
+        financial_validation = self.validator.validate_financial_data(context.stock_data['financial_data'])
+        if not financial_validation['valid']:
+            log(f"财务数据验证失败: {financial_validation['errors']}", 'error')
+            return False
+            
+        if financial_validation.get('warnings'):
+            log(f"财务数据警告: {financial_validation['warnings']}", 'warning')
         
-        # 生成报告
-        self.report_generator.add_section('价格数据', price_data)
-        self.report_generator.add_section('风险指标', risk_metrics)
+        # 查询得分缓存（价格和财报数据、配置均未变化时跳过风险指标、财务指标和多因子计算）
+        if self.score_cache is not None:
+            context.cache_key = self.score_cache.make_key(
+                context.symbol, context.price_data, context.stock_data.get('fundamentals_period')
+            )
+            cached = self.score_cache.get(context.cache_key)
+            if cached and 'factor_analysis' in cached:
+                log(f"\n使用缓存的多因子得分: {context.symbol}")
+                context.cached_score = cached
+        return True
+    
+    def _stage_compute(self, context):
+        """计算风险指标、技术指标、财务指标和市场情绪"""
+        price_data = context.price_data
+        if context.cached_score is not None:
+            # 命中得分缓存：风险指标和财务指标直接复用
+            risk_metrics = dict(context.cached_score['risk_metrics'])
+            context.financial_ratios = context.cached_score['financial_ratios']
+        else:
+            returns = price_data['Close'].pct_change().dropna()
+            
+            # 计算风险指标
+            risk_metrics = {
+                'VaR(95%)': RiskMetrics.calculate_var(returns),
+                'VaR(99%)': RiskMetrics.calculate_var(returns, 0.99),
+            }
+            
+            # 计算最大回撤
+            max_dd, start_idx, end_idx = RiskMetrics.calculate_max_drawdown(price_data['Close'])
+            risk_metrics.update({
+                'Max Drawdown': max_dd,
+                'Max Drawdown Start': start_idx,
+                'Max Drawdown End': end_idx
+            })
+            
+            # 计算波动率
+            volatility = RiskMetrics.calculate_volatility(returns)
+            risk_metrics['Annual Volatility'] = volatility.iloc[-1]
+            
+            # 计算夏普比率
+            sharpe = RiskMetrics.calculate_sharpe_ratio(returns)
+            risk_metrics['Sharpe Ratio'] = sharpe
+            
+            # 财务指标
+            context.financial_ratios = FundamentalIndicators.calculate_financial_ratios(
+                context.stock_data['financial_data']
+            )
+        context.risk_metrics = risk_metrics
         
-        # 添加技术指标
-        ma_data = TechnicalIndicators.calculate_ma(price_data['Close'])
-        rsi_data = pd.DataFrame({
+        # 技术指标（报告图表使用，不进入得分缓存）
+        context.ma_data = TechnicalIndicators.calculate_ma(price_data['Close'])
+        context.rsi_data = pd.DataFrame({
             'RSI': TechnicalIndicators.calculate_rsi(price_data['Close'])
         })
-        bollinger_data = TechnicalIndicators.calculate_bollinger_bands(price_data['Close'])
-        
-        self.report_generator.add_section('移动平均线', ma_data)
-        self.report_generator.add_section('RSI指标', rsi_data)
-        self.report_generator.add_section('布林带', bollinger_data)
+        context.bollinger_data = TechnicalIndicators.calculate_bollinger_bands(price_data['Close'])
         
-        # 添加财务指标
-        financial_ratios = FundamentalIndicators.calculate_financial_ratios(
-            stock_data['financial_data']
-        )
-        if financial_ratios:
-            self.report_generator.add_section('财务指标', financial_ratios)
-        
-        # 添加情绪分析
-        sentiment_data = self.sentiment_analyzer.get_social_sentiment(symbol)
+        # 情绪分析（不进入得分缓存，每次分析都获取最新数据）
+        sentiment_data = self.sentiment_analyzer.get_social_sentiment(context.symbol)
         if sentiment_data and sentiment_data['status'] == 'success':
             # 结合成交量分析情绪
             sentiment_data = self.sentiment_analyzer.analyze_volume_sentiment(
                 price_data, 
                 sentiment_data
             )
-            self.report_generator.add_section('市场情绪', sentiment_data)
             
             # 如果情绪显著，添加到风险指标中
             if sentiment_data['signal'] != 'NEUTRAL':
                 risk_metrics['Sentiment_Signal'] = sentiment_data['signal']
                 risk_metrics['Sentiment_Score'] = sentiment_data['average_sentiment']
+        context.sentiment_data = sentiment_data
+        return True
+    
+    def _stage_score(self, context):
+        """计算多因子得分（命中得分缓存时只重新计算情绪得分）"""
+        price_data = context.price_data
+        sentiment_data = context.sentiment_data
         
-        # 数据验证
-        price_validation = self.validator.validate_price_data(price_data)
-        if not price_validation['valid']:
-            print(f"价格数据验证失败: {price_validation['errors']}")
-            return None
-            
-        if price_validation.get('warnings'):
-            print(f"价格数据警告: {price_validation['warnings']}")
-            
-        financial_validation = self.validator.validate_financial_data(stock_data['financial_data'])
-        if not financial_validation['valid']:
-            print(f"财务数据验证失败: {financial_validation['errors']}")
-            return None
-            
-        if financial_validation.get('warnings'):
-            print(f"财务数据警告: {financial_validation['warnings']}")
+        if context.cached_score is not None:
+            context.factor_analysis = self.factor_model.rescore_sentiment(
+                context.cached_score['factor_analysis'], sentiment_data
+            )
+            return True
         
         # 添加更多技术指标
         technical_indicators = {
-            'MA5': ma_data['MA5'],
-            'MA20': ma_data['MA20'],
-            'RSI': rsi_data['RSI'],
+            'MA5': context.ma_data['MA5'],
+            'MA20': context.ma_data['MA20'],
+            'RSI': context.rsi_data['RSI'],
             'ATR': TechnicalIndicators.calculate_atr(
                 price_data['High'],
                 price_data['Low'],
@@ -141,131 +231,191 @@ class StockAnalyzer:
         all_data = {
             'price_data': price_data,
             'technical_indicators': technical_indicators,
-            'financial_ratios': financial_ratios,
-            'risk_metrics': risk_metrics,
+            'financial_ratios': context.financial_ratios,
+            'risk_metrics': context.risk_metrics,
             'sentiment_data': sentiment_data if sentiment_data else {'status': 'error'}
         }
         
+        # 基准指数市场状态对应的权重（同一交易日所有股票共享）
+        if self.regime_service is not None:
+            all_data['market_weights'] = self.regime_service.get_adjusted_weights(
+                price_data.index[-1]
+            )
+        
         # 计算多因子得分
         factor_analysis = self.factor_model.calculate_final_score(all_data)
+        if context.cache_key is not None and factor_analysis.get('interpretation') != "计算错误":
+            # 情绪数据随时更新，缓存中不保存情绪相关的风险指标
+            risk_metrics = {
+                name: value for name, value in context.risk_metrics.items()
+                if not name.startswith('Sentiment_')
+            }
+            self.score_cache.put(context.cache_key, {
+                'factor_analysis': factor_analysis,
+                'risk_metrics': risk_metrics,
+                'financial_ratios': context.financial_ratios
+            })
+        
+        context.factor_analysis = factor_analysis
+        return True
+    
+    def _stage_render(self, context):
+        """输出分析结果并提交报告渲染（渲染池在后台进程执行时不等待完成）"""
+        factor_analysis = context.factor_analysis
         if factor_analysis:
-            self.report_generator.add_section('多因子分析', factor_analysis)
-            
-            # 打印财务数据
-            print("\n获取到的财务数据（百万）:")
-            if 'Total Assets' in financial_ratios:
-                print(f"Total Assets: {financial_ratios['Total Assets']:,.2f}")
-            if 'Total Liabilities' in financial_ratios:
-                print(f"Total Liabilities: {financial_ratios['Total Liabilities']:,.2f}")
-            if 'Total Equity' in financial_ratios:
-                print(f"Total Equity: {financial_ratios['Total Equity']:,.2f}")
-            if 'Net Income' in financial_ratios:
-                print(f"Net Income: {financial_ratios['Net Income']:,.2f}")
-            if 'ROE' in financial_ratios:
-                print(f"ROE: {financial_ratios['ROE']:.2f}")
-            if 'DebtRatio' in financial_ratios:
-                print(f"DebtRatio: {financial_ratios['DebtRatio']:.2f}")
-            
-            # 打印基本面指标
-            if 'raw_values' in factor_analysis and 'roe' in factor_analysis['raw_values'] and 'debt_ratio' in factor_analysis['raw_values']:
-                print("\n原始指标值:")
-                print(f"ROE: {factor_analysis['raw_values']['roe']:.2f}%")
-                print(f"负债率: {factor_analysis['raw_values']['debt_ratio']:.2f}%")
-            
-            # 打印标准化后的基本面得分
-            if 'normalized_scores' in factor_analysis and 'fundamental' in factor_analysis['normalized_scores']:
-                print("\n标准化后得分:")
-                for key, value in factor_analysis['normalized_scores']['fundamental'].items():
-                    print(f"{key}: {value:.2f}")
-            
-            if 'category_scores' in factor_analysis and 'fundamental' in factor_analysis['category_scores']:
-                print(f"\n最终基本面得分: {factor_analysis['category_scores']['fundamental']:.2f}")
-            
-            # 打印技术指标
-            if 'raw_values' in factor_analysis:
-                print("\n技术指标原始值:")
-                if 'ma_trend' in factor_analysis['raw_values']:
-                    print(f"MA趋势: {factor_analysis['raw_values']['ma_trend']:.2f}%")
-                if 'atr' in factor_analysis['raw_values']:
-                    print(f"ATR: {factor_analysis['raw_values']['atr']:.2f}")
-                if 'obv' in factor_analysis['raw_values']:
-                    print(f"OBV: {factor_analysis['raw_values']['obv']:,.0f}")
-                if 'adx' in factor_analysis['raw_values']:
-                    print(f"ADX: {factor_analysis['raw_values']['adx']:.2f}")
-            
-            # 打印技术指标趋势
-            if 'normalized_scores' in factor_analysis and 'technical' in factor_analysis['normalized_scores']:
-                print("\n技术指标趋势:")
-                for key, value in factor_analysis['normalized_scores']['technical'].items():
-                    if key.endswith('_trend'):
-                        print(f"{key}: {value*100:.2f}%")
-            
-            if 'category_scores' in factor_analysis and 'technical' in factor_analysis['category_scores']:
-                print(f"\n最终技术面得分: {factor_analysis['category_scores']['technical']:.2f}")
-            
-            # 打印风险指标
-            if 'raw_values' in factor_analysis:
-                print("\n风险指标原始值:")
-                if 'var' in factor_analysis['raw_values']:
-                    print(f"VaR(95%): {factor_analysis['raw_values']['var']*100:.2f}%")
-                if 'sharpe' in factor_analysis['raw_values']:
-                    print(f"夏普比率: {factor_analysis['raw_values']['sharpe']:.2f}")
-                if 'max_drawdown' in factor_analysis['raw_values']:
-                    print(f"最大回撤: {factor_analysis['raw_values']['max_drawdown']*100:.2f}%")
-            
-            # 打印风险指标标准化得分
-            if 'normalized_scores' in factor_analysis and 'risk' in factor_analysis['normalized_scores']:
-                print("\n风险指标标准化得分:")
-                for key, value in factor_analysis['normalized_scores']['risk'].items():
-                    print(f"{key}: {value:.2f}")
-            
-            if 'category_scores' in factor_analysis and 'risk' in factor_analysis['category_scores']:
-                print(f"\n最终风险得分: {factor_analysis['category_scores']['risk']:.2f}")
-            
-            # 打印多因子分析结果
-            if 'category_scores' in factor_analysis:
-                print("\n多因子分析结果:")
-                if 'fundamental' in factor_analysis['category_scores']:
-                    print(f"基本面得分: {factor_analysis['category_scores']['fundamental']:.2f}")
-                if 'technical' in factor_analysis['category_scores']:
-                    print(f"技术面得分: {factor_analysis['category_scores']['technical']:.2f}")
-                if 'risk' in factor_analysis['category_scores']:
-                    print(f"风险得分: {factor_analysis['category_scores']['risk']:.2f}")
-                if 'sentiment' in factor_analysis['category_scores']:
-                    print(f"情绪得分: {factor_analysis['category_scores']['sentiment']:.2f}")
-            
-            if 'final_score' in factor_analysis:
-                print(f"最终得分: {factor_analysis['final_score']:.2f}")
-            
-            # 添加投资建议输出
-            if 'interpretation' in factor_analysis:
-                print("\n投资建议:")
-                print(f"综合评级: {factor_analysis['interpretation']}")
-            
-                print("\n主要优势:")
-                if 'category_scores' in factor_analysis:
-                    if 'fundamental' in factor_analysis['category_scores'] and factor_analysis['category_scores']['fundamental'] > 0.3:
-                        print("- 基本面稳健")
-                    if 'risk' in factor_analysis['category_scores'] and factor_analysis['category_scores']['risk'] > 0.6:
-                        print("- 风险可控")
-                
-                print("\n需要关注:")
-                if 'category_scores' in factor_analysis:
-                    if 'technical' in factor_analysis['category_scores'] and factor_analysis['category_scores']['technical'] < 0.3:
-                        print("- 技术面偏弱")
-                    if 'sentiment' in factor_analysis['category_scores'] and factor_analysis['category_scores']['sentiment'] == 0:
-                        print("- 缺乏市场情绪数据")
+            self._print_factor_analysis(context.financial_ratios, factor_analysis)
+        
+        # 只把报告需要的部分交给渲染池，每只股票独立渲染，避免批量分析时数据残留
+        context.render_future = self.render_pool.render(AnalysisResult.from_context(context, charts=self.charts))
+        if not context.render_future.done():
+            return True
+        return self.collect_render(context) is not None
+    
+    def collect_render(self, context):
+        """
+        等待报告渲染完成并取回报告路径
+        params:
+            context: AnalysisContext - run_pipeline的结果
+        returns:
+            str - 报告路径，未渲染或渲染失败返回None
+        """
+        future = context.render_future
+        if future is None:
+            return context.report_path
+        context.render_future = None
+        try:
+            rendered = future.result()
+        except Exception as e:
+            log(f"生成 {context.symbol} 的报告失败: {str(e)}", 'error')
+            return None
+        context.report_path = rendered['report_path']
+        context.markdown_path = rendered['markdown_path']
+        context.chart_paths = rendered['chart_paths']
+        if context.markdown_path:
+            log(f"成功生成 {context.symbol} 的Markdown分析报告: {context.markdown_path}")
+        return context.report_path
+    
+    @staticmethod
+    def _category_factor_scores(factor_analysis, category):
+        """
+        按权重配置中的类别分组取出因子得分
+        params:
+            factor_analysis: dict - calculate_final_score的结果
+            category: str - 因子类别（fundamental、technical、risk、sentiment）
+        returns:
+            dict - 该类别中已计算的因子得分
+        """
+        factor_scores = factor_analysis.get('factor_scores', {})
+        factors = factor_analysis.get('weights', {}).get(category, {}).get('factors', {})
+        return {factor: factor_scores[factor] for factor in factors if factor in factor_scores}
+    
+    def _print_factor_analysis(self, financial_ratios, factor_analysis):
+        """打印多因子分析结果"""
+        # 打印财务数据
+        log("\n获取到的财务数据（百万）:")
+        if 'Total Assets' in financial_ratios:
+            log(f"Total Assets: {financial_ratios['Total Assets']:,.2f}")
+        if 'Total Liabilities' in financial_ratios:
+            log(f"Total Liabilities: {financial_ratios['Total Liabilities']:,.2f}")
+        if 'Total Equity' in financial_ratios:
+            log(f"Total Equity: {financial_ratios['Total Equity']:,.2f}")
+        if 'Net Income' in financial_ratios:
+            log(f"Net Income: {financial_ratios['Net Income']:,.2f}")
+        if 'ROE' in financial_ratios:
+            log(f"ROE: {financial_ratios['ROE']:.2f}")
+        if 'DebtRatio' in financial_ratios:
+            log(f"DebtRatio: {financial_ratios['DebtRatio']:.2f}")
+        
+        # 打印基本面指标
+        if 'raw_values' in factor_analysis and 'roe' in factor_analysis['raw_values'] and 'debt_ratio' in factor_analysis['raw_values']:
+            log("\n原始指标值:")
+            log(f"ROE: {factor_analysis['raw_values']['roe']:.2f}%")
+            log(f"负债率: {factor_analysis['raw_values']['debt_ratio']:.2f}%")
+        
+        # 打印标准化后的基本面得分
+        fundamental_scores = self._category_factor_scores(factor_analysis, 'fundamental')
+        if fundamental_scores:
+            log("\n标准化后得分:")
+            for key, value in fundamental_scores.items():
+                log(f"{key}: {value:.2f}")
+        
+        if 'category_scores' in factor_analysis and 'fundamental' in factor_analysis['category_scores']:
+            log(f"\n最终基本面得分: {factor_analysis['category_scores']['fundamental']:.2f}")
         
-        # 生成报告
-        report_path = self.report_generator.generate_report(symbol)
+        # 打印技术指标
+        if 'raw_values' in factor_analysis:
+            log("\n技术指标原始值:")
+            if 'ma_trend' in factor_analysis['raw_values']:
+                log(f"MA趋势: {factor_analysis['raw_values']['ma_trend']:.2f}%")
+            if 'atr' in factor_analysis['raw_values']:
+                log(f"ATR: {factor_analysis['raw_values']['atr']:.2f}")
+            if 'obv' in factor_analysis['raw_values']:
+                log(f"OBV: {factor_analysis['raw_values']['obv']:,.0f}")
+            if 'adx' in factor_analysis['raw_values']:
+                log(f"ADX: {factor_analysis['raw_values']['adx']:.2f}")
         
-        # 如果需要导出Markdown报告
-        if export_md:
-            md_report_path = self.report_generator.generate_markdown_report(symbol)
-            if md_report_path:
-                print(f"成功生成 {symbol} 的Markdown分析报告: {md_report_path}")
+        # 打印技术指标趋势
+        if factor_analysis.get('technical_trends'):
+            log("\n技术指标趋势:")
+            for key, value in factor_analysis['technical_trends'].items():
+                log(f"{key}: {value*100:.2f}%")
         
-        return report_path
+        if 'category_scores' in factor_analysis and 'technical' in factor_analysis['category_scores']:
+            log(f"\n最终技术面得分: {factor_analysis['category_scores']['technical']:.2f}")
+        
+        # 打印风险指标
+        if 'raw_values' in factor_analysis:
+            log("\n风险指标原始值:")
+            if 'var' in factor_analysis['raw_values']:
+                log(f"VaR(95%): {factor_analysis['raw_values']['var']*100:.2f}%")
+            if 'sharpe' in factor_analysis['raw_values']:
+                log(f"夏普比率: {factor_analysis['raw_values']['sharpe']:.2f}")
+            if 'max_drawdown' in factor_analysis['raw_values']:
+                log(f"最大回撤: {factor_analysis['raw_values']['max_drawdown']*100:.2f}%")
+        
+        # 打印风险指标标准化得分
+        risk_scores = self._category_factor_scores(factor_analysis, 'risk')
+        if risk_scores:
+            log("\n风险指标标准化得分:")
+            for key, value in risk_scores.items():
+                log(f"{key}: {value:.2f}")
+        
+        if 'category_scores' in factor_analysis and 'risk' in factor_analysis['category_scores']:
+            log(f"\n最终风险得分: {factor_analysis['category_scores']['risk']:.2f}")
+        
+        # 打印多因子分析结果
+        if 'category_scores' in factor_analysis:
+            log("\n多因子分析结果:")
+            if 'fundamental' in factor_analysis['category_scores']:
+                log(f"基本面得分: {factor_analysis['category_scores']['fundamental']:.2f}")
+            if 'technical' in factor_analysis['category_scores']:
+                log(f"技术面得分: {factor_analysis['category_scores']['technical']:.2f}")
+            if 'risk' in factor_analysis['category_scores']:
+                log(f"风险得分: {factor_analysis['category_scores']['risk']:.2f}")
+            if 'sentiment' in factor_analysis['category_scores']:
+                log(f"情绪得分: {factor_analysis['category_scores']['sentiment']:.2f}")
+        
+        if 'final_score' in factor_analysis:
+            log(f"最终得分: {factor_analysis['final_score']:.2f}")
+        
+        # 添加投资建议输出
+        if 'interpretation' in factor_analysis:
+            log("\n投资建议:")
+            log(f"综合评级: {factor_analysis['interpretation']}")
+        
+            log("\n主要优势:")
+            if 'category_scores' in factor_analysis:
+                if 'fundamental' in factor_analysis['category_scores'] and factor_analysis['category_scores']['fundamental'] > 0.3:
+                    log("- 基本面稳健")
+                if 'risk' in factor_analysis['category_scores'] and factor_analysis['category_scores']['risk'] > 0.6:
+                    log("- 风险可控")
+            
+            log("\n需要关注:")
+            if 'category_scores' in factor_analysis:
+                if 'technical' in factor_analysis['category_scores'] and factor_analysis['category_scores']['technical'] < 0.3:
+                    log("- 技术面偏弱")
+                if 'sentiment' in factor_analysis['category_scores'] and factor_analysis['category_scores']['sentiment'] == 0:
+                    log("- 缺乏市场情绪数据")
 
 def main():
     analyzer = StockAnalyzer()
@@ -0,0 +1,115 @@
+import os
+from datetime import datetime, timedelta
+import pandas as pd
+from .config import CACHE_CONFIG, FACTOR_CONFIG
+from .logger import log
+from .weight_adjuster import STATE_FIELDS, WeightAdjuster
+
+class MarketRegimeService:
+    """
+    基准指数市场状态服务
+    每天只获取一次基准指数行情，向量化计算全部交易日的市场状态序列并缓存，
+    同一天分析的所有股票共享同一组调整后的权重。
+    """
+    # 进程内缓存: (基准代码, 日期) -> 市场状态序列
+    _regime_cache = {}
+
+    def __init__(self, benchmark=None, data_fetcher=None, weight_adjuster=None, days=None):
+        market_config = FACTOR_CONFIG['market_state']
+        self.benchmark = benchmark or market_config['benchmark']
+        self.days = days or market_config['benchmark_days']
+        self.data_fetcher = data_fetcher
+        self.weight_adjuster = weight_adjuster or WeightAdjuster()
+        self.cache_config = CACHE_CONFIG['regime_cache']
+        self._weights_cache = {}
+
+    def _cache_file(self, today):
+        return os.path.join(self.cache_config['path'], f"{self.benchmark}_{today}.pkl")
+
+    def get_regime_series(self):
+        """
+        获取基准指数的市场状态序列（按日缓存）
+        returns:
+            pd.DataFrame - 每个交易日的趋势强度、波动率、成交量趋势和市场状态，获取失败返回None
+        """
+        today = datetime.now().strftime('%Y-%m-%d')
+        key = (self.benchmark, today)
+        if key in self._regime_cache:
+            return self._regime_cache[key]
+
+        cache_file = self._cache_file(today)
+        if self.cache_config['enabled'] and os.path.exists(cache_file):
+            try:
+                regime = pd.read_pickle(cache_file)
+                self._regime_cache[key] = regime
+                return regime
+            except Exception as e:
+                log(f"读取市场状态缓存失败: {str(e)}", 'error')
+
+        price_data = self._fetch_benchmark()
+        if price_data is None or price_data.empty:
+            # 记录失败结果，避免同一天内重复请求
+            self._regime_cache[key] = None
+            return None
+
+        regime = self.weight_adjuster.analyze_market_state_series(price_data)
+        self._regime_cache[key] = regime
+        if self.cache_config['enabled']:
+            try:
+                os.makedirs(self.cache_config['path'], exist_ok=True)
+                regime.to_pickle(cache_file)
+            except Exception as e:
+                log(f"写入市场状态缓存失败: {str(e)}", 'error')
+        return regime
+
+    def _fetch_benchmark(self):
+        """获取基准指数价格数据"""
+        if self.data_fetcher is None:
+            from .data_fetcher import DataFetcher
+            self.data_fetcher = DataFetcher()
+        start_date = (datetime.now() - timedelta(days=self.days)).strftime('%Y-%m-%d')
+        stock_data = self.data_fetcher.get_stock_data(self.benchmark, start_date)
+        if stock_data is None:
+            log(f"基准指数 {self.benchmark} 数据获取失败，将按个股行情判断市场状态", 'warning')
+            return None
+        return stock_data['price_data']
+
+    def get_market_state(self, date=None):
+        """
+        获取指定日期（默认最新交易日）的市场状态
+        params:
+            date: str - 日期（YYYY-MM-DD），取不晚于该日期的最近交易日
+        returns:
+            dict - 市场状态，无数据时返回None
+        """
+        regime = self.get_regime_series()
+        if regime is None:
+            return None
+        if date is not None:
+            regime = regime[regime.index <= str(date)]
+        regime = regime.dropna(subset=list(STATE_FIELDS))
+        if regime.empty:
+            return None
+        state = regime.iloc[-1].to_dict()
+        state['date'] = regime.index[-1]
+        return state
+
+    def get_adjusted_vector(self, date=None):
+        """
+        获取指定日期的市场状态调整权重（同一交易日只计算一次）
+        params:
+            date: str - 日期（YYYY-MM-DD），默认最新交易日
+        returns:
+            CompiledWeights - 调整后的不可变权重，无基准数据时返回None
+        """
+        state = self.get_market_state(date)
+        if state is None:
+            return None
+        if state['date'] not in self._weights_cache:
+            self._weights_cache[state['date']] = self.weight_adjuster.adjust_weights_for_state(state)
+        return self._weights_cache[state['date']]
+
+    def get_adjusted_weights(self, date=None):
+        """获取指定日期的调整权重（嵌套字典格式），无基准数据时返回None"""
+        weights = self.get_adjusted_vector(date)
+        return weights.to_dict() if weights is not None else None
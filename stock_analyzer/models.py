@@ -1,19 +1,48 @@
 import numpy as np
 import pandas as pd
-from scipy import stats
 from .config import FACTOR_CONFIG
+from .logger import log
 from .weight_adjuster import WeightAdjuster
+from .weights import CompiledWeights
+from .factors import default_registry
 from .indicators import TechnicalIndicators
 
+# 技术指标趋势（仅用于报告，不参与打分）
+TECHNICAL_TRENDS = ('atr_trend', 'obv_trend', 'adx_trend')
+
+# 报告中以百分比展示的原始因子值
+RAW_VALUE_SCALE = {'roe': 100, 'debt_ratio': 100, 'ma_trend': 100}
+
+# 得分区间与评级（按阈值从高到低排列）
+SCORE_LEVELS = [
+    (0.8, "强烈看多 (非常好的投资机会)"),
+    (0.6, "看多 (较好的投资机会)"),
+    (0.4, "中性偏多 (可以考虑)"),
+    (0.2, "中性 (建议观望)"),
+    (0, "中性偏空 (暂不建议)"),
+]
+SCORE_LEVEL_DEFAULT = "看空 (建议规避)"
+
 class MultiFactorModel:
-    def __init__(self):
+    def __init__(self, registry=None):
         self.config = FACTOR_CONFIG
+        self.registry = registry if registry is not None else default_registry
         self.weights = self.config['weights']
         self.weight_adjuster = WeightAdjuster()
-        self.current_weights = self.weights.copy()  # 用于动态调整
+        self.base_vector = CompiledWeights.from_config(self.weights)
+        self.current_vector = self.base_vector  # 用于动态调整（不可变，调整时生成新对象）
+        self.current_weights = self.current_vector.to_dict()
         
-    def normalize_factor(self, factor_data, method='zscore'):
-        """标准化因子数据"""
+    def normalize_factor(self, factor_data, method='zscore', factor_name=None):
+        """
+        标准化因子数据
+        params:
+            factor_data: array-like - 因子数据
+            method: str - 标准化方法（zscore/minmax/rank）
+            factor_name: str - 因子名称，单个值时用于查找参考范围
+        returns:
+            np.ndarray - 标准化后的因子数据
+        """
         try:
             # 确保数据是数组且不为空
             factor_data = np.array(factor_data, dtype=float)
@@ -32,11 +61,9 @@ class MultiFactorModel:
                 # 默认使用 0-1 范围
                 min_val, max_val = 0, 1
                 
-                # 根据数据特征选择合适的范围
-                for key, (low, high) in reference_ranges.items():
-                    if key in str(factor_data).lower():
-                        min_val, max_val = low, high
-                        break
+                # 根据因子名称选择合适的范围
+                if factor_name in reference_ranges:
+                    min_val, max_val = reference_ranges[factor_name]
                 
                 # 使用 min-max 归一化
                 normalized = (factor_data - min_val) / (max_val - min_val)
@@ -63,192 +90,247 @@ class MultiFactorModel:
                 return (factor_data - min_val) / (max_val - min_val)
                 
             elif method == 'rank':
-                return stats.rankdata(factor_data) / len(factor_data)
+                from scipy.stats import rankdata
+                return rankdata(factor_data) / len(factor_data)
                 
             return factor_data
             
         except Exception as e:
-            print(f"标准化过程出错: {str(e)}")
+            log(f"标准化过程出错: {str(e)}")
             return np.array([0.0])
     
-    def calculate_fundamental_score(self, financial_data):
-        """计算基本面因子得分"""
+    def normalize_cross_section(self, factor_frame, method=None):
+        """
+        对一批股票的原始因子值做截面标准化（向量化）
+        params:
+            factor_frame: pd.DataFrame - 行为股票代码，列为因子名称的原始因子值
+            method: str - 标准化方法（zscore/minmax/rank），默认取配置
+        returns:
+            pd.DataFrame - 映射到[0,1]区间的因子得分，缺失值记为截面中性值0.5
+        """
+        if method is None:
+            method = self.config['normalization']['method']
+        
+        values = factor_frame.to_numpy(dtype=float, copy=True)
+        if values.size == 0:
+            return pd.DataFrame(index=factor_frame.index, columns=factor_frame.columns, dtype=float)
+        
+        # 数值越小越好的因子取反，使得分方向一致
+        inverse = np.isin(factor_frame.columns, self.config['normalization']['inverse_factors'])
+        values[:, inverse] *= -1
+        
+        missing = np.isnan(values)
+        all_missing = missing.all(axis=0)
+        if all_missing.any():
+            values[:, all_missing] = 0.0
+        
+        # Winsorize处理（去极值）
+        winsorize = self.config['normalization']['winsorize']
+        if winsorize > 0 and method != 'rank':
+            lower = np.nanquantile(values, winsorize, axis=0)
+            upper = np.nanquantile(values, 1 - winsorize, axis=0)
+            values = np.clip(values, lower, upper)
+        
+        if method == 'zscore':
+            mean = np.nanmean(values, axis=0)
+            std = np.nanstd(values, axis=0)
+            safe_std = np.where(std > 0, std, 1.0)
+            zscores = np.where(std > 0, (values - mean) / safe_std, 0.0)
+            # 通过标准正态分布函数映射到[0,1]（ndtr即norm.cdf，避免导入整个scipy.stats）
+            from scipy.special import ndtr
+            scores = ndtr(zscores)
+        elif method == 'minmax':
+            min_val = np.nanmin(values, axis=0)
+            span = np.nanmax(values, axis=0) - min_val
+            safe_span = np.where(span > 0, span, 1.0)
+            scores = np.where(span > 0, (values - min_val) / safe_span, 0.5)
+        elif method == 'rank':
+            scores = pd.DataFrame(values).rank(pct=True).to_numpy()
+        else:
+            raise ValueError(f"不支持的标准化方法: {method}")
+        
+        scores = np.where(missing, 0.5, scores)
+        return pd.DataFrame(scores, index=factor_frame.index, columns=factor_frame.columns)
+    
+    def score_universe(self, factor_frame, weights=None, method=None):
+        """
+        批量计算一组股票的多因子得分
+        params:
+            factor_frame: pd.DataFrame - 行为股票代码，列为因子名称（与FACTOR_CONFIG一致）的原始因子值
+            weights: dict或CompiledWeights - 因子权重，默认使用配置权重
+            method: str - 标准化方法，默认取配置
+        returns:
+            pd.DataFrame - 每只股票的各类别得分、最终得分及评级
+        """
+        weights = CompiledWeights.coerce(weights if weights is not None else self.base_vector)
+        
+        # 按编译权重的固定因子顺序排列（缺少的因子按0分计）
+        normalized = self.normalize_cross_section(factor_frame, method)
+        factor_scores = normalized.reindex(columns=weights.factor_names, fill_value=0.0).to_numpy()
+        
+        # 类别得分 = 因子得分矩阵 × 类别权重矩阵；最终得分 = 因子得分矩阵 × 有效因子权重向量
+        result = pd.DataFrame(
+            factor_scores @ weights.category_matrix.T,
+            index=factor_frame.index,
+            columns=weights.categories
+        )
+        final_scores = factor_scores @ weights.factor_vector
+        result['final_score'] = final_scores
+        
+        thresholds = [final_scores > threshold for threshold, _ in SCORE_LEVELS]
+        labels = [label for _, label in SCORE_LEVELS]
+        result['interpretation'] = np.select(thresholds, labels, default=SCORE_LEVEL_DEFAULT)
+        return result
+    
+    def calculate_category_scores(self, all_data, weights=None):
+        """
+        通过因子注册表计算各类别得分
+        params:
+            all_data: dict - 原始数据（price_data, technical_indicators, financial_ratios等）
+            weights: dict - 因子权重，默认使用当前权重
+        returns:
+            dict - 各类别得分、因子原始值和因子得分
+        """
+        if weights is None:
+            weights = self.current_weights
+        if isinstance(weights, CompiledWeights):
+            weights = weights.to_dict()
+        
+        # 只计算权重非零的因子，中间结果（如ATR/OBV/ADX序列）在同一次求值中共享
+        targets = self.registry.active_factors(weights)
+        if 'technical' in weights and weights['technical']['weight']:
+            targets += [t for t in TECHNICAL_TRENDS if t in self.registry]
+        values = self.registry.evaluate(all_data, targets)
+        
+        scores = {}
+        factor_scores = {}
+        for category, spec in weights.items():
+            category_score = 0.0
+            for factor, weight in spec['factors'].items():
+                if factor not in values:
+                    continue
+                factor_scores[factor] = float(self.registry.get(factor).score(values[factor]))
+                category_score += factor_scores[factor] * weight
+            scores[category] = 0.0 if np.isnan(category_score) else float(category_score)
+        
+        return {
+            'category_scores': scores,
+            'values': values,
+            'factor_scores': factor_scores
+        }
+    
+    def calculate_factor_history(self, price_data, technical_indicators=None, weights=None,
+                                 sentiment_series=None):
+        """
+        一次性计算整段价格数据上每个交易日的因子得分
+        params:
+            price_data: pd.DataFrame - 包含OHLCV的价格数据
+            technical_indicators: dict - 已计算的技术指标序列，缺省时自动计算
+            weights: dict - 因子权重，默认使用配置权重
+            sentiment_series: pd.Series - 与交易日对齐的时间衰减情绪序列，
+                              也可直接传入SentimentAnalyzer.get_sentiment_series的结果（取sentiment列）
+        returns:
+            pd.DataFrame - 行为交易日、列为因子名称的[0,1]得分（指标预热期为NaN）
+        """
+        if weights is None:
+            weights = self.weights
+        if isinstance(sentiment_series, pd.DataFrame):
+            sentiment_series = sentiment_series['sentiment']
+        if technical_indicators is None:
+            ma_data = TechnicalIndicators.calculate_ma(price_data['Close'], [5, 20])
+            technical_indicators = {'MA5': ma_data['MA5'], 'MA20': ma_data['MA20']}
+        
+        all_data = {
+            'price_data': price_data,
+            'technical_indicators': technical_indicators,
+            'sentiment_series': sentiment_series
+        }
+        targets = self.registry.active_factors(weights)
+        histories = self.registry.evaluate(all_data, targets, history=True)
+        
+        return pd.DataFrame({
+            factor: self.registry.get(factor).score(np.asarray(values, dtype=float))
+            for factor, values in histories.items()
+            if np.ndim(values)
+        }, index=price_data.index)
+    
+    def calculate_score_history(self, price_data, financial_ratios=None, sentiment_data=None,
+                                weights=None, technical_indicators=None, sentiment_series=None):
+        """
+        计算每个交易日的技术面、风险和综合得分（向量化，一次遍历）
+        params:
+            price_data: pd.DataFrame - 包含OHLCV的价格数据
+            financial_ratios: dict - 财务指标，基本面没有历史序列，使用当前值
+            sentiment_data: dict - 情绪数据，没有情绪序列时使用当前值
+            weights: dict - 因子权重，默认使用配置权重
+            technical_indicators: dict - 已计算的技术指标序列
+            sentiment_series: pd.Series - 与交易日对齐的时间衰减情绪序列（或get_sentiment_series的结果）
+        returns:
+            pd.DataFrame - 行为交易日，列为各类别得分及final_score
+        """
+        if weights is None:
+            weights = self.weights
+        
+        factor_scores = self.calculate_factor_history(
+            price_data, technical_indicators, weights, sentiment_series
+        )
+        
+        # 没有历史序列的类别（基本面，以及未提供情绪序列时的情绪）使用当前快照得分
+        snapshot = self.calculate_category_scores({
+            'financial_ratios': financial_ratios,
+            'sentiment_data': sentiment_data
+        }, weights)['category_scores']
+        
+        scores = pd.DataFrame(index=price_data.index)
+        for category, spec in weights.items():
+            factors = [f for f in spec['factors'] if f in factor_scores.columns]
+            if factors:
+                factor_weights = np.array([spec['factors'][f] for f in factors], dtype=float)
+                scores[category] = factor_scores[factors].to_numpy() @ factor_weights
+            else:
+                scores[category] = snapshot.get(category, 0.0)
+        
+        category_weights = np.array([weights[c]['weight'] for c in scores.columns], dtype=float)
+        scores['final_score'] = scores.to_numpy() @ category_weights
+        return scores
+    
+    def _calculate_single_category(self, category, all_data, label):
+        """计算单个类别的得分"""
         try:
-            factors = self.weights['fundamental']['factors']
-            
-            # 获取基础指标
-            roe = financial_data.get('ROE', 0)
-            debt_ratio = financial_data.get('DebtRatio', 0)
-            
-            print("\n原始指标值:")
-            print(f"ROE: {roe:.2%}")
-            print(f"负债率: {debt_ratio:.2%}")
-            
-            # 标准化处理
-            scores = {
-                'roe': float(self.normalize_factor(np.array([roe]), 'minmax')[0]),
-                'debt_ratio': float(self.normalize_factor(np.array([1 - debt_ratio]), 'minmax')[0]),
-                'fcf': 0.0,  # 暂时设为0
-                'ev_ebitda': 0.0,  # 暂时设为0
-                'dividend_coverage': 0.0  # 暂时设为0
-            }
-            
-            print("\n标准化后得分:")
-            for k, v in scores.items():
-                print(f"{k}: {v:.2f}")
-            
-            # 加权计算
-            fundamental_score = sum(
-                scores[factor] * weight 
-                for factor, weight in factors.items()
-            )
-            
-            print(f"\n最终基本面得分: {fundamental_score:.2f}")
-            return fundamental_score
-            
+            weights = {category: self.weights[category]}
+            result = self.calculate_category_scores(all_data, weights)
+            score = result['category_scores'][category]
+            log(f"\n最终{label}得分: {score:.2f}")
+            return score
         except Exception as e:
-            print(f"基本面因子计算错误: {str(e)}")
+            log(f"{label}因子计算错误: {str(e)}", 'error')
             return 0.0
     
+    def calculate_fundamental_score(self, financial_data):
+        """计算基本面因子得分"""
+        return self._calculate_single_category(
+            'fundamental', {'financial_ratios': financial_data}, '基本面'
+        )
+    
     def calculate_technical_score(self, price_data, technical_indicators):
         """计算技术面因子得分"""
-        try:
-            factors = self.weights['technical']['factors']
-            
-            # 计算技术指标
-            atr = TechnicalIndicators.calculate_atr(
-                price_data['High'],
-                price_data['Low'],
-                price_data['Close']
-            )
-            
-            obv = TechnicalIndicators.calculate_obv(
-                price_data['Close'],
-                price_data['Volume']
-            )
-            
-            adx = TechnicalIndicators.calculate_adx(
-                price_data['High'],
-                price_data['Low'],
-                price_data['Close']
-            )
-            
-            ma_short = technical_indicators['MA5'].iloc[-1]
-            ma_long = technical_indicators['MA20'].iloc[-1]
-            ma_trend = (ma_short / ma_long - 1) if ma_long != 0 else 0
-            
-            print("\n技术指标原始值:")
-            print(f"MA趋势: {ma_trend:.2%}")
-            print(f"ATR: {atr.iloc[-1]:.2f}")
-            print(f"OBV: {obv.iloc[-1]:,.0f}")
-            print(f"ADX: {adx.iloc[-1]:.2f}")
-            
-            # 修改标准化方法
-            scores = {
-                'ma_trend': float(self.normalize_factor(np.array([ma_trend]), 'minmax')[0]),
-                'atr': float(self.normalize_factor(np.array([atr.iloc[-1]]), 'minmax')[0]),
-                'obv': float(self.normalize_factor(np.array([obv.iloc[-1]]), 'minmax')[0]),
-                'adx': float(self.normalize_factor(np.array([adx.iloc[-1]]), 'minmax')[0])
-            }
-            
-            # 使用变化率来判断趋势，并限制范围
-            trends = {
-                'atr_trend': min(max(atr.iloc[-1] / atr.iloc[-20] - 1, -0.5), 0.5) if len(atr) >= 20 else 0,
-                'obv_trend': min(max(obv.iloc[-1] / obv.iloc[-20] - 1, -0.5), 0.5) if len(obv) >= 20 else 0,
-                'adx_trend': min(max(adx.iloc[-1] / adx.iloc[-20] - 1, -0.5), 0.5) if len(adx) >= 20 else 0
-            }
-            
-            print("\n技术指标趋势:")
-            for k, v in trends.items():
-                print(f"{k}: {v:.2%}")
-            
-            technical_score = sum(
-                scores[factor] * weight 
-                for factor, weight in factors.items()
-            )
-            
-            print(f"\n最终技术面得分: {technical_score:.2f}")
-            return technical_score
-            
-        except Exception as e:
-            print(f"技术面因子计算错误: {str(e)}")
-            return 0.0
+        return self._calculate_single_category(
+            'technical',
+            {'price_data': price_data, 'technical_indicators': technical_indicators},
+            '技术面'
+        )
     
     def calculate_risk_score(self, risk_metrics):
         """计算风险因子得分"""
-        try:
-            factors = self.weights['risk']['factors']
-            
-            # 转换风险指标为评分（越低风险越高分）
-            var_score = 1 - min(abs(risk_metrics.get('VaR(95%)', 0)), 0.1) * 10  # 限制VaR的影响
-            sharpe_ratio = risk_metrics.get('Sharpe Ratio', 0)
-            sharpe_score = min(max(sharpe_ratio, -2), 2) / 2 + 0.5  # 将夏普比率映射到[0,1]
-            max_dd = abs(risk_metrics.get('Max Drawdown', 0))
-            drawdown_score = 1 - min(max_dd, 0.5) * 2  # 限制最大回撤的影响
-            
-            scores = {
-                'var': var_score,
-                'sharpe': sharpe_score,
-                'max_drawdown': drawdown_score
-            }
-            
-            print("\n风险指标原始值:")
-            print(f"VaR(95%): {risk_metrics.get('VaR(95%)', 0):.2%}")
-            print(f"夏普比率: {sharpe_ratio:.2f}")
-            print(f"最大回撤: {max_dd:.2%}")
-            
-            # 标准化处理
-            normalized_scores = {
-                k: float(self.normalize_factor(np.array([v]), 'minmax')[0])
-                for k, v in scores.items()
-            }
-            
-            print("\n风险指标标准化得分:")
-            for k, v in normalized_scores.items():
-                print(f"{k}: {v:.2f}")
-            
-            risk_score = sum(
-                normalized_scores[factor] * weight 
-                for factor, weight in factors.items()
-            )
-            
-            print(f"\n最终风险得分: {risk_score:.2f}")
-            return risk_score
-            
-        except Exception as e:
-            print(f"风险因子计算错误: {str(e)}")
-            return 0.0
+        return self._calculate_single_category(
+            'risk', {'risk_metrics': risk_metrics}, '风险'
+        )
     
     def calculate_sentiment_score(self, sentiment_data):
         """计算情绪因子得分"""
-        try:
-            if sentiment_data['status'] != 'success':
-                return 0
-                
-            factors = self.weights['sentiment']['factors']
-            
-            scores = {
-                'social_score': sentiment_data['average_sentiment'],
-                'volume_sentiment': sentiment_data.get('volume_adjusted_sentiment', 0)
-            }
-            
-            # 标准化处理
-            normalized_scores = {
-                k: self.normalize_factor(np.array([v]))[0] 
-                for k, v in scores.items()
-            }
-            
-            # 加权计算
-            sentiment_score = sum(
-                normalized_scores[factor] * weight 
-                for factor, weight in factors.items()
-            )
-            
-            return sentiment_score
-            
-        except Exception as e:
-            print(f"情绪因子计算错误: {str(e)}")
-            return 0
+        return self._calculate_single_category(
+            'sentiment', {'sentiment_data': sentiment_data}, '情绪'
+        )
     
     def adjust_weights_by_market(self, price_data):
         """根据市场状态调整权重"""
@@ -259,150 +341,63 @@ class MultiFactorModel:
         )
         
         # 判断市场状态
+        multipliers = {}
         if returns_20d > self.config['market_state']['bull_threshold']:
             # 牛市：增加技术面和情绪面权重
-            self.current_weights['technical']['weight'] *= 1.2
-            self.current_weights['sentiment']['weight'] *= 1.2
-            self.current_weights['fundamental']['weight'] *= 0.8
+            multipliers = {'technical': 1.2, 'sentiment': 1.2, 'fundamental': 0.8}
             
         elif returns_20d < self.config['market_state']['bear_threshold']:
             # 熊市：增加基本面和风险控制权重
-            self.current_weights['fundamental']['weight'] *= 1.2
-            self.current_weights['risk']['weight'] *= 1.2
-            self.current_weights['technical']['weight'] *= 0.8
+            multipliers = {'fundamental': 1.2, 'risk': 1.2, 'technical': 0.8}
             
-        # 重新归一化权重
-        total_weight = sum(w['weight'] for w in self.current_weights.values())
-        for category in self.current_weights:
-            self.current_weights[category]['weight'] /= total_weight
+        # 以基础权重为起点调整并归一化（生成新的权重对象，不修改共享配置；重复调用不会累积）
+        self.current_vector = self.base_vector.scale(multipliers).normalized()
+        self.current_weights = self.current_vector.to_dict()
     
     def calculate_final_score(self, all_data):
         """计算最终的多因子得分"""
         try:
-            # 使用权重调整器获取动态权重
-            self.current_weights = self.weight_adjuster.get_adjusted_weights(
-                all_data['price_data']
-            )
-            
-            # 计算各类因子得分
-            scores = {}
-            raw_values = {}
-            normalized_scores = {}
-            technical_trends = {}
-            risk_scores = {}
-            
-            # 1. 基本面因子
-            if all_data.get('financial_ratios'):
-                # 获取基础指标
-                roe = all_data['financial_ratios'].get('ROE', 0)
-                debt_ratio = all_data['financial_ratios'].get('DebtRatio', 0)
-                
-                # 记录原始值
-                raw_values['roe'] = roe * 100  # 转为百分比
-                raw_values['debt_ratio'] = debt_ratio * 100  # 转为百分比
-                
-                # 标准化处理
-                normalized_scores['roe'] = float(self.normalize_factor(np.array([roe]), 'minmax')[0])
-                normalized_scores['debt_ratio'] = float(self.normalize_factor(np.array([1 - debt_ratio]), 'minmax')[0])
-                normalized_scores['fcf'] = 0.0  # 暂时设为0
-                normalized_scores['ev_ebitda'] = 0.0  # 暂时设为0
-                normalized_scores['dividend_coverage'] = 0.0  # 暂时设为0
-                
-                # 计算得分
-                scores['fundamental'] = self.calculate_fundamental_score(
-                    all_data['financial_ratios']
-                )
+            # 优先使用基准指数市场状态对应的共享权重，否则按个股行情动态调整
+            if all_data.get('market_weights') is not None:
+                self.current_vector = CompiledWeights.coerce(all_data['market_weights'])
             else:
-                scores['fundamental'] = 0.0
-            
-            # 2. 技术面因子
-            if all_data.get('technical_indicators'):
-                # 计算技术指标
-                atr = TechnicalIndicators.calculate_atr(
-                    all_data['price_data']['High'],
-                    all_data['price_data']['Low'],
-                    all_data['price_data']['Close']
+                self.current_vector = self.weight_adjuster.get_adjusted_vector(
+                    all_data['price_data']
                 )
-                
-                obv = TechnicalIndicators.calculate_obv(
-                    all_data['price_data']['Close'],
-                    all_data['price_data']['Volume']
-                )
-                
-                adx = TechnicalIndicators.calculate_adx(
-                    all_data['price_data']['High'],
-                    all_data['price_data']['Low'],
-                    all_data['price_data']['Close']
-                )
-                
-                ma_short = all_data['technical_indicators']['MA5'].iloc[-1]
-                ma_long = all_data['technical_indicators']['MA20'].iloc[-1]
-                ma_trend = (ma_short / ma_long - 1) if ma_long != 0 else 0
-                
-                # 记录原始值
-                raw_values['ma_trend'] = ma_trend * 100  # 转为百分比
-                raw_values['atr'] = atr.iloc[-1]
-                raw_values['obv'] = obv.iloc[-1]
-                raw_values['adx'] = adx.iloc[-1]
-                
-                # 记录技术指标趋势
-                technical_trends['atr_trend'] = 0.5  # 默认值
-                technical_trends['obv_trend'] = 0.5  # 默认值
-                technical_trends['adx_trend'] = 0.5  # 默认值
-                
-                # 计算得分
-                scores['technical'] = self.calculate_technical_score(
-                    all_data['price_data'],
-                    all_data['technical_indicators']
-                )
-            else:
-                scores['technical'] = 0.0
-            
-            # 3. 风险因子
-            if all_data.get('risk_metrics'):
-                # 获取风险指标
-                var_95 = all_data['risk_metrics'].get('VaR(95%)', 0)
-                sharpe_ratio = all_data['risk_metrics'].get('Sharpe Ratio', 0)
-                max_dd = abs(all_data['risk_metrics'].get('Max Drawdown', 0))
-                
-                # 记录原始值
-                raw_values['var'] = var_95
-                raw_values['sharpe'] = sharpe_ratio
-                raw_values['max_drawdown'] = max_dd
-                
-                # 转换风险指标为评分（越低风险越高分）
-                var_score = 1 - min(abs(var_95), 0.1) * 10  # 限制VaR的影响
-                sharpe_score = min(max(sharpe_ratio, -2), 2) / 2 + 0.5  # 将夏普比率映射到[0,1]
-                drawdown_score = 1 - min(max_dd, 0.5) * 2  # 限制最大回撤的影响
-                
-                # 标准化处理
-                risk_scores['var'] = float(self.normalize_factor(np.array([var_score]), 'minmax')[0])
-                risk_scores['sharpe'] = float(self.normalize_factor(np.array([sharpe_score]), 'minmax')[0])
-                risk_scores['max_drawdown'] = float(self.normalize_factor(np.array([drawdown_score]), 'minmax')[0])
-                
-                # 计算得分
-                scores['risk'] = self.calculate_risk_score(
-                    all_data['risk_metrics']
-                )
-            else:
-                scores['risk'] = 0.0
-            
-            # 4. 情绪因子
-            if all_data.get('sentiment_data'):
-                scores['sentiment'] = self.calculate_sentiment_score(
-                    all_data['sentiment_data']
-                )
-            else:
-                scores['sentiment'] = 0.0
-            
-            # 确保所有分数都是有效数字
-            scores = {k: 0.0 if np.isnan(v) else float(v) for k, v in scores.items()}
+            self.current_weights = self.current_vector.to_dict()
+            
+            # 通过因子计算图一次性求出所有类别得分
+            result = self.calculate_category_scores(all_data)
+            scores = result['category_scores']
+            values = result['values']
+            factor_scores = result['factor_scores']
+            
+            # 原始值（比率类转为百分比）
+            raw_values = {
+                factor: float(value) * RAW_VALUE_SCALE.get(factor, 1)
+                for factor, value in values.items()
+                if factor not in TECHNICAL_TRENDS
+            }
+            technical_trends = {
+                factor: float(values[factor])
+                for factor in TECHNICAL_TRENDS
+                if factor in values
+            }
+            normalized_scores = {}
+            if all_data.get('financial_ratios'):
+                normalized_scores = {
+                    factor: factor_scores.get(factor, 0.0)
+                    for factor in self.current_weights['fundamental']['factors']
+                }
+            risk_scores = {
+                factor: factor_scores[factor]
+                for factor in self.current_weights['risk']['factors']
+                if factor in factor_scores
+            }
             
-            # 计算加权得分
-            final_score = 0.0
-            for category, score in scores.items():
-                weight = self.current_weights[category]['weight']
-                final_score += score * weight
+            # 计算加权得分（类别得分向量 × 类别权重向量）
+            category_vector = np.array([scores[c] for c in self.current_vector.categories])
+            final_score = float(category_vector @ self.current_vector.category_weights)
             
             # 生成详细报告
             report = {
@@ -413,20 +408,21 @@ class MultiFactorModel:
                 'raw_values': raw_values,
                 'normalized_scores': normalized_scores,
                 'technical_trends': technical_trends,
-                'risk_scores': risk_scores
+                'risk_scores': risk_scores,
+                'factor_scores': factor_scores
             }
             
-            print("\n多因子分析结果:")
-            print(f"基本面得分: {scores['fundamental']:.2f}")
-            print(f"技术面得分: {scores['technical']:.2f}")
-            print(f"风险得分: {scores['risk']:.2f}")
-            print(f"情绪得分: {scores['sentiment']:.2f}")
-            print(f"最终得分: {final_score:.2f}")
+            log("\n多因子分析结果:")
+            log(f"基本面得分: {scores['fundamental']:.2f}")
+            log(f"技术面得分: {scores['technical']:.2f}")
+            log(f"风险得分: {scores['risk']:.2f}")
+            log(f"情绪得分: {scores['sentiment']:.2f}")
+            log(f"最终得分: {final_score:.2f}")
             
             return report
             
         except Exception as e:
-            print(f"多因子最终得分计算错误: {str(e)}")
+            log(f"多因子最终得分计算错误: {str(e)}", 'error')
             return {
                 'final_score': 0.0,
                 'category_scores': {
@@ -440,24 +436,54 @@ class MultiFactorModel:
                 'raw_values': {},
                 'normalized_scores': {},
                 'technical_trends': {},
-                'risk_scores': {}
+                'risk_scores': {},
+                'factor_scores': {}
             }
     
+    def rescore_sentiment(self, report, sentiment_data):
+        """
+        用最新的情绪数据更新缓存的得分报告
+        得分缓存只覆盖价格和财报数据决定的类别，情绪类别在每次分析时按报告中的权重重新计算
+        params:
+            report: dict - calculate_final_score的结果（通常来自得分缓存）
+            sentiment_data: dict - 情绪数据
+        returns:
+            dict - 更新了情绪得分、最终得分和评级的报告
+        """
+        weights = report['weights']
+        result = self.calculate_category_scores(
+            {'sentiment_data': sentiment_data if sentiment_data else {'status': 'error'}},
+            {'sentiment': weights['sentiment']}
+        )
+        sentiment_factors = weights['sentiment']['factors']
+        scores = dict(report['category_scores'])
+        scores['sentiment'] = result['category_scores']['sentiment']
+        
+        # 替换情绪因子的原始值和得分（情绪数据不可用时移除）
+        raw_values = {k: v for k, v in report['raw_values'].items() if k not in sentiment_factors}
+        factor_scores = {k: v for k, v in report['factor_scores'].items() if k not in sentiment_factors}
+        for factor, value in result['values'].items():
+            raw_values[factor] = float(value) * RAW_VALUE_SCALE.get(factor, 1)
+        factor_scores.update(result['factor_scores'])
+        
+        self.current_weights = weights
+        final_score = float(sum(scores[c] * weights[c]['weight'] for c in scores))
+        return {
+            **report,
+            'final_score': final_score,
+            'category_scores': scores,
+            'interpretation': self._interpret_score(final_score),
+            'raw_values': raw_values,
+            'factor_scores': factor_scores
+        }
+    
     def _interpret_score(self, score):
         """解释多因子得分"""
-        result = ""
-        if score > 0.8:
-            result = "强烈看多 (非常好的投资机会)"
-        elif score > 0.6:
-            result = "看多 (较好的投资机会)"
-        elif score > 0.4:
-            result = "中性偏多 (可以考虑)"
-        elif score > 0.2:
-            result = "中性 (建议观望)"
-        elif score > 0:
-            result = "中性偏空 (暂不建议)"
-        else:
-            result = "看空 (建议规避)"
+        result = SCORE_LEVEL_DEFAULT
+        for threshold, label in SCORE_LEVELS:
+            if score > threshold:
+                result = label
+                break
         
         # 添加详细说明
         if self.current_weights['fundamental']['weight'] > 0.5:
@@ -465,4 +491,4 @@ class MultiFactorModel:
         if self.current_weights['technical']['weight'] > 0.4:
             result += "\n技术面因素权重较高"
         
-        return result 
\ No newline at end of file
+        return result
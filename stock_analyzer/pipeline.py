@@ -0,0 +1,79 @@
+# 分析流水线的阶段（按顺序执行，可只运行任意前缀）
+STAGES = ('fetch', 'validate', 'compute', 'score', 'render')
+
+class AnalysisContext:
+    """
+    单只股票一次分析的上下文
+    保存各阶段的中间结果、耗时和失败阶段，阶段失败时后续阶段不再执行。
+    """
+    def __init__(self, symbol, days=365, export_md=False, report_format=None):
+        self.symbol = symbol
+        self.days = days
+        self.export_md = export_md
+        self.report_format = report_format
+
+        # fetch
+        self.stock_data = None
+        self.price_data = None
+        # validate
+        self.cache_key = None
+        self.cached_score = None  # 命中得分缓存时的缓存内容
+        # compute
+        self.risk_metrics = None
+        self.ma_data = None
+        self.rsi_data = None
+        self.bollinger_data = None
+        self.financial_ratios = None
+        self.sentiment_data = None
+        # score
+        self.factor_analysis = None
+        # render
+        self.report_path = None
+        self.markdown_path = None
+        self.chart_paths = {}
+        self.render_future = None
+
+        self.timings = {}
+        self.completed = []
+        self.failed_stage = None
+        self.error = None  # 阶段抛出异常时的错误信息
+
+    def release_data(self):
+        """
+        释放行情和指标数据（报告已提交渲染池后调用）
+        等待渲染结果时只保留渲染future和得分等少量结果，排队的股票不会累积完整数据
+        """
+        self.stock_data = None
+        self.price_data = None
+        self.ma_data = None
+        self.rsi_data = None
+        self.bollinger_data = None
+        self.cached_score = None
+
+    @property
+    def ok(self):
+        """所有已执行的阶段均成功"""
+        return self.failed_stage is None
+
+    def format_timings(self):
+        """各阶段耗时的文字描述"""
+        return ', '.join(f"{stage} {seconds:.3f}s" for stage, seconds in self.timings.items())
+
+    def __repr__(self):
+        status = 'ok' if self.ok else f"failed at {self.failed_stage}"
+        return f"AnalysisContext({self.symbol!r}, {status}, stages={self.completed})"
+
+
+def resolve_stages(until=None):
+    """
+    获取需要执行的阶段
+    params:
+        until: str - 最后执行的阶段，默认执行全部阶段
+    returns:
+        tuple - 阶段名称
+    """
+    if until is None:
+        return STAGES
+    if until not in STAGES:
+        raise ValueError(f"未知的分析阶段: {until}，可选: {', '.join(STAGES)}")
+    return STAGES[:STAGES.index(until) + 1]
@@ -0,0 +1,170 @@
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from .config import CHART_CONFIG, REPORT_CONFIG
+from .logger import log
+from .report_generator import ReportGenerator
+
+class AnalysisResult:
+    """
+    渲染报告所需的分析结果
+    只保留报告各部分的数据（不含原始行情和公司信息），可序列化后交给渲染进程。
+    """
+    __slots__ = ('symbol', 'report_format', 'export_md', 'output_path', 'sections', 'charts')
+
+    def __init__(self, symbol, sections, report_format=None, export_md=False, output_path=None, charts=None):
+        """
+        params:
+            symbol: str - 股票代码
+            sections: list - [(部分名称, 数据)]，按报告顺序
+            report_format: str - 报告格式，默认取REPORT_CONFIG['format']
+            export_md: bool - 是否导出Markdown报告
+            output_path: str - 报告输出目录，默认取REPORT_CONFIG['output_path']
+            charts: bool - 是否生成PNG图表，默认取CHART_CONFIG['enabled']
+        """
+        self.symbol = symbol
+        self.sections = sections
+        self.report_format = report_format or REPORT_CONFIG['format']
+        self.export_md = export_md
+        # 在主进程确定输出目录，渲染进程不依赖运行时修改过的配置
+        self.output_path = output_path or REPORT_CONFIG['output_path']
+        self.charts = CHART_CONFIG['enabled'] if charts is None else charts
+
+    @classmethod
+    def from_context(cls, context, output_path=None, charts=None):
+        """
+        从分析上下文生成渲染结果
+        params:
+            context: AnalysisContext - 已完成score阶段的上下文
+            output_path: str - 报告输出目录
+            charts: bool - 是否生成PNG图表
+        returns:
+            AnalysisResult
+        """
+        sections = [
+            ('价格数据', context.price_data),
+            ('风险指标', context.risk_metrics),
+            ('移动平均线', context.ma_data),
+            ('RSI指标', context.rsi_data),
+            ('布林带', context.bollinger_data)
+        ]
+        if context.financial_ratios:
+            sections.append(('财务指标', context.financial_ratios))
+        sentiment_data = context.sentiment_data
+        if sentiment_data and sentiment_data['status'] == 'success':
+            sections.append(('市场情绪', sentiment_data))
+        if context.factor_analysis:
+            sections.append(('多因子分析', context.factor_analysis))
+        return cls(context.symbol, sections, context.report_format, context.export_md, output_path, charts)
+
+    def __repr__(self):
+        names = [name for name, _ in self.sections]
+        return f"AnalysisResult({self.symbol!r}, {self.report_format!r}, sections={names})"
+
+
+def render_result(result):
+    """
+    渲染一只股票的报告（可在子进程中执行）
+    params:
+        result: AnalysisResult - 分析结果
+    returns:
+        dict - symbol、report_path、markdown_path、chart_paths，失败的路径为None
+    """
+    markdown_path = None
+    chart_paths = {}
+    with ReportGenerator(result.output_path) as report:
+        for name, data in result.sections:
+            report.add_section(name, data)
+        report_path = report.generate_report(result.symbol, result.report_format)
+        if result.export_md:
+            markdown_path = report.generate_markdown_report(result.symbol)
+
+    if result.charts:
+        chart_paths = _render_charts(result)
+    return {
+        'symbol': result.symbol,
+        'report_path': report_path,
+        'markdown_path': markdown_path,
+        'chart_paths': chart_paths
+    }
+
+
+def _render_charts(result):
+    # 绘图库只在需要图表时导入；每个渲染进程复用同一个ChartRenderer
+    from .charts import render_charts
+
+    sections = dict(result.sections)
+    factor_analysis = sections.get('多因子分析') or {}
+    try:
+        return render_charts(
+            result.symbol,
+            sections['价格数据'],
+            sections.get('移动平均线'),
+            sections.get('布林带'),
+            factor_analysis.get('category_scores'),
+            result.output_path
+        )
+    except Exception as e:
+        log(f"生成 {result.symbol} 的图表失败: {str(e)}", 'error')
+        return {}
+
+
+class RenderPool:
+    """
+    报告渲染池
+    分析结果提交后由进程池渲染（Excel、Markdown、PDF、图表），主进程继续分析下一只股票；
+    未完成的任务达到上限时提交会等待，限制排队结果占用的内存。workers为0时在当前进程同步渲染。
+    """
+    def __init__(self, workers=None, max_pending=None):
+        """
+        params:
+            workers: int - 渲染进程数，默认取REPORT_CONFIG['render_workers']
+            max_pending: int - 未完成任务的上限，默认为进程数的2倍
+        """
+        self.workers = REPORT_CONFIG['render_workers'] if workers is None else workers
+        self.max_pending = max_pending or max(2 * self.workers, 1)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 0 else None
+        self.pending = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, fn, *args):
+        """
+        提交渲染任务
+        params:
+            fn: callable - 模块级函数（子进程中执行，需可序列化）
+            args: 参数
+        returns:
+            concurrent.futures.Future
+        """
+        if self.executor is None:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        self._wait_for_slot()
+        future = self.executor.submit(fn, *args)
+        self.pending.add(future)
+        return future
+
+    def render(self, result):
+        """提交一只股票的报告渲染"""
+        return self.submit(render_result, result)
+
+    def _wait_for_slot(self):
+        self.pending = {f for f in self.pending if not f.done()}
+        while len(self.pending) >= self.max_pending:
+            _, not_done = wait(self.pending, return_when=FIRST_COMPLETED)
+            self.pending = set(not_done)
+
+    def close(self, wait=True):
+        """关闭进程池（默认等待全部任务完成）"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait)
+            self.executor = None
+        self.pending = set()
@@ -1,213 +1,213 @@
 import pandas as pd
 import os
+import numbers
 from datetime import datetime
+from importlib.util import find_spec
 from .config import REPORT_CONFIG
-import matplotlib.pyplot as plt
+from .logger import log
+from .documents import AnalysisDocument
 import numpy as np
 
+# 可选依赖：Parquet写入需要pyarrow或fastparquet（只检查是否安装，写入时才由pandas导入）
+parquet_available = find_spec('pyarrow') is not None or find_spec('fastparquet') is not None
+
+REPORT_FORMATS = ('excel', 'csv', 'json', 'parquet')
+# 流式写入Excel时每次转换的行数
+EXCEL_CHUNK_ROWS = 1000
+
+def _flatten(data, prefix=''):
+    """将嵌套字典展开为 (点分键, 值) 列表"""
+    items = []
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            items.extend(_flatten(value, f"{name}."))
+        else:
+            items.append((name, value))
+    return items
+
+def section_frame(data):
+    """
+    将报告部分转换为列式存储友好的DataFrame
+    DataFrame的索引转为普通列；字典展开为key/value/text三列（数值写入value，其余写入text）
+    """
+    if isinstance(data, pd.DataFrame):
+        frame = data.reset_index()
+        frame.columns = [str(c) for c in frame.columns]
+        return frame
+    if isinstance(data, pd.Series):
+        return section_frame(data.to_frame())
+    items = _flatten(data)
+    numeric = [
+        isinstance(v, numbers.Real) and not isinstance(v, bool) for _, v in items
+    ]
+    return pd.DataFrame({
+        'key': [k for k, _ in items],
+        'value': [float(v) if n else np.nan for (_, v), n in zip(items, numeric)],
+        'text': [None if n else str(v) for (_, v), n in zip(items, numeric)]
+    })
+
+def _excel_frame(data):
+    """报告部分在Excel中的表格（DataFrame原样，字典按键展开为行），其他类型不写入"""
+    if isinstance(data, pd.DataFrame):
+        return data
+    if isinstance(data, dict):
+        return pd.DataFrame.from_dict(data, orient='index')
+    return None
+
+def _excel_value(value):
+    """转换为openpyxl可写入的单元格值"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, (str, bool, numbers.Number)):
+        return value
+    if isinstance(value, datetime):
+        # Excel不支持时区
+        return value.replace(tzinfo=None)
+    return str(value)
+
+def _excel_rows(frame, chunk_size=EXCEL_CHUNK_ROWS):
+    """
+    逐行生成工作表内容：表头行（索引名+列名），之后每行为索引值+各列值，缺失值为空单元格
+    按块转换，临时内存只与chunk_size有关，与数据行数无关
+    """
+    yield [_excel_value(frame.index.name)] + [_excel_value(c) for c in frame.columns]
+    for start in range(0, len(frame), chunk_size):
+        block = frame.iloc[start:start + chunk_size]
+        values = block.astype(object).where(block.notna(), None)
+        for label, row in zip(block.index, values.itertuples(index=False, name=None)):
+            yield [_excel_value(label)] + [_excel_value(v) for v in row]
+
 class ReportGenerator:
-    def __init__(self):
+    """
+    单只股票的报告上下文
+    每次分析使用独立实例，可作为上下文管理器使用，退出时释放已添加的报告数据。
+    """
+    def __init__(self, output_path=None):
+        """
+        params:
+            output_path: str - 报告输出目录，默认取REPORT_CONFIG['output_path']
+        """
         self.report_data = {}
+        self.output_path = output_path or REPORT_CONFIG['output_path']
         # 确保输出目录存在
-        os.makedirs(REPORT_CONFIG['output_path'], exist_ok=True)
+        os.makedirs(self.output_path, exist_ok=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.clear()
     
     def add_section(self, section_name: str, data):
         """添加报告部分"""
         self.report_data[section_name] = data
     
-    def generate_report(self, symbol: str):
-        """生成分析报告"""
+    def clear(self):
+        """释放已添加的报告数据"""
+        self.report_data = {}
+    
+    def generate_report(self, symbol: str, report_format: str = None):
+        """
+        生成分析报告
+        params:
+            symbol: str - 股票代码
+            report_format: str - excel、csv、json（JSON Lines）或parquet，默认取REPORT_CONFIG['format']
+        returns:
+            str - 报告路径（csv/parquet为每个部分一个文件的目录），失败返回None
+        """
+        report_format = report_format or REPORT_CONFIG['format']
         try:
+            if report_format not in REPORT_FORMATS:
+                raise ValueError(f"不支持的报告格式: {report_format}")
+            if report_format == 'parquet' and not parquet_available:
+                log("未安装pyarrow或fastparquet，Parquet报告改为CSV格式", 'warning')
+                report_format = 'csv'
+            
             # 创建报告文件名
             timestamp = datetime.now().strftime(REPORT_CONFIG['date_format'])
-            filename = f"{REPORT_CONFIG['output_path']}/{symbol}_analysis_{timestamp}.xlsx"
-            
-            # 创建Excel写入器
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                # 写入每个部分的数据
-                for section_name, data in self.report_data.items():
-                    if isinstance(data, pd.DataFrame):
-                        data.to_excel(writer, sheet_name=section_name[:31])  # Excel工作表名最大31字符
-                    elif isinstance(data, dict):
-                        pd.DataFrame.from_dict(data, orient='index').to_excel(
-                            writer, 
-                            sheet_name=section_name[:31]
-                        )
-            
-            return filename
+            basename = f"{self.output_path}/{symbol}_analysis_{timestamp}"
+            writer = getattr(self, f'_write_{report_format}')
+            return writer(basename)
             
         except Exception as e:
-            print(f"生成报告失败: {str(e)}")
+            log(f"生成报告失败: {str(e)}", 'error')
             return None 
+    
+    def _write_excel(self, basename):
+        filename = f"{basename}.xlsx"
+        if REPORT_CONFIG['excel_streaming']:
+            return self._write_excel_streaming(filename)
+        # 创建Excel写入器
+        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+            # 写入每个部分的数据
+            for section_name, data in self.report_data.items():
+                frame = _excel_frame(data)
+                if frame is not None:
+                    frame.to_excel(writer, sheet_name=section_name[:31])  # Excel工作表名最大31字符
+        return filename
+    
+    def _write_excel_streaming(self, filename):
+        # 只写模式：逐个部分、逐行写入，工作表内容直接落盘，不在内存中构建整个工作簿
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        for section_name, data in self.report_data.items():
+            frame = _excel_frame(data)
+            if frame is None:
+                continue
+            sheet = workbook.create_sheet(title=section_name[:31])  # Excel工作表名最大31字符
+            for row in _excel_rows(frame):
+                sheet.append(row)
+        workbook.save(filename)
+        return filename
+    
+    def _write_csv(self, basename):
+        os.makedirs(basename, exist_ok=True)
+        for section_name, data in self.report_data.items():
+            section_frame(data).to_csv(
+                os.path.join(basename, f"{section_name}.csv"), index=False, encoding='utf-8'
+            )
+        return basename
+    
+    def _write_parquet(self, basename):
+        os.makedirs(basename, exist_ok=True)
+        for section_name, data in self.report_data.items():
+            section_frame(data).to_parquet(
+                os.path.join(basename, f"{section_name}.parquet"), index=False
+            )
+        return basename
+    
+    def _write_json(self, basename):
+        # JSON Lines：每行一条记录，section字段标明所属部分
+        filename = f"{basename}.jsonl"
+        with open(filename, 'w', encoding='utf-8') as f:
+            for section_name, data in self.report_data.items():
+                frame = section_frame(data)
+                frame.insert(0, 'section', section_name)
+                lines = frame.to_json(orient='records', lines=True, force_ascii=False, default_handler=str)
+                if lines and not lines.endswith('\n'):
+                    lines += '\n'
+                f.write(lines)
+        return filename
 
     def generate_markdown_report(self, symbol: str):
         """生成Markdown格式的分析报告，使用与日志文件完全一致的格式"""
         try:
             # 创建报告文件名
             timestamp = datetime.now().strftime(REPORT_CONFIG['date_format'])
-            filename = f"{REPORT_CONFIG['output_path']}/{symbol}_analysis_{timestamp}.md"
-            
-            # 准备报告内容
-            report_content = []
-            
-            # 添加财务指标
-            if '财务指标' in self.report_data:
-                financial_ratios = self.report_data['财务指标']
-                report_content.append(f"获取 {symbol} 的财务数据...")
-                report_content.append("")
-                report_content.append("获取到的财务数据（百万）:")
-                
-                # 添加可用的财务数据
-                if 'ROE' in financial_ratios:
-                    report_content.append(f"ROE: {financial_ratios['ROE']:.2f}")
-                if 'DebtRatio' in financial_ratios:
-                    report_content.append(f"DebtRatio: {financial_ratios['DebtRatio']:.2f}")
-                report_content.append("")
+            filename = f"{self.output_path}/{symbol}_analysis_{timestamp}.md"
             
-            # 添加多因子分析
-            if '多因子分析' in self.report_data:
-                factor_analysis = self.report_data['多因子分析']
-                
-                # 确保raw_values存在
-                if 'raw_values' in factor_analysis:
-                    report_content.append("原始指标值:")
-                    if 'roe' in factor_analysis['raw_values']:
-                        report_content.append(f"ROE: {factor_analysis['raw_values']['roe']:.2f}%")
-                    if 'debt_ratio' in factor_analysis['raw_values']:
-                        report_content.append(f"负债率: {factor_analysis['raw_values']['debt_ratio']:.2f}%")
-                    report_content.append("")
-                
-                # 确保normalized_scores存在
-                if 'normalized_scores' in factor_analysis:
-                    report_content.append("标准化后得分:")
-                    if 'roe' in factor_analysis['normalized_scores']:
-                        report_content.append(f"roe: {factor_analysis['normalized_scores']['roe']:.2f}")
-                    if 'debt_ratio' in factor_analysis['normalized_scores']:
-                        report_content.append(f"debt_ratio: {factor_analysis['normalized_scores']['debt_ratio']:.2f}")
-                    if 'fcf' in factor_analysis['normalized_scores']:
-                        report_content.append(f"fcf: {factor_analysis['normalized_scores']['fcf']:.2f}")
-                    if 'ev_ebitda' in factor_analysis['normalized_scores']:
-                        report_content.append(f"ev_ebitda: {factor_analysis['normalized_scores']['ev_ebitda']:.2f}")
-                    if 'dividend_coverage' in factor_analysis['normalized_scores']:
-                        report_content.append(f"dividend_coverage: {factor_analysis['normalized_scores']['dividend_coverage']:.2f}")
-                    report_content.append("")
-                
-                # 确保category_scores存在
-                if 'category_scores' in factor_analysis and 'fundamental' in factor_analysis['category_scores']:
-                    report_content.append(f"最终基本面得分: {factor_analysis['category_scores']['fundamental']:.2f}")
-                    report_content.append("")
-                
-                # 确保raw_values存在
-                if 'raw_values' in factor_analysis:
-                    report_content.append("技术指标原始值:")
-                    if 'ma_trend' in factor_analysis['raw_values']:
-                        report_content.append(f"MA趋势: {factor_analysis['raw_values']['ma_trend']:.2f}%")
-                    if 'atr' in factor_analysis['raw_values']:
-                        report_content.append(f"ATR: {factor_analysis['raw_values']['atr']:.2f}")
-                    if 'obv' in factor_analysis['raw_values']:
-                        report_content.append(f"OBV: {factor_analysis['raw_values']['obv']:,.0f}")
-                    if 'adx' in factor_analysis['raw_values']:
-                        report_content.append(f"ADX: {factor_analysis['raw_values']['adx']:.2f}")
-                    report_content.append("")
-                
-                # 确保technical_trends存在
-                if 'technical_trends' in factor_analysis:
-                    report_content.append("技术指标趋势:")
-                    if 'atr_trend' in factor_analysis['technical_trends']:
-                        report_content.append(f"atr_trend: {factor_analysis['technical_trends']['atr_trend']*100:.2f}%")
-                    if 'obv_trend' in factor_analysis['technical_trends']:
-                        report_content.append(f"obv_trend: {factor_analysis['technical_trends']['obv_trend']*100:.2f}%")
-                    if 'adx_trend' in factor_analysis['technical_trends']:
-                        report_content.append(f"adx_trend: {factor_analysis['technical_trends']['adx_trend']*100:.2f}%")
-                    report_content.append("")
-                
-                # 确保category_scores存在
-                if 'category_scores' in factor_analysis and 'technical' in factor_analysis['category_scores']:
-                    report_content.append(f"最终技术面得分: {factor_analysis['category_scores']['technical']:.2f}")
-                    report_content.append("")
-                
-                # 确保raw_values存在
-                if 'raw_values' in factor_analysis:
-                    report_content.append("风险指标原始值:")
-                    if 'var' in factor_analysis['raw_values']:
-                        report_content.append(f"VaR(95%): {factor_analysis['raw_values']['var']*100:.2f}%")
-                    if 'sharpe' in factor_analysis['raw_values']:
-                        report_content.append(f"夏普比率: {factor_analysis['raw_values']['sharpe']:.2f}")
-                    if 'max_drawdown' in factor_analysis['raw_values']:
-                        report_content.append(f"最大回撤: {factor_analysis['raw_values']['max_drawdown']*100:.2f}%")
-                    report_content.append("")
-                
-                # 确保risk_scores存在
-                if 'risk_scores' in factor_analysis:
-                    report_content.append("风险指标标准化得分:")
-                    if 'var' in factor_analysis['risk_scores']:
-                        report_content.append(f"var: {factor_analysis['risk_scores']['var']:.2f}")
-                    if 'sharpe' in factor_analysis['risk_scores']:
-                        report_content.append(f"sharpe: {factor_analysis['risk_scores']['sharpe']:.2f}")
-                    if 'max_drawdown' in factor_analysis['risk_scores']:
-                        report_content.append(f"max_drawdown: {factor_analysis['risk_scores']['max_drawdown']:.2f}")
-                    report_content.append("")
-                
-                # 确保category_scores存在
-                if 'category_scores' in factor_analysis and 'risk' in factor_analysis['category_scores']:
-                    report_content.append(f"最终风险得分: {factor_analysis['category_scores']['risk']:.2f}")
-                    report_content.append("")
-                
-                # 确保category_scores存在
-                if 'category_scores' in factor_analysis:
-                    report_content.append("多因子分析结果:")
-                    if 'fundamental' in factor_analysis['category_scores']:
-                        report_content.append(f"基本面得分: {factor_analysis['category_scores']['fundamental']:.2f}")
-                    if 'technical' in factor_analysis['category_scores']:
-                        report_content.append(f"技术面得分: {factor_analysis['category_scores']['technical']:.2f}")
-                    if 'risk' in factor_analysis['category_scores']:
-                        report_content.append(f"风险得分: {factor_analysis['category_scores']['risk']:.2f}")
-                    if 'sentiment' in factor_analysis['category_scores']:
-                        report_content.append(f"情绪得分: {factor_analysis['category_scores']['sentiment']:.2f}")
-                    report_content.append("")
-                
-                # 确保final_score存在
-                if 'final_score' in factor_analysis:
-                    report_content.append(f"最终得分: {factor_analysis['final_score']:.2f}")
-                    report_content.append("")
-                
-                # 确保interpretation存在
-                if 'interpretation' in factor_analysis:
-                    report_content.append("投资建议:")
-                    report_content.append(f"综合评级: {factor_analysis['interpretation']}")
-                    report_content.append("")
-                    
-                    report_content.append("主要优势:")
-                    if 'category_scores' in factor_analysis:
-                        if 'fundamental' in factor_analysis['category_scores'] and factor_analysis['category_scores']['fundamental'] > 0.3:
-                            report_content.append("- 基本面稳健")
-                        if 'risk' in factor_analysis['category_scores'] and factor_analysis['category_scores']['risk'] > 0.6:
-                            report_content.append("- 风险可控")
-                    report_content.append("")
-                    
-                    report_content.append("需要关注:")
-                    if 'category_scores' in factor_analysis:
-                        if 'technical' in factor_analysis['category_scores'] and factor_analysis['category_scores']['technical'] < 0.3:
-                            report_content.append("- 技术面偏弱")
-                        if 'sentiment' in factor_analysis['category_scores'] and factor_analysis['category_scores']['sentiment'] == 0:
-                            report_content.append("- 缺乏市场情绪数据")
-                    report_content.append("")
-            
-            # 写入文件 - 使用与日志文件完全相同的格式
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(f"# {symbol} 股票分析报告 ({timestamp})\n\n")
-                f.write("```\n")
-                f.write("\n".join(report_content))
-                f.write("\n```\n")
-            
-            return filename
+            # 由报告数据直接生成文档结构，再写为Markdown
+            document = AnalysisDocument.from_report(symbol, self.report_data, timestamp)
+            return document.write_markdown(filename)
             
         except Exception as e:
-            print(f"生成Markdown报告失败: {str(e)}")
+            log(f"生成Markdown报告失败: {str(e)}", 'error')
             return None
 
     def generate_score_chart(self, scores):
-        """生成得分雷达图"""
+        """生成得分雷达图（不经过pyplot，Figure不再被引用后即可回收；批量输出PNG见charts.ChartRenderer）"""
         categories = list(scores.keys())
         values = list(scores.values())
         
@@ -216,7 +216,10 @@ class ReportGenerator:
         values = np.concatenate((values, [values[0]]))  # 闭合图形
         angles = np.concatenate((angles, [angles[0]]))  # 闭合图形
         
-        fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(projection='polar'))
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(8, 8))
+        ax = fig.add_subplot(projection='polar')
         ax.plot(angles, values)
         ax.fill(angles, values, alpha=0.25)
         ax.set_xticks(angles[:-1])
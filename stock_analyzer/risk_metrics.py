@@ -67,4 +67,57 @@ class RiskMetrics:
             float - 夏普比率
         """
         excess_returns = returns - risk_free_rate/periods
-        return np.sqrt(periods) * (excess_returns.mean() / excess_returns.std()) 
\ No newline at end of file
+        return np.sqrt(periods) * (excess_returns.mean() / excess_returns.std()) 
+    
+    @staticmethod
+    def calculate_rolling_var(returns, window=252, confidence=0.95, min_periods=20):
+        """
+        计算滚动历史VaR
+        params:
+            returns: pd.Series - 收益率序列
+            window: int - 滚动窗口
+            confidence: float - 置信度，默认95%
+            min_periods: int - 最少样本数
+        returns:
+            pd.Series - 每个时点的VaR
+        """
+        return returns.rolling(window=window, min_periods=min_periods).quantile(1 - confidence).abs()
+    
+    @staticmethod
+    def calculate_rolling_sharpe_ratio(returns, window=252, risk_free_rate=0.03, periods=252, min_periods=20):
+        """
+        计算滚动夏普比率
+        params:
+            returns: pd.Series - 收益率序列
+            window: int - 滚动窗口
+            risk_free_rate: float - 无风险利率，默认3%
+            periods: int - 年化周期，默认252个交易日
+            min_periods: int - 最少样本数
+        returns:
+            pd.Series - 每个时点的夏普比率
+        """
+        excess_returns = returns - risk_free_rate/periods
+        rolling = excess_returns.rolling(window=window, min_periods=min_periods)
+        return np.sqrt(periods) * (rolling.mean() / rolling.std())
+    
+    @staticmethod
+    def calculate_rolling_max_drawdown(prices, window=252, min_periods=20):
+        """
+        计算滚动最大回撤（每个窗口内的回撤只相对该窗口内的峰值计算）
+        params:
+            prices: pd.Series - 价格序列
+            window: int - 滚动窗口
+            min_periods: int - 最少样本数
+        returns:
+            pd.Series - 每个时点的最大回撤比例
+        """
+        values = prices.to_numpy(dtype=float)
+        # 前补window-1个缺失值，每个时点对应一个完整窗口（行），峰值只取窗口内此前的最高价
+        padded = np.concatenate([np.full(window - 1, np.nan), values])
+        windows = np.lib.stride_tricks.sliding_window_view(padded, window)
+        peaks = np.fmax.accumulate(windows, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            drawdowns = np.fmin.reduce(windows / peaks - 1, axis=1)
+        
+        counts = prices.rolling(window=window, min_periods=1).count()
+        return pd.Series(np.abs(drawdowns), index=prices.index).where(counts >= min_periods)
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+import numpy as np
+from .config import CACHE_CONFIG, FACTOR_CONFIG, INDICATOR_CONFIG
+from .logger import log
+
+def config_hash():
+    """计算影响得分的配置（FACTOR_CONFIG/INDICATOR_CONFIG）的哈希值"""
+    payload = json.dumps(
+        {'factor': FACTOR_CONFIG, 'indicator': INDICATOR_CONFIG},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def _to_builtin(value):
+    """将numpy/pandas类型转换为可JSON序列化的Python类型"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+class ScoreCache:
+    """
+    多因子得分缓存
+    以 (股票代码, 首个K线日期, 最新K线日期, 财报期, 配置哈希) 为键保存多因子得分及风险、财务指标，
+    输入数据和配置均未变化时直接返回缓存结果。键中不含情绪数据，情绪得分由调用方每次重新计算。
+    """
+    def __init__(self, path=None):
+        self.path = path or CACHE_CONFIG['score_cache']['path']
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            # 旧版缓存表的键不含首个K线日期，无法区分历史窗口，直接重建
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(factor_scores)")]
+            if columns and 'first_bar_date' not in columns:
+                conn.execute("DROP TABLE factor_scores")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS factor_scores (
+                    symbol TEXT NOT NULL,
+                    first_bar_date TEXT NOT NULL,
+                    last_bar_date TEXT NOT NULL,
+                    fundamentals_period TEXT NOT NULL,
+                    config_hash TEXT NOT NULL,
+                    report TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (symbol, first_bar_date, last_bar_date, fundamentals_period, config_hash)
+                )
+            """)
+
+    def _connect(self):
+        # 每次操作使用独立连接，便于多线程/多进程共享同一缓存文件
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def make_key(symbol, price_data, fundamentals_period=None):
+        """
+        生成缓存键
+        首个K线日期区分历史窗口（如--days 90与365），两者的VaR、夏普比率和最大回撤不同
+        params:
+            symbol: str - 股票代码
+            price_data: pd.DataFrame - 价格数据
+            fundamentals_period: str - 财报期
+        returns:
+            tuple - 缓存键
+        """
+        first_bar_date = str(price_data.index[0]) if len(price_data) else ''
+        last_bar_date = str(price_data.index[-1]) if len(price_data) else ''
+        return (symbol, first_bar_date, last_bar_date, fundamentals_period or '', config_hash())
+
+    def get(self, key):
+        """读取缓存的得分报告，未命中返回None"""
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    """
+                    SELECT report FROM factor_scores
+                    WHERE symbol = ? AND first_bar_date = ? AND last_bar_date = ? AND fundamentals_period = ? AND config_hash = ?
+                    """,
+                    key
+                ).fetchone()
+            return json.loads(row[0]) if row else None
+        except Exception as e:
+            log(f"读取得分缓存失败: {str(e)}", 'error')
+            return None
+
+    def put(self, key, report):
+        """写入得分报告"""
+        try:
+            payload = json.dumps(report, ensure_ascii=False, default=_to_builtin)
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO factor_scores VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (*key, payload, datetime.now().isoformat())
+                )
+        except Exception as e:
+            log(f"写入得分缓存失败: {str(e)}", 'error')
+
+    def clear(self, symbol=None):
+        """清除缓存，指定symbol时只清除该股票"""
+        with closing(self._connect()) as conn, conn:
+            if symbol is None:
+                conn.execute("DELETE FROM factor_scores")
+            else:
+                conn.execute("DELETE FROM factor_scores WHERE symbol = ?", (symbol,))
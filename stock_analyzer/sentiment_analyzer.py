@@ -1,13 +1,45 @@
-import requests
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from .config import API_CONFIG, SENTIMENT_CONFIG
+from datetime import datetime, timedelta, timezone
+from .config import API_CONFIG, CACHE_CONFIG, SENTIMENT_CONFIG
+from .lexicon import LexiconScorer
+from .sentiment_store import SentimentStore
+from .stocktwits_client import StockTwitsClient, StockTwitsError, parse_time_window
 
 class SentimentAnalyzer:
-    def __init__(self):
+    def __init__(self, client=None, store=None, use_store=None, requests_per_hour=None):
+        """
+        params:
+            client: StockTwitsClient - StockTwits客户端，默认按配置创建
+            store: SentimentStore - 本地情绪存储
+            use_store: bool - 是否使用本地存储，默认取配置
+            requests_per_hour: int - 本分析器的StockTwits每小时请求上限，默认取配置（不修改全局配置）
+        """
         self.config = API_CONFIG['stocktwits']
+        if requests_per_hour:
+            self.config = {**self.config, 'requests_per_hour': requests_per_hour}
         self.sentiment_config = SENTIMENT_CONFIG
+        # 只关闭自己创建的客户端，外部传入的客户端由调用方管理
+        self.owns_client = client is None
+        self.client = client or StockTwitsClient(self.config)
+        # 显式传入的store优先于配置开关
+        if use_store is None:
+            use_store = store is not None or CACHE_CONFIG['sentiment_store']['enabled']
+        if store is None and use_store:
+            store = SentimentStore()
+        self.store = store if use_store else None
+        self.lexicon = LexiconScorer() if self.sentiment_config['lexicon']['enabled'] else None
+    
+    def close(self):
+        """释放StockTwits客户端的连接池和线程池"""
+        if self.owns_client:
+            self.client.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
         
     def get_social_sentiment(self, symbol: str):
         """
@@ -18,63 +50,235 @@ class SentimentAnalyzer:
             dict - 情绪分析结果
         """
         try:
-            # 构建API请求
-            url = f"{self.config['base_url']}/streams/symbol/{symbol}.json"
-            headers = {
-                'Authorization': f"OAuth {self.config['api_key']}",
-                'Content-Type': 'application/json'
-            }
-            
-            response = requests.get(url, headers=headers)
-            if response.status_code != 200:
-                return None
-                
-            data = response.json()
-            messages = data.get('messages', [])
-            
-            if len(messages) < self.sentiment_config['min_messages']:
-                return {
-                    'status': 'insufficient_data',
-                    'message': f'消息数量不足，需要至少{self.sentiment_config["min_messages"]}条'
-                }
+            if self.store is None:
+                messages = self.client.fetch_messages(symbol)
+                return self.summarize_messages(messages)
             
-            # 分析情绪
-            sentiment_scores = []
-            for msg in messages:
-                if msg.get('entities', {}).get('sentiment'):
-                    sentiment = msg['entities']['sentiment']['basic']
-                    score = self.config['sentiment_weights'].get(sentiment, 0)
-                    sentiment_scores.append(score)
-            
-            if not sentiment_scores:
-                return {
-                    'status': 'no_sentiment',
-                    'message': '没有找到情绪数据'
-                }
-            
-            # 计算情绪指标
-            sentiment_df = pd.Series(sentiment_scores)
-            results = {
-                'status': 'success',
-                'average_sentiment': sentiment_df.mean(),
-                'sentiment_std': sentiment_df.std(),
-                'bullish_ratio': (sentiment_df > 0).mean(),
-                'bearish_ratio': (sentiment_df < 0).mean(),
-                'message_count': len(messages),
-                'analyzed_count': len(sentiment_scores)
-            }
-            
-            # 添加情绪信号
-            results['signal'] = self._generate_sentiment_signal(results)
-            
-            return results
+            # 增量获取新消息后从本地存储汇总
+            self.sync(symbol)
+            return self.summarize_stored(symbol)
             
+        except StockTwitsError:
+            return None
         except Exception as e:
             return {
                 'status': 'error',
                 'message': f'获取情绪数据失败: {str(e)}'
             }
     
+    def get_social_sentiment_batch(self, symbols):
+        """
+        并发获取多只股票的社交媒体情绪数据
+        params:
+            symbols: list - 股票代码
+        returns:
+            dict - 股票代码到情绪分析结果的映射
+        """
+        try:
+            since = {s: self.store.last_id(s) for s in symbols} if self.store else None
+            fetched = self.client.fetch_many(symbols, since=since)
+        except Exception as e:
+            return {
+                symbol: {'status': 'error', 'message': f'获取情绪数据失败: {str(e)}'}
+                for symbol in symbols
+            }
+        
+        results = {}
+        for symbol, messages in fetched.items():
+            if isinstance(messages, StockTwitsError):
+                results[symbol] = None
+            elif isinstance(messages, Exception):
+                results[symbol] = {
+                    'status': 'error',
+                    'message': f'获取情绪数据失败: {str(messages)}'
+                }
+            elif self.store is not None:
+                self.store.add_messages(symbol, messages)
+                results[symbol] = self.summarize_stored(symbol)
+            else:
+                results[symbol] = self.summarize_messages(messages)
+        return results
+    
+    def sync(self, symbol):
+        """
+        增量获取比本地存储更新的消息并保存
+        params:
+            symbol: str - 股票代码
+        returns:
+            int - 新增的消息数量
+        """
+        messages = self.client.fetch_messages(symbol, since=self.store.last_id(symbol))
+        return self.store.add_messages(symbol, messages)
+    
+    def summarize_stored(self, symbol, time_window=None, end=None):
+        """
+        从本地存储汇总时间窗口内的情绪指标
+        params:
+            symbol: str - 股票代码
+            time_window: str - 时间窗口，默认取SENTIMENT_CONFIG['time_window']
+            end: datetime - 窗口结束时间，默认当前时间
+        returns:
+            dict - 情绪分析结果
+        """
+        end = end or datetime.now(timezone.utc)
+        start = end - parse_time_window(time_window or self.sentiment_config['time_window'])
+        frame = self.store.load(symbol, start, end)
+        scores = self._message_scores(frame['sentiment'], frame['body']).dropna()
+        return self._summarize(scores.to_numpy(dtype=float), len(frame))
+    
+    def get_sentiment_history(self, symbol, time_window=None, freq='D'):
+        """
+        从本地存储计算滚动情绪指标序列
+        params:
+            symbol: str - 股票代码
+            time_window: str - 滚动窗口，默认取SENTIMENT_CONFIG['time_window']
+            freq: str - 采样频率
+        returns:
+            pd.DataFrame - 每个时间点的平均情绪、看多/看空比例和消息数量
+        """
+        window = parse_time_window(time_window or self.sentiment_config['time_window'])
+        frame = self.store.load(symbol).set_index('created_at')
+        scores = self._message_scores(frame['sentiment'], frame['body'])
+        buckets = pd.DataFrame({
+            'sum': scores,
+            'analyzed': scores.notna().astype(float),
+            'bullish': (scores > 0).astype(float),
+            'bearish': (scores < 0).astype(float),
+            'messages': 1.0
+        }).resample(freq).sum()
+        rolling = buckets.rolling(window).sum()
+        
+        analyzed = rolling['analyzed'].where(rolling['analyzed'] > 0)
+        return pd.DataFrame({
+            'average_sentiment': rolling['sum'] / analyzed,
+            'bullish_ratio': rolling['bullish'] / analyzed,
+            'bearish_ratio': rolling['bearish'] / analyzed,
+            'message_count': rolling['messages'].astype(int),
+            'analyzed_count': rolling['analyzed'].astype(int)
+        })
+    
+    def get_sentiment_series(self, symbol, price_data, halflife=None):
+        """
+        从本地存储计算与价格数据交易日对齐的时间衰减情绪序列
+        params:
+            symbol: str - 股票代码
+            price_data: pd.DataFrame - 价格数据（索引为交易日）
+            halflife: str - 衰减半衰期，默认取SENTIMENT_CONFIG['decay_halflife']
+        returns:
+            pd.DataFrame - 见calculate_sentiment_series
+        """
+        frame = self.store.load(symbol)
+        return self.calculate_sentiment_series(frame, price_data.index, halflife)
+    
+    def calculate_sentiment_series(self, messages, index, halflife=None):
+        """
+        将消息情绪按交易日分桶并做指数时间衰减（向量化）
+        每条消息归入其发布时间（交易所时区）所在或之后的第一个交易日，
+        每个交易日的情绪为衰减加权的得分和除以衰减加权的消息数，消息多的交易日权重更大。
+        params:
+            messages: pd.DataFrame - 包含created_at(UTC)、sentiment和body列（SentimentStore.load格式）
+            index: 交易日索引（与价格数据一致）
+            halflife: str - 衰减半衰期，默认取SENTIMENT_CONFIG['decay_halflife']
+        returns:
+            pd.DataFrame - sentiment（衰减情绪，首条消息前为NaN）、message_count（当日消息数）、
+                           decayed_count（衰减后的日均消息数）
+        """
+        halflife = parse_time_window(halflife or self.sentiment_config['decay_halflife'])
+        bar_dates = pd.to_datetime(pd.Index(index))
+        if bar_dates.tz is not None:
+            bar_dates = bar_dates.tz_localize(None)
+        bar_dates = bar_dates.normalize()
+        # 交易日结束时刻（当日24:00）
+        bar_ends = (bar_dates + pd.Timedelta(days=1)).values.astype('datetime64[ns]').astype(np.int64)
+        
+        scores = self._message_scores(messages['sentiment'], messages.get('body')).to_numpy()
+        labeled = ~np.isnan(scores)
+        created_at = pd.DatetimeIndex(messages['created_at'][labeled])
+        if created_at.tz is None:
+            created_at = created_at.tz_localize('UTC')
+        local_times = created_at.tz_convert(self.sentiment_config['market_timezone']).tz_localize(None)
+        times = local_times.values.astype('datetime64[ns]').astype(np.int64)
+        
+        # 按交易日分桶，最后一个交易日之后的消息丢弃
+        buckets = np.searchsorted(bar_ends, times, side='right')
+        valid = buckets < len(bar_ends)
+        score_sums = np.bincount(buckets[valid], weights=scores[labeled][valid], minlength=len(bar_ends))
+        counts = np.bincount(buckets[valid], minlength=len(bar_ends)).astype(float)
+        
+        # 衰减加权的得分和/消息数之比（ewm的归一化系数相同，相除后抵消）
+        decayed_sums = pd.Series(score_sums).ewm(halflife=halflife, times=bar_dates).mean().to_numpy()
+        decayed_counts = pd.Series(counts).ewm(halflife=halflife, times=bar_dates).mean().to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sentiment = np.where(decayed_counts > 0, decayed_sums / decayed_counts, np.nan)
+        
+        return pd.DataFrame({
+            'sentiment': sentiment,
+            'message_count': counts.astype(int),
+            'decayed_count': decayed_counts
+        }, index=index)
+    
+    def _message_scores(self, labels, bodies=None):
+        """
+        计算每条消息的情绪得分
+        有情绪标签的按sentiment_weights取值（未知标签为0）；没有标签的用词典对正文打分，
+        词典未命中或未启用词典时为NaN
+        """
+        weights = self.config['sentiment_weights']
+        labels = pd.Series(labels, dtype=object)
+        scores = labels.map(lambda label: weights.get(label, 0), na_action='ignore').astype(float)
+        unlabeled = scores.isna().to_numpy()
+        if self.lexicon is not None and bodies is not None and unlabeled.any():
+            bodies = pd.Series(bodies, dtype=object).to_numpy()
+            scores[unlabeled] = self.lexicon.score(bodies[unlabeled])
+        return scores
+    
+    def summarize_messages(self, messages):
+        """
+        汇总消息列表的情绪指标
+        params:
+            messages: list - StockTwits消息
+        returns:
+            dict - 情绪分析结果
+        """
+        labels = [
+            ((msg.get('entities') or {}).get('sentiment') or {}).get('basic')
+            for msg in messages
+        ]
+        bodies = [msg.get('body') for msg in messages]
+        sentiment_scores = self._message_scores(labels, bodies).dropna()
+        return self._summarize(sentiment_scores.to_numpy(dtype=float), len(messages))
+    
+    def _summarize(self, sentiment_scores, message_count):
+        """根据情绪得分数组计算情绪指标"""
+        if message_count < self.sentiment_config['min_messages']:
+            return {
+                'status': 'insufficient_data',
+                'message': f'消息数量不足，需要至少{self.sentiment_config["min_messages"]}条'
+            }
+        
+        if len(sentiment_scores) == 0:
+            return {
+                'status': 'no_sentiment',
+                'message': '没有找到情绪数据'
+            }
+        
+        # 计算情绪指标
+        sentiment_df = pd.Series(sentiment_scores)
+        results = {
+            'status': 'success',
+            'average_sentiment': sentiment_df.mean(),
+            'sentiment_std': sentiment_df.std(),
+            'bullish_ratio': (sentiment_df > 0).mean(),
+            'bearish_ratio': (sentiment_df < 0).mean(),
+            'message_count': message_count,
+            'analyzed_count': len(sentiment_scores)
+        }
+        
+        # 添加情绪信号
+        results['signal'] = self._generate_sentiment_signal(results)
+        
+        return results
+    
     def _generate_sentiment_signal(self, sentiment_results):
         """
         根据情绪指标生成交易信号
@@ -0,0 +1,104 @@
+import os
+import sqlite3
+from contextlib import closing
+import pandas as pd
+from .config import CACHE_CONFIG
+from .stocktwits_client import parse_created_at
+
+class SentimentStore:
+    """
+    StockTwits消息本地存储
+    按股票保存消息ID、发布时间、情绪标签和正文，增量获取时只请求比已存最大ID更新的消息，
+    任意时间窗口的情绪指标都从本地存储计算。
+    """
+    def __init__(self, path=None):
+        self.path = path or CACHE_CONFIG['sentiment_store']['path']
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    symbol TEXT NOT NULL,
+                    id INTEGER NOT NULL,
+                    created_at INTEGER NOT NULL,
+                    sentiment TEXT,
+                    body TEXT,
+                    PRIMARY KEY (symbol, id)
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_messages_time ON messages (symbol, created_at)"
+            )
+
+    def _connect(self):
+        # 每次操作使用独立连接，便于多线程/多进程共享同一存储文件
+        return sqlite3.connect(self.path, timeout=30)
+
+    def last_id(self, symbol):
+        """已存储的最大消息ID，没有消息时返回None"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT MAX(id) FROM messages WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        return row[0]
+
+    def add_messages(self, symbol, messages):
+        """
+        保存消息（已存在的ID忽略）
+        params:
+            symbol: str - 股票代码
+            messages: list - StockTwits消息
+        returns:
+            int - 新增的消息数量
+        """
+        rows = []
+        for msg in messages:
+            if msg.get('id') is None or not msg.get('created_at'):
+                continue
+            sentiment = (msg.get('entities') or {}).get('sentiment') or {}
+            rows.append((
+                symbol,
+                int(msg['id']),
+                int(parse_created_at(msg['created_at']).timestamp()),
+                sentiment.get('basic'),
+                msg.get('body')
+            ))
+        if not rows:
+            return 0
+        with closing(self._connect()) as conn, conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO messages VALUES (?, ?, ?, ?, ?)", rows)
+            return conn.total_changes - before
+
+    def load(self, symbol, start=None, end=None):
+        """
+        读取消息
+        params:
+            symbol: str - 股票代码
+            start: datetime - 起始时间（含），默认不限
+            end: datetime - 结束时间（含），默认不限
+        returns:
+            pd.DataFrame - id、created_at(UTC)、sentiment、body，按时间升序
+        """
+        query = "SELECT id, created_at, sentiment, body FROM messages WHERE symbol = ?"
+        params = [symbol]
+        if start is not None:
+            query += " AND created_at >= ?"
+            params.append(int(pd.Timestamp(start).timestamp()))
+        if end is not None:
+            query += " AND created_at <= ?"
+            params.append(int(pd.Timestamp(end).timestamp()))
+        query += " ORDER BY created_at, id"
+        with closing(self._connect()) as conn:
+            frame = pd.read_sql_query(query, conn, params=params)
+        frame['created_at'] = pd.to_datetime(frame['created_at'], unit='s', utc=True)
+        return frame
+
+    def clear(self, symbol=None):
+        """清除消息，指定symbol时只清除该股票"""
+        with closing(self._connect()) as conn, conn:
+            if symbol is None:
+                conn.execute("DELETE FROM messages")
+            else:
+                conn.execute("DELETE FROM messages WHERE symbol = ?", (symbol,))
@@ -0,0 +1,250 @@
+import asyncio
+import itertools
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from .config import API_CONFIG, SENTIMENT_CONFIG
+
+def parse_time_window(window):
+    """
+    解析时间窗口配置
+    params:
+        window: str - 如'7d'、'12h'、'30m'
+    returns:
+        timedelta - 时间窗口
+    """
+    match = re.fullmatch(r'\s*(\d+)\s*([dhm])\s*', str(window))
+    if not match:
+        raise ValueError(f"无法解析时间窗口: {window}")
+    value, unit = int(match.group(1)), match.group(2)
+    return {
+        'd': timedelta(days=value),
+        'h': timedelta(hours=value),
+        'm': timedelta(minutes=value)
+    }[unit]
+
+def parse_created_at(value):
+    """解析StockTwits消息时间（UTC）"""
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+
+
+class StockTwitsError(Exception):
+    """StockTwits请求失败"""
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class HourlyRateLimiter:
+    """滑动窗口限流：任意一小时内请求数不超过上限（线程安全）"""
+    def __init__(self, requests_per_hour, period=3600):
+        self.limit = requests_per_hour
+        self.period = period
+        self.timestamps = deque()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """登记一次请求，返回需要等待的秒数（0表示可立即发送）"""
+        with self.lock:
+            now = time.monotonic()
+            while self.timestamps and now - self.timestamps[0] >= self.period:
+                self.timestamps.popleft()
+            if len(self.timestamps) < self.limit:
+                self.timestamps.append(now)
+                return 0.0
+            # 预约最早可用的时间点
+            start = self.timestamps[-self.limit] + self.period
+            self.timestamps.append(start)
+            return max(start - now, 0.0)
+
+
+class StockTwitsClient:
+    """
+    StockTwits客户端
+    使用带连接池的requests.Session，请求设置超时；按cursor的max参数翻页直到覆盖
+    SENTIMENT_CONFIG['time_window']；多股票时通过asyncio并发，受并发数和每小时请求上限约束。
+    """
+    def __init__(self, config=None, session=None):
+        self.config = config or API_CONFIG['stocktwits']
+        if self.config.get('use_stub'):
+            stub = API_CONFIG['stocktwits_stub']
+            self.base_url = f"http://{stub['host']}:{stub['port']}"
+        else:
+            self.base_url = self.config['base_url'].rstrip('/')
+        self.timeout = self.config.get('timeout', 10)
+        self.max_pages = self.config.get('max_pages', 10)
+        self.max_retries = self.config.get('max_retries', 3)
+        self.backoff = self.config.get('backoff', 1.0)
+        self.max_concurrency = self.config.get('max_concurrency', 8)
+        self.rate_limiter = HourlyRateLimiter(self.config.get('requests_per_hour', 500))
+
+        self.pool_size = self.config.get('pool_size', 16)
+        self._session = None
+        if session is not None:
+            self._set_session(session)
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size)
+
+    @property
+    def session(self):
+        """带连接池的会话（首次请求时创建，requests在此时才导入）"""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._set_session(session)
+        return self._session
+
+    def _set_session(self, session):
+        session.headers.update({
+            'Authorization': f"OAuth {self.config['api_key']}",
+            'Content-Type': 'application/json'
+        })
+        self._session = session
+
+    def close(self):
+        """释放连接池和线程池"""
+        self._executor.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    async def _get_json(self, path, params, semaphore):
+        """发送GET请求，对超时、429和5xx按退避策略重试"""
+        import requests
+
+        loop = asyncio.get_running_loop()
+        url = f"{self.base_url}{path}"
+        delay = self.backoff
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            wait = self.rate_limiter.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                async with semaphore:
+                    response = await loop.run_in_executor(
+                        self._executor,
+                        partial(self.session.get, url, params=params, timeout=self.timeout)
+                    )
+            except requests.Timeout as e:
+                last_error = StockTwitsError(f"请求超时: {str(e)}")
+                await asyncio.sleep(delay)
+                delay *= 2
+                continue
+            except requests.RequestException as e:
+                # 连接失败（如DNS错误）不重试
+                raise StockTwitsError(f"请求失败: {str(e)}")
+
+            if response.status_code == 200:
+                return response.json()
+            last_error = StockTwitsError(f"HTTP {response.status_code}", response.status_code)
+            if response.status_code == 429:
+                retry_after = response.headers.get('Retry-After')
+                await asyncio.sleep(float(retry_after) if retry_after else delay)
+                delay *= 2
+            elif response.status_code >= 500:
+                await asyncio.sleep(delay)
+                delay *= 2
+            else:
+                raise last_error
+        raise last_error
+
+    async def fetch_messages_async(self, symbol, since=None, time_window=None, semaphore=None):
+        """
+        获取单只股票时间窗口内的全部消息（按cursor翻页）
+        未指定since时最多翻max_pages页；指定since（增量同步）时翻页直到没有更多消息或到达时间窗口起点，
+        保证返回的消息与since之间没有缺口，否则调用方推进since后未获取的旧消息将永久丢失
+        params:
+            symbol: str - 股票代码
+            since: int - 只获取ID大于since的消息
+            time_window: str - 时间窗口，默认取SENTIMENT_CONFIG['time_window']
+            semaphore: asyncio.Semaphore - 并发控制
+        returns:
+            list - 消息列表（从新到旧）
+        """
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+        window = parse_time_window(time_window or SENTIMENT_CONFIG['time_window'])
+        cutoff = datetime.now(timezone.utc) - window
+
+        messages = []
+        seen = set()
+        max_id = None
+        pages = itertools.count() if since is not None else range(self.max_pages)
+        for _ in pages:
+            params = {}
+            if max_id is not None:
+                params['max'] = max_id
+            if since is not None:
+                params['since'] = since
+            data = await self._get_json(f"/streams/symbol/{symbol}.json", params, semaphore)
+
+            page = data.get('messages', [])
+            fetched = len(messages)
+            reached_cutoff = False
+            for message in page:
+                created_at = message.get('created_at')
+                if created_at and parse_created_at(created_at) < cutoff:
+                    reached_cutoff = True
+                    continue
+                # max参数包含边界消息，翻页时跳过重复
+                if message.get('id') in seen:
+                    continue
+                seen.add(message.get('id'))
+                messages.append(message)
+
+            cursor = data.get('cursor') or {}
+            # 本页没有新消息时停止，避免cursor不前进时无限翻页
+            if not page or reached_cutoff or not cursor.get('more') or len(messages) == fetched:
+                break
+            max_id = cursor.get('max') or min(m['id'] for m in page) - 1
+        return messages
+
+    async def fetch_many_async(self, symbols, since=None, time_window=None):
+        """
+        并发获取多只股票的消息
+        params:
+            symbols: list - 股票代码
+            since: dict - 股票代码到since ID的映射
+            time_window: str - 时间窗口
+        returns:
+            dict - 股票代码到消息列表（失败时为异常对象）的映射
+        """
+        since = since or {}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*[
+            self.fetch_messages_async(symbol, since.get(symbol), time_window, semaphore)
+            for symbol in symbols
+        ], return_exceptions=True)
+        return dict(zip(symbols, results))
+
+    @staticmethod
+    def _run(coroutine):
+        """在新的事件循环中执行；已在事件循环中时无法嵌套，应直接await异步接口"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        coroutine.close()
+        raise RuntimeError("同步接口不能在运行中的事件循环内调用，请使用fetch_messages_async/fetch_many_async")
+
+    def fetch_messages(self, symbol, since=None, time_window=None):
+        """同步获取单只股票的消息"""
+        return self._run(self.fetch_messages_async(symbol, since, time_window))
+
+    def fetch_many(self, symbols, since=None, time_window=None):
+        """同步接口：并发获取多只股票的消息"""
+        return self._run(self.fetch_many_async(symbols, since, time_window))
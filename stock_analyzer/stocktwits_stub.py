@@ -0,0 +1,306 @@
+import argparse
+import copy
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from .config import API_CONFIG
+from .stocktwits_client import parse_created_at, parse_time_window
+
+# 合成消息使用的词表（按情绪标签分组）
+SYNTHETIC_WORDS = {
+    'Bullish': ['breakout', 'buy', 'calls', 'moon', 'strong', 'beat', 'upgrade', 'rally'],
+    'Bearish': ['puts', 'sell', 'dump', 'weak', 'miss', 'downgrade', 'overvalued', 'crash'],
+    None: ['earnings', 'watching', 'volume', 'chart', 'today', 'guidance', 'market', 'news']
+}
+
+def _format_time(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def generate_messages(symbol, count=200, span='10d', now=None, start_id=1):
+    """
+    生成某只股票的合成消息（同一股票结果确定）
+    params:
+        symbol: str - 股票代码
+        count: int - 消息数量
+        span: str - 消息均匀分布的时间跨度
+        now: datetime - 最新消息的时间，默认当前时间
+        start_id: int - 最小消息ID
+    returns:
+        list - 从新到旧排列的消息
+    """
+    rng = random.Random(zlib.crc32(symbol.encode('utf-8')))
+    now = now or datetime.now(timezone.utc)
+    step = parse_time_window(span) / max(count, 1)
+    labels = ['Bullish', 'Bullish', 'Bearish', None, None]
+    messages = []
+    for i in range(count):
+        label = rng.choice(labels)
+        words = rng.sample(SYNTHETIC_WORDS[label], 3) + rng.sample(SYNTHETIC_WORDS[None], 2)
+        rng.shuffle(words)
+        messages.append({
+            'id': start_id + count - 1 - i,
+            'body': f"${symbol} " + ' '.join(words),
+            'created_at': _format_time(now - step * i),
+            'symbols': [{'symbol': symbol}],
+            'entities': {'sentiment': {'basic': label} if label else None}
+        })
+    return messages
+
+def load_fixture(path, shift_to_now=True):
+    """
+    读取录制的消息（消息列表或/streams/symbol接口的原始响应）
+    params:
+        path: str - JSON文件路径
+        shift_to_now: bool - 是否整体平移时间，使最新消息为当前时间
+    returns:
+        list - 从新到旧排列的消息
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    messages = data.get('messages', []) if isinstance(data, dict) else data
+    messages = sorted(messages, key=lambda m: m['id'], reverse=True)
+    if shift_to_now and messages:
+        offset = datetime.now(timezone.utc) - parse_created_at(messages[0]['created_at'])
+        messages = copy.deepcopy(messages)
+        for msg in messages:
+            msg['created_at'] = _format_time(parse_created_at(msg['created_at']) + offset)
+    return messages
+
+def save_fixture(messages, path):
+    """保存消息为回放用的JSON文件"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'messages': messages}, f, ensure_ascii=False, indent=2)
+    return path
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """处理 /streams/symbol/{SYMBOL}.json 请求"""
+
+    def do_GET(self):
+        server = self.server.stub
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        status, payload, headers = server.handle(url.path, query)
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 不输出每个请求的访问日志
+        pass
+
+
+class StockTwitsStubServer:
+    """
+    本地StockTwits替身服务
+    提供与 /streams/symbol/{SYMBOL}.json 相同格式的分页响应（max/since参数、cursor），
+    数据来自录制的fixture文件或合成消息，可配置延迟、错误率和429比例，用于离线测试和压测。
+    """
+    def __init__(self, config=None, fixture_dir=None, **overrides):
+        settings = dict(config or API_CONFIG['stocktwits_stub'])
+        settings.update(overrides)
+        self.host = settings.get('host', '127.0.0.1')
+        self.port = settings.get('port', 0)
+        self.latency = settings.get('latency', 0.0)
+        self.error_rate = settings.get('error_rate', 0.0)
+        self.rate_limit_rate = settings.get('rate_limit_rate', 0.0)
+        self.retry_after = settings.get('retry_after', 1)
+        self.page_size = settings.get('page_size', 30)
+        self.messages_per_symbol = settings.get('messages_per_symbol', 200)
+        self.fixture_dir = fixture_dir or settings.get('fixture_dir')
+        self.random = random.Random(settings.get('seed'))
+
+        self.streams = {}
+        self.stats = {'requests': 0, 'errors': 0, 'rate_limited': 0}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2] if self._server else (self.host, self.port)
+        return f"http://{host}:{port}"
+
+    def set_messages(self, symbol, messages):
+        """指定某只股票的消息（从新到旧）"""
+        with self._lock:
+            self.streams[symbol] = sorted(messages, key=lambda m: m['id'], reverse=True)
+
+    def _stream(self, symbol):
+        with self._lock:
+            if symbol not in self.streams:
+                path = os.path.join(self.fixture_dir, f"{symbol}.json") if self.fixture_dir else None
+                if path and os.path.exists(path):
+                    self.streams[symbol] = load_fixture(path)
+                else:
+                    self.streams[symbol] = generate_messages(symbol, self.messages_per_symbol)
+            return self.streams[symbol]
+
+    def handle(self, path, query):
+        """
+        生成响应
+        returns:
+            tuple - (HTTP状态码, JSON内容, 额外响应头)
+        """
+        with self._lock:
+            self.stats['requests'] += 1
+            roll = self.random.random()
+        if self.latency:
+            time.sleep(self.latency)
+
+        if roll < self.rate_limit_rate:
+            with self._lock:
+                self.stats['rate_limited'] += 1
+            return 429, {'errors': [{'message': 'Rate limit exceeded'}]}, {'Retry-After': str(self.retry_after)}
+        if roll < self.rate_limit_rate + self.error_rate:
+            with self._lock:
+                self.stats['errors'] += 1
+            return 503, {'errors': [{'message': 'Service unavailable'}]}, {}
+
+        prefix, suffix = '/streams/symbol/', '.json'
+        if not (path.startswith(prefix) and path.endswith(suffix)):
+            return 404, {'errors': [{'message': 'Not found'}]}, {}
+        symbol = path[len(prefix):-len(suffix)].upper()
+
+        messages = self._stream(symbol)
+        if 'max' in query:
+            # 与StockTwits一致：返回ID小于或等于max的消息
+            messages = [m for m in messages if m['id'] <= int(query['max'])]
+        if 'since' in query:
+            messages = [m for m in messages if m['id'] > int(query['since'])]
+        page = messages[:self.page_size]
+        return 200, {
+            'response': {'status': 200},
+            'symbol': {'symbol': symbol},
+            'cursor': {
+                'more': len(messages) > len(page),
+                'since': page[0]['id'] if page else None,
+                'max': page[-1]['id'] if page else None
+            },
+            'messages': page
+        }, {}
+
+    def start(self):
+        """在后台线程启动服务，返回base_url"""
+        self._server = ThreadingHTTPServer((self.host, self.port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def client_config(base_url, **overrides):
+    """生成指向替身服务的StockTwits客户端配置"""
+    config = copy.deepcopy(API_CONFIG['stocktwits'])
+    config['base_url'] = base_url
+    config.update(overrides)
+    return config
+
+def benchmark(symbols, rounds=3, **server_options):
+    """
+    对情绪分析路径做吞吐量测试（不使用本地消息存储，每轮完整获取）
+    params:
+        symbols: list - 股票代码
+        rounds: int - 测试轮数
+        server_options: 替身服务参数（latency、error_rate等）
+    returns:
+        dict - 每轮耗时、股票/秒、请求/秒和服务端统计
+    """
+    from .sentiment_analyzer import SentimentAnalyzer
+    from .stocktwits_client import StockTwitsClient
+
+    server_options.setdefault('port', 0)
+    with StockTwitsStubServer(**server_options) as server:
+        config = client_config(server.base_url, requests_per_hour=10 ** 9)
+        with StockTwitsClient(config) as client:
+            analyzer = SentimentAnalyzer(client=client, use_store=False)
+            timings = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                results = analyzer.get_social_sentiment_batch(symbols)
+                timings.append(time.perf_counter() - start)
+        best = min(timings)
+        return {
+            'timings': timings,
+            'symbols_per_second': len(symbols) / best,
+            'requests_per_second': server.stats['requests'] / sum(timings),
+            'succeeded': sum(1 for r in results.values() if r and r.get('status') == 'success'),
+            'server': dict(server.stats)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地StockTwits替身服务')
+    parser.add_argument('--port', type=int, default=API_CONFIG['stocktwits_stub']['port'], help='监听端口')
+    parser.add_argument('--fixtures', help='录制消息目录（{SYMBOL}.json）')
+    parser.add_argument('--latency', type=float, default=None, help='每个请求的延迟（秒）')
+    parser.add_argument('--error-rate', type=float, default=None, help='5xx错误比例')
+    parser.add_argument('--rate-limit-rate', type=float, default=None, help='429比例')
+    parser.add_argument('--benchmark', nargs='*', metavar='SYMBOL', help='运行吞吐量测试')
+    parser.add_argument('--record', nargs='+', metavar='SYMBOL', help='从真实接口录制消息到--fixtures目录')
+    args = parser.parse_args()
+
+    options = {
+        key: value for key, value in {
+            'latency': args.latency,
+            'error_rate': args.error_rate,
+            'rate_limit_rate': args.rate_limit_rate
+        }.items() if value is not None
+    }
+
+    if args.record:
+        from .stocktwits_client import StockTwitsClient
+        with StockTwitsClient() as client:
+            for symbol in args.record:
+                path = save_fixture(client.fetch_messages(symbol), os.path.join(args.fixtures or '.', f"{symbol}.json"))
+                print(f"已录制 {symbol}: {path}")
+        return
+
+    if args.benchmark is not None:
+        symbols = args.benchmark or [f"SYM{i}" for i in range(50)]
+        result = benchmark(symbols, fixture_dir=args.fixtures, **options)
+        print(f"股票数: {len(symbols)}，成功: {result['succeeded']}")
+        print(f"每轮耗时: {', '.join(f'{t:.3f}s' for t in result['timings'])}")
+        print(f"吞吐量: {result['symbols_per_second']:.1f} 股票/秒，{result['requests_per_second']:.1f} 请求/秒")
+        print(f"服务端统计: {result['server']}")
+        return
+
+    server = StockTwitsStubServer(fixture_dir=args.fixtures, port=args.port, **options)
+    print(f"StockTwits替身服务已启动: {server.start()}")
+    print("设置 API_CONFIG['stocktwits']['use_stub'] = True 使分析器连接该服务")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == '__main__':
+    main()
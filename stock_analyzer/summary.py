@@ -0,0 +1,180 @@
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from .config import FACTOR_CONFIG, REPORT_CONFIG
+from .logger import log
+from .report_generator import parquet_available
+
+SUMMARY_FORMATS = ('csv', 'sqlite', 'parquet')
+_EXTENSIONS = {'.csv': 'csv', '.db': 'sqlite', '.sqlite': 'sqlite', '.parquet': 'parquet'}
+
+def summary_columns(weights=None):
+    """汇总表的列：股票、日期、最终得分、各类别得分、各因子原始值和评级"""
+    weights = weights or FACTOR_CONFIG['weights']
+    factors = [f for spec in weights.values() for f in spec['factors']]
+    return (
+        ['symbol', 'analysis_date', 'last_bar_date', 'final_score']
+        + list(weights)
+        + factors
+        + ['interpretation']
+    )
+
+
+class SummaryWriter:
+    """
+    全市场汇总表
+    每分析完一只股票追加一行（最终得分、类别得分、因子原始值、评级），按批写入CSV、SQLite或Parquet，
+    结束时去重（同一股票同一天保留最新结果）并按得分排序，得到全市场排名。
+    """
+    def __init__(self, path, summary_format=None, batch_size=50):
+        """
+        params:
+            path: str - 汇总表路径
+            summary_format: str - csv、sqlite或parquet，默认按扩展名判断
+            batch_size: int - 缓冲的行数，达到后写入
+        """
+        summary_format = summary_format or _EXTENSIONS.get(os.path.splitext(path)[1].lower(), 'csv')
+        if summary_format not in SUMMARY_FORMATS:
+            raise ValueError(f"不支持的汇总格式: {summary_format}")
+        if summary_format == 'parquet' and not parquet_available:
+            log("未安装pyarrow或fastparquet，汇总表改为CSV格式", 'warning')
+            summary_format = 'csv'
+            path = os.path.splitext(path)[0] + '.csv'
+
+        self.path = path
+        self.format = summary_format
+        self.batch_size = batch_size
+        self.columns = summary_columns()
+        self.buffer = []
+        self.count = 0
+        self._parquet_parts = []
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.format == 'sqlite':
+            self._create_table()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.finalize()
+
+    def make_row(self, symbol, factor_analysis, last_bar_date=None):
+        """
+        生成汇总行
+        params:
+            symbol: str - 股票代码
+            factor_analysis: dict - calculate_final_score的结果
+            last_bar_date: str - 最新K线日期
+        returns:
+            dict - 汇总行
+        """
+        category_scores = factor_analysis.get('category_scores', {})
+        raw_values = factor_analysis.get('raw_values', {})
+        row = {column: np.nan for column in self.columns}
+        row.update({
+            'symbol': symbol,
+            'analysis_date': datetime.now().strftime(REPORT_CONFIG['date_format']),
+            'last_bar_date': None if last_bar_date is None else str(last_bar_date),
+            'final_score': factor_analysis.get('final_score', np.nan),
+            'interpretation': factor_analysis.get('interpretation')
+        })
+        for name, value in list(category_scores.items()) + list(raw_values.items()):
+            if name in row and name not in ('symbol', 'interpretation'):
+                row[name] = float(value)
+        return row
+
+    def append(self, symbol, factor_analysis, last_bar_date=None):
+        """追加一只股票的结果（缓冲满batch_size行时写入）"""
+        self.buffer.append(self.make_row(symbol, factor_analysis, last_bar_date))
+        self.count += 1
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """写入缓冲的行"""
+        if not self.buffer:
+            return
+        frame = pd.DataFrame(self.buffer, columns=self.columns)
+        self.buffer = []
+        getattr(self, f'_flush_{self.format}')(frame)
+
+    def _flush_csv(self, frame):
+        header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        frame.to_csv(self.path, mode='a', header=header, index=False, encoding='utf-8')
+
+    def _flush_parquet(self, frame):
+        # Parquet文件不能追加，每批写一个分片，结束时合并
+        part = f"{self.path}.part{len(self._parquet_parts):05d}"
+        frame.to_parquet(part, index=False)
+        self._parquet_parts.append(part)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _create_table(self):
+        definitions = ', '.join(
+            f'"{c}" TEXT' if c in ('symbol', 'analysis_date', 'last_bar_date', 'interpretation') else f'"{c}" REAL'
+            for c in self.columns
+        )
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS summary ({definitions}, PRIMARY KEY (symbol, analysis_date))"
+            )
+
+    def _flush_sqlite(self, frame):
+        placeholders = ', '.join('?' for _ in self.columns)
+        columns = ', '.join(f'"{c}"' for c in self.columns)
+        rows = frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO summary ({columns}) VALUES ({placeholders})", rows
+            )
+
+    def read(self):
+        """读取已写入的全部行（含未写入的缓冲）"""
+        self.flush()
+        if self.format == 'sqlite':
+            with closing(self._connect()) as conn:
+                frame = pd.read_sql_query("SELECT * FROM summary", conn)
+        else:
+            files = list(self._parquet_parts) if self.format == 'parquet' else []
+            if os.path.exists(self.path):
+                files.insert(0, self.path)
+            reader = pd.read_parquet if self.format == 'parquet' else pd.read_csv
+            frames = [reader(f) for f in files]
+            frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=self.columns)
+        return frame
+
+    def finalize(self, sort_by='final_score', ascending=False):
+        """
+        合并、去重并排序，写回汇总表
+        params:
+            sort_by: str - 排序列
+            ascending: bool - 是否升序
+        returns:
+            pd.DataFrame - 带rank列的排名表
+        """
+        frame = self.read()
+        frame = frame.drop_duplicates(['symbol', 'analysis_date'], keep='last')
+        frame = frame.sort_values(sort_by, ascending=ascending, na_position='last', kind='stable')
+        frame = frame.reset_index(drop=True)
+        ranking = frame.assign(rank=np.arange(1, len(frame) + 1))
+
+        if self.format == 'csv':
+            frame.to_csv(self.path, index=False, encoding='utf-8')
+        elif self.format == 'parquet':
+            frame.to_parquet(self.path, index=False)
+            for part in self._parquet_parts:
+                os.remove(part)
+            self._parquet_parts = []
+        else:
+            # SQLite按主键去重，建立排序列索引以便按得分查询排名
+            with closing(self._connect()) as conn, conn:
+                conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_summary_{sort_by}" ON summary ("{sort_by}")')
+        return ranking
@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+from stock_analyzer.calibration import WeightCalibrator, _evaluate
+from stock_analyzer.tests.test_main import make_stock_data
+
+class TestEvaluate(unittest.TestCase):
+    def test_ic_matches_corrcoef(self):
+        rng = np.random.default_rng(0)
+        factors = rng.normal(size=(200, 4))
+        forward_returns = factors @ [0.5, -0.2, 0.1, 0.0] + rng.normal(size=200)
+        candidates = rng.dirichlet(np.ones(4), 5)
+        expected = [np.corrcoef(factors @ w, forward_returns)[0, 1] for w in candidates]
+        np.testing.assert_allclose(_evaluate(factors, forward_returns, candidates), expected)
+
+    def test_rank_ic_matches_ranked_corrcoef(self):
+        rng = np.random.default_rng(1)
+        factors = rng.normal(size=(100, 3))
+        forward_returns = rng.normal(size=100)
+        candidates = rng.dirichlet(np.ones(3), 3)
+        ranks = lambda x: np.argsort(np.argsort(x)).astype(float)
+        expected = [np.corrcoef(ranks(factors @ w), ranks(forward_returns))[0, 1] for w in candidates]
+        np.testing.assert_allclose(_evaluate(factors, forward_returns, candidates, 'rank_ic'), expected)
+
+class TestWeightCalibrator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.calibrator = WeightCalibrator(horizon=5)
+        cls.calibrator.prepare({f'S{i}': make_stock_data(i)['price_data'] for i in range(3)})
+
+    def assert_normalized(self, weights):
+        base = self.calibrator.base_weights
+        self.assertEqual(set(weights), set(base))
+        # 被校准类别的总权重不变，类别内因子权重和为1
+        calibrated = self.calibrator.categories
+        self.assertAlmostEqual(
+            sum(weights[c]['weight'] for c in calibrated), sum(base[c]['weight'] for c in calibrated), places=3
+        )
+        for category, spec in weights.items():
+            self.assertEqual(set(spec['factors']), set(base[category]['factors']))
+            if category in calibrated:
+                self.assertAlmostEqual(sum(spec['factors'].values()), 1.0, places=3)
+            else:
+                self.assertEqual(spec, base[category])
+
+    def test_grid_and_random_search(self):
+        for method in ('grid', 'random'):
+            result = self.calibrator.search(n_samples=500, method=method, step=0.5, seed=0)
+            self.assert_normalized(result['weights'])
+            self.assertGreaterEqual(result['score'], -1.0)
+            self.assertLessEqual(result['score'], 1.0)
+        self.assertEqual(result['candidates'], 500)
+
+    def test_process_pool_matches_serial(self):
+        serial = self.calibrator.search(n_samples=1000, seed=0, chunk_size=250)
+        parallel = self.calibrator.search(n_samples=1000, seed=0, chunk_size=250, workers=2)
+        self.assertEqual(parallel['weights'], serial['weights'])
+        self.assertAlmostEqual(parallel['score'], serial['score'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import gc
+import os
+import tempfile
+import threading
+import unittest
+import matplotlib
+from stock_analyzer.charts import ChartRenderer, _memory_usage, _sample_data, get_renderer, render_charts
+from stock_analyzer.report_generator import ReportGenerator
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+class TestCharts(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.price_data, self.ma_data, self.bollinger_data, self.scores = _sample_data(120)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_agg_backend_and_png_output(self):
+        self.assertEqual(matplotlib.get_backend().lower(), 'agg')
+        paths = render_charts('AAA', self.price_data, self.ma_data, self.bollinger_data,
+                              self.scores, self.tmpdir.name)
+        self.assertEqual(set(paths), {'price', 'scores'})
+        for path in paths.values():
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(8), PNG_SIGNATURE)
+
+    def test_figures_and_lines_are_reused(self):
+        renderer = ChartRenderer()
+        path = os.path.join(self.tmpdir.name, 'chart.png')
+        renderer.render_price_chart('AAA', self.price_data, path, self.ma_data, self.bollinger_data)
+        figure, lines = renderer.price_figure, dict(renderer.price_lines)
+
+        renderer.render_price_chart('BBB', self.price_data.iloc[:50], path, self.ma_data[['MA5']].iloc[:50])
+        self.assertIs(renderer.price_figure, figure)
+        self.assertEqual(renderer.price_lines, lines)
+        visible = {label for label, line in renderer.price_lines.items() if line.get_visible()}
+        self.assertEqual(visible, {'Close', 'MA5'})
+        self.assertIsNone(renderer.band)
+        self.assertEqual(len(renderer.price_ax.lines), len(lines))
+
+        for _ in range(3):
+            renderer.render_score_radar('AAA', self.scores, path)
+        self.assertEqual(len(renderer.radar_ax.patches), 1)
+
+    def test_repeated_renders_stay_flat(self):
+        renderer = ChartRenderer()
+        path = os.path.join(self.tmpdir.name, 'chart.png')
+
+        def render(count):
+            for _ in range(count):
+                renderer.render_price_chart('AAA', self.price_data, path, self.ma_data, self.bollinger_data)
+                renderer.render_score_radar('AAA', self.scores, path)
+            gc.collect()
+            return (
+                len(renderer.price_ax.get_children()) + len(renderer.radar_ax.get_children()),
+                _memory_usage()
+            )
+
+        artists, memory = render(10)  # 预热：字体和渲染缓存
+        later_artists, later_memory = render(30)
+        self.assertEqual(later_artists, artists)
+        self.assertLess(later_memory - memory, 20 * 2 ** 20)
+
+    def test_threads_render_with_separate_renderers(self):
+        barrier = threading.Barrier(4)
+        renderers, paths, errors = {}, {}, []
+
+        def worker(symbol):
+            try:
+                renderers[symbol] = get_renderer()
+                barrier.wait()
+                for _ in range(3):
+                    paths[symbol] = render_charts(symbol, self.price_data, self.ma_data, self.bollinger_data,
+                                                  self.scores, self.tmpdir.name)
+                    self.assertEqual(get_renderer().price_ax.get_title(), symbol)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(f'T{i}',)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len({id(renderer) for renderer in renderers.values()}), 4)
+        for symbol_paths in paths.values():
+            for path in symbol_paths.values():
+                with open(path, 'rb') as f:
+                    self.assertEqual(f.read(8), PNG_SIGNATURE)
+
+    def test_score_chart_not_registered_with_pyplot(self):
+        import matplotlib.pyplot as plt
+        before = plt.get_fignums()
+        ReportGenerator(self.tmpdir.name).generate_score_chart(self.scores)
+        self.assertEqual(plt.get_fignums(), before)
+
+if __name__ == '__main__':
+    unittest.main()
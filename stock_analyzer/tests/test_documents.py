@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from stock_analyzer.documents import AnalysisDocument, pdf_styles, reportlab_available, write_pdfs
+
+LOG = """开始分析 AAPL
+
+获取到的财务数据（百万）:
+ROE: 1.50
+## 多因子分析结果
+```
+最终得分: 0.42
+<综合评级> & 中性
+```
+"""
+
+class TestAnalysisDocument(unittest.TestCase):
+    def test_report_document_markdown(self):
+        document = AnalysisDocument.from_report('AAA', {
+            '多因子分析': {'final_score': 0.42, 'interpretation': '中性'}
+        }, timestamp='2025-01-02')
+        markdown = document.to_markdown()
+        self.assertTrue(markdown.startswith("# AAA 股票分析报告 (2025-01-02)\n\n```\n"))
+        self.assertIn("最终得分: 0.42\n", markdown)
+        self.assertTrue(markdown.endswith("\n```\n"))
+
+    def test_from_text_blocks(self):
+        document = AnalysisDocument.from_text(LOG, title='AAPL 股票分析日志')
+        self.assertEqual([kind for kind, _ in document.blocks], ['text', 'text', 'heading2', 'code'])
+        self.assertEqual(document.blocks[1][1], ['获取到的财务数据（百万）:', 'ROE: 1.50'])
+        self.assertEqual(document.blocks[3][1][1], '<综合评级> & 中性')
+
+    @unittest.skipUnless(reportlab_available, '需要reportlab')
+    def test_batch_pdf_registers_styles_once(self):
+        document = AnalysisDocument.from_text(LOG, title='AAPL 股票分析日志')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = write_pdfs([(document, os.path.join(tmpdir, f'{i}.pdf')) for i in range(3)])
+            for path in paths:
+                with open(path, 'rb') as f:
+                    self.assertEqual(f.read(5), b'%PDF-')
+        self.assertEqual(pdf_styles.cache_info().misses, 1)
+
+if __name__ == '__main__':
+    unittest.main()
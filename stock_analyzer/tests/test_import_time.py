@@ -0,0 +1,27 @@
+import os
+import unittest
+from stock_analyzer.import_benchmark import IMPORT_BUDGET, measure_import, parse_importtime
+
+class TestImportTime(unittest.TestCase):
+    def test_parse_importtime(self):
+        entries = parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   child\n"
+            "import time:       300 |        420 | parent\n"
+        )
+        self.assertEqual(entries[0][:2], ('child', 1))
+        self.assertAlmostEqual(entries[1][3], 420e-6)
+
+    def test_cli_import_skips_heavy_modules(self):
+        for module in ('stock_analyzer.main', 'run'):
+            result = measure_import(module, runs=1)
+            self.assertEqual(result['heavy'], [], module)
+
+    @unittest.skipUnless(os.environ.get('IMPORT_TIME_BUDGET'), '设置IMPORT_TIME_BUDGET=1时检查导入耗时预算')
+    def test_cli_import_within_budget(self):
+        for module in ('stock_analyzer.main', 'run'):
+            result = measure_import(module, runs=3)
+            self.assertLess(result['seconds'], IMPORT_BUDGET, module)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+import numpy as np
+from stock_analyzer.lexicon import LexiconScorer
+
+class TestLexiconScorer(unittest.TestCase):
+    def setUp(self):
+        self.scorer = LexiconScorer({'buy': 1.0, 'moon': 2.0, 'sell': -1.0, '🚀': 2.0}, alpha=4.0)
+
+    def test_scores(self):
+        scores = self.scorer.score([
+            '$AAPL buy, to the moon 🚀',
+            'Time to SELL',
+            'not buy',
+            'nothing relevant, not here',
+            None
+        ])
+        self.assertAlmostEqual(scores[0], 5 / np.sqrt(25 + 4))
+        self.assertAlmostEqual(scores[1], -1 / np.sqrt(5))
+        self.assertAlmostEqual(scores[2], -1 / np.sqrt(5))
+        self.assertTrue(np.isnan(scores[3]))
+        self.assertTrue(np.isnan(scores[4]))
+
+    def test_negation_does_not_cross_messages(self):
+        scores = self.scorer.score(['not', 'buy'])
+        self.assertTrue(np.isnan(scores[0]))
+        self.assertGreater(scores[1], 0)
+
+    def test_batch_matches_single(self):
+        texts = ['buy buy sell', 'moon', "don't sell 🚀", '']
+        batch = self.scorer.score(texts)
+        single = np.array([self.scorer.score([t])[0] for t in texts])
+        np.testing.assert_allclose(batch, single)
+
+if __name__ == '__main__':
+    unittest.main()
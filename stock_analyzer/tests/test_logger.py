@@ -0,0 +1,69 @@
+import asyncio
+import contextlib
+import io
+import sys
+import threading
+import unittest
+from stock_analyzer.logger import AnalysisLog, current_log, log
+
+class TestAnalysisLog(unittest.TestCase):
+    def test_records_events_and_echoes(self):
+        output = io.StringIO()
+        stdout = sys.stdout
+        with contextlib.redirect_stdout(output):
+            with AnalysisLog('AAA') as analysis_log:
+                self.assertIs(sys.stdout, output)  # 不替换标准输出
+                log("\n标题:")
+                log("读取失败", 'error')
+            log("不在分析中")
+        self.assertIs(sys.stdout, stdout)
+        self.assertEqual(output.getvalue(), "\n标题:\n读取失败\n不在分析中\n")
+        self.assertEqual(analysis_log.text(), "\n标题:\n读取失败\n")
+        self.assertEqual([level for _, level, _ in analysis_log.events], ['info', 'error'])
+        self.assertIsNone(current_log())
+
+    def test_nested_logs_restore_outer(self):
+        with AnalysisLog('AAA', echo=False) as outer:
+            with AnalysisLog('BBB', echo=False) as inner:
+                log("inner")
+            log("outer")
+        self.assertEqual(inner.text(), "inner\n")
+        self.assertEqual(outer.text(), "outer\n")
+
+    def test_threads_are_isolated(self):
+        barrier = threading.Barrier(4)
+        logs = {}
+
+        def analyze(symbol):
+            with AnalysisLog(symbol, echo=False) as analysis_log:
+                for i in range(50):
+                    log(f"{symbol} {i}")
+                    if i % 10 == 0:
+                        barrier.wait()  # 交替输出
+            logs[symbol] = analysis_log
+
+        threads = [threading.Thread(target=analyze, args=(s,)) for s in ('AAA', 'BBB', 'CCC', 'DDD')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for symbol, analysis_log in logs.items():
+            self.assertEqual(analysis_log.text(), ''.join(f"{symbol} {i}\n" for i in range(50)))
+
+    def test_asyncio_tasks_are_isolated(self):
+        async def analyze(symbol):
+            with AnalysisLog(symbol, echo=False) as analysis_log:
+                for i in range(3):
+                    log(f"{symbol} {i}")
+                    await asyncio.sleep(0)
+            return analysis_log
+
+        async def run():
+            return await asyncio.gather(analyze('AAA'), analyze('BBB'))
+
+        for analysis_log in asyncio.run(run()):
+            symbol = analysis_log.symbol
+            self.assertEqual(analysis_log.text(), ''.join(f"{symbol} {i}\n" for i in range(3)))
+
+if __name__ == '__main__':
+    unittest.main()
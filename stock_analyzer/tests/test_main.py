@@ -1,5 +1,49 @@
+import json
+import tempfile
 import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from stock_analyzer.config import REPORT_CONFIG
+from stock_analyzer.logger import AnalysisLog
 from stock_analyzer.main import StockAnalyzer
+from stock_analyzer.score_cache import ScoreCache
+from stock_analyzer.pipeline import STAGES
+
+def make_stock_data(seed=0, n=250):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2024-01-01', periods=n).strftime('%Y-%m-%d')
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    price_data = pd.DataFrame({
+        'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+        'Volume': rng.integers(1e6, 2e6, n).astype(float)
+    }, index=index)
+    financial_data = {
+        'Total Assets': 1000.0, 'Total Liabilities': 400.0, 'Total Equity': 600.0, 'Net Income': 90.0
+    }
+    return {'price_data': price_data, 'financial_data': financial_data, 'fundamentals_period': '2024-09-30'}
+
+class FakeFetcher:
+    def __init__(self, stock_data):
+        self.stock_data = stock_data
+
+    def get_stock_data(self, symbol, start_date, end_date=None):
+        return self.stock_data.get(symbol)
+
+class FakeSentimentAnalyzer:
+    def __init__(self, results=None):
+        self.results = results or {}
+        self.calls = []
+
+    def get_social_sentiment(self, symbol):
+        self.calls.append(symbol)
+        return self.results.get(symbol)
+
+    def analyze_volume_sentiment(self, price_data, sentiment_data):
+        return sentiment_data
+
+    def close(self):
+        pass
 
 class TestStockAnalyzer(unittest.TestCase):
     def setUp(self):
@@ -14,5 +58,113 @@ class TestStockAnalyzer(unittest.TestCase):
         result = self.analyzer.analyze_stock('INVALID')
         self.assertIsNone(result)
 
+class TestAnalysisPipeline(unittest.TestCase):
+    def setUp(self):
+        bad = make_stock_data(1)
+        bad['price_data'] = bad['price_data'].drop(columns=['Volume'])
+        self.analyzer = StockAnalyzer()
+        self.analyzer.data_fetcher = FakeFetcher({'GOOD': make_stock_data(0), 'BAD': bad})
+        self.analyzer.sentiment_analyzer = FakeSentimentAnalyzer()
+        self.analyzer.score_cache = None
+        self.analyzer.regime_service = None
+
+    def test_fail_fast(self):
+        missing = self.analyzer.run_pipeline('MISSING')
+        self.assertEqual(missing.failed_stage, 'fetch')
+        self.assertEqual(list(missing.timings), ['fetch'])
+
+        bad = self.analyzer.run_pipeline('BAD')
+        self.assertEqual(bad.failed_stage, 'validate')
+        self.assertEqual(bad.completed, ['fetch'])
+        self.assertEqual(self.analyzer.sentiment_analyzer.calls, [])
+
+    def test_empty_or_short_history_fails_validation(self):
+        for rows in (0, 5):
+            stock_data = make_stock_data(3)
+            stock_data['price_data'] = stock_data['price_data'].iloc[:rows]
+            self.analyzer.data_fetcher.stock_data['DELIST'] = stock_data
+            context = self.analyzer.run_pipeline('DELIST')
+            self.assertEqual(context.failed_stage, 'validate')
+            self.assertEqual(context.completed, ['fetch'])
+
+    def test_stage_exception_marks_failed_stage(self):
+        with mock.patch.object(self.analyzer, '_stage_compute', side_effect=ValueError('boom')):
+            context = self.analyzer.run_pipeline('GOOD')
+        self.assertEqual(context.failed_stage, 'compute')
+        self.assertEqual(context.error, 'boom')
+        self.assertEqual(context.completed, ['fetch', 'validate'])
+        self.assertIn('compute', context.timings)
+
+    def test_run_prefix(self):
+        context = self.analyzer.run_pipeline('GOOD', until='score')
+        self.assertTrue(context.ok)
+        self.assertEqual(context.completed, list(STAGES[:4]))
+        self.assertIn('final_score', context.factor_analysis)
+        self.assertIsNone(context.report_path)
+        with self.assertRaises(ValueError):
+            self.analyzer.run_pipeline('GOOD', until='publish')
+
+    def test_report_sections_do_not_leak(self):
+        self.analyzer.data_fetcher.stock_data['OTHER'] = make_stock_data(2)
+        self.analyzer.sentiment_analyzer = FakeSentimentAnalyzer({'GOOD': {
+            'status': 'success', 'average_sentiment': 0.8, 'signal': 'BULLISH'
+        }})
+        original_path = REPORT_CONFIG['output_path']
+        with tempfile.TemporaryDirectory() as tmpdir:
+            REPORT_CONFIG['output_path'] = tmpdir
+            try:
+                sections = {}
+                for symbol in ['GOOD', 'OTHER']:
+                    path = self.analyzer.analyze_stock(symbol, report_format='json')
+                    with open(path, encoding='utf-8') as f:
+                        sections[symbol] = {json.loads(line)['section'] for line in f}
+            finally:
+                REPORT_CONFIG['output_path'] = original_path
+        self.assertIn('市场情绪', sections['GOOD'])
+        self.assertNotIn('市场情绪', sections['OTHER'])
+
+    def test_factor_analysis_output_grouped_by_category(self):
+        context = self.analyzer.run_pipeline('GOOD', until='score')
+        with AnalysisLog('GOOD', echo=False) as analysis_log:
+            self.analyzer._print_factor_analysis(context.financial_ratios, context.factor_analysis)
+        text = analysis_log.text()
+        for heading in ('标准化后得分', '技术指标趋势', '风险指标标准化得分'):
+            self.assertIn(heading, text)
+        self.assertIn('roe: ', text)
+        self.assertIn('atr_trend: ', text)
+        self.assertIn('max_drawdown: ', text)
+
+    def test_score_cache_hit_skips_compute_and_rescores_sentiment(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.analyzer.score_cache = ScoreCache(f"{tmpdir}/scores.db")
+            first = self.analyzer.run_pipeline('GOOD', until='score')
+            self.assertIsNone(first.cached_score)
+
+            self.analyzer.sentiment_analyzer = FakeSentimentAnalyzer({'GOOD': {
+                'status': 'success', 'average_sentiment': 0.8, 'signal': 'BULLISH'
+            }})
+            with mock.patch('stock_analyzer.main.RiskMetrics.calculate_var', side_effect=AssertionError), \
+                    mock.patch.object(self.analyzer.factor_model, 'calculate_final_score',
+                                      side_effect=AssertionError):
+                second = self.analyzer.run_pipeline('GOOD', until='score')
+        self.assertTrue(second.ok)
+        self.assertIsNotNone(second.cached_score)
+        self.assertEqual(second.financial_ratios, first.financial_ratios)
+        self.assertAlmostEqual(second.risk_metrics['Sharpe Ratio'], first.risk_metrics['Sharpe Ratio'])
+        self.assertEqual(second.risk_metrics['Sentiment_Signal'], 'BULLISH')
+
+        # 价格和财报类别沿用缓存，情绪得分按最新数据计算
+        before, after = first.factor_analysis, second.factor_analysis
+        for category in ('fundamental', 'technical', 'risk'):
+            self.assertAlmostEqual(after['category_scores'][category], before['category_scores'][category])
+        self.assertEqual(before['category_scores']['sentiment'], 0.0)
+        self.assertGreater(after['category_scores']['sentiment'], 0.0)
+        self.assertIn('social_score', after['factor_scores'])
+        expected = sum(
+            after['category_scores'][c] * after['weights'][c]['weight'] for c in after['category_scores']
+        )
+        self.assertAlmostEqual(after['final_score'], expected)
+        self.assertGreater(after['final_score'], before['final_score'])
+
 if __name__ == '__main__':
-    unittest.main() 
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,188 @@
+import time
+import unittest
+import numpy as np
+import pandas as pd
+from stock_analyzer.models import MultiFactorModel
+from stock_analyzer.factors import FactorRegistry, default_registry
+from stock_analyzer.indicators import TechnicalIndicators
+from stock_analyzer.risk_metrics import RiskMetrics
+
+class TestCrossSectionScoring(unittest.TestCase):
+    def setUp(self):
+        self.model = MultiFactorModel()
+        rng = np.random.default_rng(0)
+        self.symbols = [f'S{i:04d}' for i in range(5000)]
+        self.factors = pd.DataFrame({
+            'roe': rng.normal(0.12, 0.1, 5000),
+            'debt_ratio': rng.uniform(0, 1, 5000),
+            'ma_trend': rng.normal(0, 0.05, 5000),
+            'var': rng.uniform(0.01, 0.08, 5000),
+            'sharpe': rng.normal(0.5, 1, 5000),
+            'max_drawdown': rng.uniform(0, 0.6, 5000),
+            'social_score': rng.uniform(-1, 1, 5000)
+        }, index=self.symbols)
+
+    def test_scores_in_unit_range(self):
+        for method in ('zscore', 'minmax', 'rank'):
+            scores = self.model.normalize_cross_section(self.factors, method)
+            self.assertTrue(((scores >= 0) & (scores <= 1)).all().all(), method)
+
+    def test_inverse_factor_direction(self):
+        scores = self.model.normalize_cross_section(self.factors, 'rank')
+        lowest_debt = self.factors['debt_ratio'].idxmin()
+        self.assertEqual(scores['debt_ratio'].idxmax(), lowest_debt)
+
+    def test_missing_values_are_neutral(self):
+        factors = self.factors.copy()
+        factors.iloc[0, 0] = np.nan
+        scores = self.model.normalize_cross_section(factors, 'zscore')
+        self.assertEqual(scores.iloc[0, 0], 0.5)
+
+    def test_score_universe(self):
+        start = time.perf_counter()
+        result = self.model.score_universe(self.factors)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(result), 5000)
+        self.assertIn('final_score', result.columns)
+        self.assertIn('interpretation', result.columns)
+        self.assertFalse(result['final_score'].isna().any())
+        self.assertLess(elapsed, 1.0)
+
+class TestFactorRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = FactorRegistry()
+        self.calls = []
+
+        @self.registry.register('returns', inputs=('price_data.Close',))
+        def returns(close):
+            self.calls.append('returns')
+            return close.pct_change()
+
+        @self.registry.register('momentum', inputs=('returns',), score_range=(0, 0.1))
+        def momentum(returns):
+            return returns.tail(5).sum()
+
+        @self.registry.register('volatility', inputs=('returns',), score_range=(0, 0.1))
+        def volatility(returns):
+            return returns.std()
+
+        self.all_data = {
+            'price_data': pd.DataFrame({'Close': np.linspace(100, 110, 30)})
+        }
+
+    def test_shared_intermediate_evaluated_once(self):
+        values = self.registry.evaluate(self.all_data, ['momentum', 'volatility'])
+        self.assertEqual(set(values), {'momentum', 'volatility'})
+        self.assertEqual(self.calls, ['returns'])
+
+    def test_missing_input_skips_dependents(self):
+        values = self.registry.evaluate({}, ['momentum'])
+        self.assertEqual(values, {})
+
+    def test_cycle_detection(self):
+        self.registry.register('a', inputs=('b',))(lambda b: b)
+        self.registry.register('b', inputs=('a',))(lambda a: a)
+        with self.assertRaises(ValueError):
+            self.registry.resolve_order(['a'])
+
+    def test_only_weighted_factors_evaluated(self):
+        weights = {
+            'technical': {'weight': 1.0, 'factors': {'momentum': 1.0, 'volatility': 0.0}}
+        }
+        self.assertEqual(self.registry.active_factors(weights), ['momentum'])
+
+        model = MultiFactorModel(registry=self.registry)
+        result = model.calculate_category_scores(self.all_data, weights)
+        self.assertNotIn('volatility', result['values'])
+        self.assertGreater(result['category_scores']['technical'], 0)
+
+class TestFactorScoreTransforms(unittest.TestCase):
+    """注册表中的得分变换与原 calculate_fundamental_score / calculate_risk_score 的公式一致"""
+    def score(self, factor, value):
+        return default_registry.get(factor).score(value)
+
+    def test_roe_uses_zero_to_forty_percent_range(self):
+        # 原实现 normalize_factor(..., 'roe') 的参考范围为 0-40%
+        for roe in (-0.1, 0.0, 0.1, 0.2, 0.4, 0.8):
+            self.assertAlmostEqual(self.score('roe', roe), min(max(roe / 0.4, 0), 1))
+
+    def test_risk_scores_match_original_formulas(self):
+        for var in (-0.25, -0.1, -0.05, -0.01, 0.0):
+            # VaR为负的收益分位数，原实现为 1 - min(|VaR|, 0.1) * 10
+            self.assertAlmostEqual(self.score('var', abs(var)), 1 - min(abs(var), 0.1) * 10)
+        for sharpe in (-3, -1, 0, 0.5, 1, 3):
+            expected = min(max(min(max(sharpe, -2), 2) / 2 + 0.5, 0), 1)
+            self.assertAlmostEqual(self.score('sharpe', sharpe), expected)
+        for max_dd in (0.0, 0.1, 0.5, 0.9):
+            self.assertAlmostEqual(self.score('max_drawdown', max_dd), 1 - min(max_dd, 0.5) * 2)
+        for debt_ratio in (0.0, 0.3, 1.0):
+            self.assertAlmostEqual(self.score('debt_ratio', debt_ratio), 1 - debt_ratio)
+
+class TestScoreHistory(unittest.TestCase):
+    def setUp(self):
+        self.model = MultiFactorModel()
+        rng = np.random.default_rng(1)
+        close = pd.Series(
+            100 * np.exp(np.cumsum(rng.normal(0, 0.02, 200))),
+            index=pd.date_range('2024-01-01', periods=200, freq='B').strftime('%Y-%m-%d')
+        )
+        self.price_data = pd.DataFrame({
+            'Open': close,
+            'High': close * 1.01,
+            'Low': close * 0.99,
+            'Close': close,
+            'Volume': rng.integers(1e6, 2e6, 200).astype(float)
+        })
+
+    def test_last_row_matches_snapshot(self):
+        price_data = self.price_data
+        ma_data = TechnicalIndicators.calculate_ma(price_data['Close'])
+        returns = price_data['Close'].pct_change().dropna()
+        all_data = {
+            'price_data': price_data,
+            'technical_indicators': {'MA5': ma_data['MA5'], 'MA20': ma_data['MA20']},
+            'risk_metrics': {
+                'VaR(95%)': RiskMetrics.calculate_var(returns),
+                'Sharpe Ratio': RiskMetrics.calculate_sharpe_ratio(returns),
+                'Max Drawdown': RiskMetrics.calculate_max_drawdown(price_data['Close'])[0]
+            }
+        }
+        snapshot = self.model.calculate_category_scores(all_data, self.model.weights)['category_scores']
+        history = self.model.calculate_score_history(price_data)
+
+        self.assertEqual(len(history), len(price_data))
+        self.assertAlmostEqual(history['technical'].iloc[-1], snapshot['technical'])
+        self.assertAlmostEqual(history['risk'].iloc[-1], snapshot['risk'])
+        self.assertTrue(history['final_score'].iloc[:19].isna().all())
+
+    def test_rolling_drawdown_ignores_peak_outside_window(self):
+        # 全局峰值100在最后一个窗口之外，窗口内价格持平，回撤应为0
+        prices = pd.Series([100.0, 80.0, 60.0, 50.0, 50.0, 50.0])
+        drawdown = RiskMetrics.calculate_rolling_max_drawdown(prices, window=3, min_periods=2)
+        self.assertTrue(np.isnan(drawdown.iloc[0]))
+        self.assertAlmostEqual(drawdown.iloc[2], 0.4)
+        self.assertAlmostEqual(drawdown.iloc[4], 1 - 50 / 60)
+        self.assertAlmostEqual(drawdown.iloc[-1], 0.0)
+
+    def test_rolling_drawdown_matches_per_window_drawdown(self):
+        close = self.price_data['Close']
+        drawdown = RiskMetrics.calculate_rolling_max_drawdown(close, window=30, min_periods=10)
+        for end in (9, 29, 100, len(close) - 1):
+            window = close.iloc[max(0, end - 29):end + 1]
+            expected = RiskMetrics.calculate_max_drawdown(window)[0]
+            self.assertAlmostEqual(drawdown.iloc[end], abs(expected))
+
+class TestMarketAdjustment(unittest.TestCase):
+    def test_repeated_adjustment_does_not_compound(self):
+        model = MultiFactorModel()
+        close = pd.Series(np.linspace(100, 150, 30))  # 20日涨幅超过牛市阈值
+        price_data = pd.DataFrame({'Close': close})
+        model.adjust_weights_by_market(price_data)
+        first = model.current_weights
+        model.adjust_weights_by_market(price_data)
+        self.assertEqual(model.current_weights, first)
+        self.assertNotEqual(first, model.base_vector.to_dict())
+
+if __name__ == '__main__':
+    unittest.main()
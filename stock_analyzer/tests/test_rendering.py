@@ -0,0 +1,68 @@
+import os
+import pickle
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from stock_analyzer.pipeline import AnalysisContext
+from stock_analyzer.rendering import AnalysisResult, RenderPool, render_result
+
+def make_context(symbol):
+    context = AnalysisContext(symbol, report_format='json')
+    context.stock_data = {'info': {'longBusinessSummary': 'x' * 10000}}
+    context.price_data = pd.DataFrame(
+        {'Close': [1.0, 2.0, 3.0], 'Volume': [10.0, 20.0, 30.0]},
+        index=pd.Index(['2025-01-02', '2025-01-03', '2025-01-06'], name='Date')
+    )
+    context.risk_metrics = {'volatility': 0.2}
+    context.ma_data = {'MA5': context.price_data['Close']}
+    context.rsi_data = context.price_data['Close'] / 10
+    context.bollinger_data = pd.DataFrame({'upper': context.price_data['Close'] + 1, 'lower': context.price_data['Close'] - 1})
+    context.sentiment_data = {'status': 'error'}
+    context.factor_analysis = {'final_score': np.float64(0.42), 'interpretation': '中性'}
+    return context
+
+class TestRendering(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_result_is_compact_and_picklable(self):
+        result = AnalysisResult.from_context(make_context('AAA'), self.tmpdir.name)
+        names = [name for name, _ in result.sections]
+        self.assertNotIn('市场情绪', names)
+        self.assertEqual(names[-1], '多因子分析')
+
+        restored = pickle.loads(pickle.dumps(result))
+        self.assertEqual(restored.output_path, self.tmpdir.name)
+        pd.testing.assert_frame_equal(restored.sections[0][1], result.sections[0][1])
+        self.assertNotIn(b'xxxxxxxx', pickle.dumps(result))
+
+    def test_process_pool_matches_inline(self):
+        inline = render_result(AnalysisResult.from_context(make_context('AAA'), self.tmpdir.name))
+        with RenderPool(workers=2) as pool:
+            futures = [
+                pool.render(AnalysisResult.from_context(make_context(symbol), self.tmpdir.name))
+                for symbol in ('BBB', 'CCC', 'DDD')
+            ]
+            rendered = [future.result() for future in futures]
+
+        self.assertEqual([r['symbol'] for r in rendered], ['BBB', 'CCC', 'DDD'])
+        with open(inline['report_path'], encoding='utf-8') as f:
+            expected = f.read()
+        for r in rendered:
+            self.assertTrue(os.path.exists(r['report_path']))
+            with open(r['report_path'], encoding='utf-8') as f:
+                self.assertEqual(f.read(), expected)
+
+    def test_inline_pool_returns_done_future(self):
+        pool = RenderPool(workers=0)
+        future = pool.render(AnalysisResult.from_context(make_context('AAA'), self.tmpdir.name, charts=True))
+        self.assertTrue(future.done())
+        self.assertIsNotNone(future.result()['report_path'])
+        self.assertEqual(list(future.result()['chart_paths']), ['price'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+import numpy as np
+import pandas as pd
+from stock_analyzer.config import REPORT_CONFIG
+from stock_analyzer.report_generator import ReportGenerator, parquet_available, section_frame
+
+class TestReportGenerator(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original_path = REPORT_CONFIG['output_path']
+        REPORT_CONFIG['output_path'] = self.tmpdir.name
+        self.generator = ReportGenerator()
+        self.prices = pd.DataFrame(
+            {'Close': [1.0, 2.0, 3.0], 'Volume': [10.0, 20.0, 30.0]},
+            index=pd.Index(['2025-01-02', '2025-01-03', '2025-01-06'], name='Date')
+        )
+        self.generator.add_section('价格数据', self.prices)
+        self.generator.add_section('多因子分析', {
+            'final_score': np.float64(0.42),
+            'category_scores': {'technical': 0.5, 'risk': 0.3},
+            'interpretation': '中性'
+        })
+
+    def tearDown(self):
+        REPORT_CONFIG['output_path'] = self.original_path
+        self.tmpdir.cleanup()
+
+    def test_section_frame_flattens_dicts(self):
+        frame = section_frame({'a': 1, 'b': {'c': 2.5, 'd': 'x'}})
+        self.assertEqual(frame['key'].tolist(), ['a', 'b.c', 'b.d'])
+        self.assertEqual(frame['value'].tolist()[:2], [1.0, 2.5])
+        self.assertEqual(frame['text'].tolist()[2], 'x')
+
+    def test_csv(self):
+        path = self.generator.generate_report('TEST', 'csv')
+        prices = pd.read_csv(os.path.join(path, '价格数据.csv'), index_col='Date')
+        pd.testing.assert_frame_equal(prices, self.prices)
+
+    def test_json_lines(self):
+        path = self.generator.generate_report('TEST', 'json')
+        with open(path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 3 + 4)
+        self.assertEqual(records[0]['section'], '价格数据')
+        scores = {r['key']: r['value'] for r in records if r['section'] == '多因子分析'}
+        self.assertAlmostEqual(scores['category_scores.technical'], 0.5)
+
+    def test_streaming_excel_matches_pandas(self):
+        self.generator.add_section('风险指标', {'volatility': 0.2, 'max_drawdown': np.nan})
+        REPORT_CONFIG['excel_streaming'] = False
+        try:
+            expected = pd.read_excel(self.generator.generate_report('PANDAS', 'excel'), sheet_name=None, index_col=0)
+        finally:
+            REPORT_CONFIG['excel_streaming'] = True
+        actual = pd.read_excel(self.generator.generate_report('STREAM', 'excel'), sheet_name=None, index_col=0)
+        self.assertEqual(list(actual), list(expected))
+        for name in expected:
+            pd.testing.assert_frame_equal(actual[name], expected[name])
+
+    def test_streaming_excel_memory_independent_of_length(self):
+        peaks = []
+        for n in (1000, 5000):
+            generator = ReportGenerator()
+            index = pd.Index(pd.bdate_range('2000-01-03', periods=n).strftime('%Y-%m-%d'), name='Date')
+            generator.add_section('价格数据', pd.DataFrame(np.random.rand(n, 5), index=index))
+            tracemalloc.start()
+            generator.generate_report(f'LONG{n}', 'excel')
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        self.assertLess(peaks[1], peaks[0] * 1.5)
+
+    @unittest.skipUnless(parquet_available, '需要pyarrow或fastparquet')
+    def test_parquet(self):
+        path = self.generator.generate_report('TEST', 'parquet')
+        prices = pd.read_parquet(os.path.join(path, '价格数据.parquet')).set_index('Date')
+        pd.testing.assert_frame_equal(prices, self.prices)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import glob
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import pandas as pd
+import run
+from stock_analyzer.config import API_CONFIG, CHART_CONFIG, REPORT_CONFIG
+from stock_analyzer.main import StockAnalyzer
+from stock_analyzer.tests.test_main import FakeFetcher, FakeSentimentAnalyzer, make_stock_data
+
+SYMBOLS = ['AAA', 'BBB', 'CCC', 'DDD']
+
+class OfflineAnalyzer(StockAnalyzer):
+    """使用本地数据的分析器（每个工作线程/进程各自创建）"""
+    created = []
+
+    def __init__(self, render_pool=None, **kwargs):
+        super().__init__(render_pool=render_pool, **kwargs)
+        self.requests_per_hour = self.sentiment_analyzer.config['requests_per_hour']
+        OfflineAnalyzer.created.append(self)
+        self.data_fetcher = FakeFetcher({s: make_stock_data(i) for i, s in enumerate(SYMBOLS)})
+        self.sentiment_analyzer.close()
+        self.sentiment_analyzer = FakeSentimentAnalyzer()
+        self.score_cache = None
+        self.regime_service = None
+
+class TestParallelRun(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original_path = REPORT_CONFIG['output_path']
+        REPORT_CONFIG['output_path'] = self.tmpdir.name
+
+    def tearDown(self):
+        REPORT_CONFIG['output_path'] = self.original_path
+        self.tmpdir.cleanup()
+
+    def run_cli(self, name, *options):
+        summary = os.path.join(self.tmpdir.name, f'{name}.csv')
+        argv = ['run.py', *SYMBOLS, 'MISS', '--format', 'json', '--output', self.tmpdir.name,
+                '--summary', summary, *options]
+        with mock.patch('sys.argv', argv), mock.patch.object(run, 'StockAnalyzer', OfflineAnalyzer), \
+                mock.patch.object(run, '_worker_state', threading.local()):
+            results = run.analyze_stocks(run.parse_args())
+        logs = {}
+        for path in glob.glob(os.path.join(self.tmpdir.name, '*_analysis_log_*.md')):
+            with open(path, encoding='utf-8') as f:
+                logs[os.path.basename(path).split('_')[0]] = f.read()
+            os.remove(path)
+        return results, pd.read_csv(summary), logs
+
+    def test_workers_produce_same_summary(self):
+        results, expected, expected_logs = self.run_cli('sequential')
+        self.assertEqual(sorted(expected_logs), SYMBOLS + ['MISS'])
+        self.assertEqual(results['MISS']['status'], 'failed')
+        self.assertEqual(sorted(s for s, r in results.items() if r['status'] == 'success'), SYMBOLS)
+
+        for worker_type in ('thread', 'process'):
+            parallel_results, summary, logs = self.run_cli(worker_type, '--workers', '3', '--worker-type', worker_type)
+            self.assertEqual(
+                {s: r['status'] for s, r in parallel_results.items()},
+                {s: r['status'] for s, r in results.items()}
+            )
+            pd.testing.assert_frame_equal(
+                summary[['symbol', 'final_score']], expected[['symbol', 'final_score']]
+            )
+            # 每只股票的日志只包含自己的分析输出，与顺序分析一致
+            self.assertEqual(logs, expected_logs)
+
+    def test_thread_workers_do_not_change_global_config(self):
+        charts = CHART_CONFIG['enabled']
+        requests_per_hour = API_CONFIG['stocktwits']['requests_per_hour']
+        OfflineAnalyzer.created.clear()
+        self.run_cli('thread', '--workers', '2', '--worker-type', 'thread', '--charts')
+        self.assertEqual(CHART_CONFIG['enabled'], charts)
+        self.assertEqual(API_CONFIG['stocktwits']['requests_per_hour'], requests_per_hour)
+        # 每个工作线程的分析器通过参数拿到图表开关和分摊后的请求上限
+        self.assertTrue(1 <= len(OfflineAnalyzer.created) <= 2)
+        for analyzer in OfflineAnalyzer.created:
+            self.assertTrue(analyzer.charts)
+            self.assertEqual(analyzer.requests_per_hour, max(requests_per_hour // 2, 1))
+        OfflineAnalyzer.created.clear()
+
+    def test_deferred_render_releases_data(self):
+        argv = ['run.py', 'AAA', '--format', 'json', '--output', self.tmpdir.name]
+        with mock.patch('sys.argv', argv), mock.patch.object(run, 'StockAnalyzer', OfflineAnalyzer), \
+                mock.patch.object(run, '_worker_state', threading.local()):
+            outcome = run.analyze_symbol('AAA', run.parse_args(), wait_render=False)
+            analyzer = run.get_analyzer()
+            self.addCleanup(run.close_analyzers)
+        context = outcome['context']
+        self.assertIsNone(context.stock_data)
+        self.assertIsNone(context.price_data)
+        self.assertIsNotNone(outcome['last_bar_date'])
+        self.assertTrue(os.path.exists(analyzer.collect_render(context)))
+
+    def test_sequential_results_are_yielded_as_they_complete(self):
+        consumed = []
+
+        def symbols():
+            for symbol in SYMBOLS:
+                consumed.append(symbol)
+                yield symbol
+
+        argv = ['run.py', *SYMBOLS, '--format', 'json', '--output', self.tmpdir.name]
+        with mock.patch('sys.argv', argv), mock.patch.object(run, 'StockAnalyzer', OfflineAnalyzer), \
+                mock.patch.object(run, '_worker_state', threading.local()):
+            self.addCleanup(run.close_analyzers)
+            outcomes = run.iter_analyses(symbols(), run.parse_args(), run.RenderPool(0))
+            first = next(outcomes)
+            # 第一只股票的结果在分析下一只之前返回
+            self.assertEqual(consumed, ['AAA'])
+            self.assertEqual(first['symbol'], 'AAA')
+            self.assertNotIn('context', first)
+            self.assertEqual([o['symbol'] for o in outcomes], SYMBOLS[1:])
+
+if __name__ == '__main__':
+    unittest.main()
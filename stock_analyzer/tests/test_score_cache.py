@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from stock_analyzer.config import FACTOR_CONFIG
+from stock_analyzer.score_cache import ScoreCache
+
+class TestScoreCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = ScoreCache(os.path.join(self.tmpdir.name, 'scores.db'))
+        self.price_data = pd.DataFrame(
+            {'Close': [1.0, 2.0]},
+            index=['2025-02-25', '2025-02-26']
+        )
+        self.report = {
+            'final_score': np.float64(0.42),
+            'category_scores': {'technical': 0.5},
+            'interpretation': '中性偏多 (可以考虑)'
+        }
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_roundtrip(self):
+        key = self.cache.make_key('AAPL', self.price_data, '2024-09-30')
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, self.report)
+        cached = self.cache.get(key)
+        self.assertAlmostEqual(cached['final_score'], 0.42)
+        self.assertEqual(cached['interpretation'], self.report['interpretation'])
+
+    def test_new_bar_misses(self):
+        self.cache.put(self.cache.make_key('AAPL', self.price_data), self.report)
+        newer = pd.DataFrame({'Close': [3.0]}, index=['2025-02-27'])
+        self.assertIsNone(self.cache.get(self.cache.make_key('AAPL', newer)))
+
+    def test_history_window_misses(self):
+        self.cache.put(self.cache.make_key('AAPL', self.price_data), self.report)
+        # 最新K线相同但历史窗口不同（--days不同）
+        longer = pd.DataFrame({'Close': [0.5, 1.0, 2.0]}, index=['2025-02-24', '2025-02-25', '2025-02-26'])
+        self.assertIsNone(self.cache.get(self.cache.make_key('AAPL', longer)))
+        self.cache.put(self.cache.make_key('AAPL', longer), {'final_score': 0.1})
+        self.assertAlmostEqual(self.cache.get(self.cache.make_key('AAPL', self.price_data))['final_score'], 0.42)
+        self.assertAlmostEqual(self.cache.get(self.cache.make_key('AAPL', longer))['final_score'], 0.1)
+
+    def test_config_change_invalidates(self):
+        key = self.cache.make_key('AAPL', self.price_data)
+        self.cache.put(key, self.report)
+        original = FACTOR_CONFIG['normalization']['winsorize']
+        FACTOR_CONFIG['normalization']['winsorize'] = 0.1
+        try:
+            self.assertIsNone(self.cache.get(self.cache.make_key('AAPL', self.price_data)))
+        finally:
+            FACTOR_CONFIG['normalization']['winsorize'] = original
+        self.assertIsNotNone(self.cache.get(self.cache.make_key('AAPL', self.price_data)))
+
+if __name__ == '__main__':
+    unittest.main()
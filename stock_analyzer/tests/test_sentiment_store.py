@@ -0,0 +1,147 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+from stock_analyzer.config import CACHE_CONFIG
+from stock_analyzer.sentiment_analyzer import SentimentAnalyzer
+from stock_analyzer.models import MultiFactorModel
+from stock_analyzer.sentiment_store import SentimentStore
+
+def make_message(message_id, hours_ago, sentiment='Bullish'):
+    created_at = datetime.now(timezone.utc) - timedelta(hours=hours_ago)
+    return {
+        'id': message_id,
+        'body': f'message {message_id}',
+        'created_at': created_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'entities': {'sentiment': {'basic': sentiment} if sentiment else None}
+    }
+
+class FakeClient:
+    """按since参数返回更新消息的客户端"""
+    def __init__(self, messages):
+        self.messages = messages
+        self.calls = []
+
+    def fetch_messages(self, symbol, since=None, time_window=None):
+        self.calls.append(since)
+        return [m for m in self.messages if since is None or m['id'] > since]
+
+class TestSentimentStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = SentimentStore(os.path.join(self.tmpdir.name, 'sentiment.db'))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_add_is_idempotent(self):
+        messages = [make_message(i, i) for i in range(1, 6)]
+        self.assertEqual(self.store.add_messages('AAPL', messages), 5)
+        self.assertEqual(self.store.add_messages('AAPL', messages), 0)
+        self.assertEqual(self.store.last_id('AAPL'), 5)
+        self.assertIsNone(self.store.last_id('MSFT'))
+
+    def test_incremental_sync(self):
+        messages = [make_message(i, 100 - i, 'Bullish' if i % 3 else 'Bearish') for i in range(1, 21)]
+        client = FakeClient(messages[:12])
+        analyzer = SentimentAnalyzer(client=client, store=self.store)
+
+        first = analyzer.get_social_sentiment('AAPL')
+        self.assertEqual(first['message_count'], 12)
+        client.messages = messages
+        second = analyzer.get_social_sentiment('AAPL')
+        self.assertEqual(client.calls, [None, 12])
+        self.assertEqual(second['message_count'], 20)
+        # 与一次性汇总全部消息的结果一致
+        expected = analyzer.summarize_messages(messages)
+        self.assertAlmostEqual(second['average_sentiment'], expected['average_sentiment'])
+
+    def test_injected_store_overrides_config(self):
+        with mock.patch.dict(CACHE_CONFIG['sentiment_store'], {'enabled': False}):
+            self.assertIs(SentimentAnalyzer(client=FakeClient([]), store=self.store).store, self.store)
+            self.assertIsNone(SentimentAnalyzer(client=FakeClient([])).store)
+            self.assertIsNone(SentimentAnalyzer(client=FakeClient([]), store=self.store, use_store=False).store)
+
+    def test_window_and_history(self):
+        messages = [make_message(i, 24 * (30 - i) + 1, None if i % 5 == 0 else 'Bullish') for i in range(1, 31)]
+        self.store.add_messages('AAPL', messages)
+        analyzer = SentimentAnalyzer(client=FakeClient([]), store=self.store)
+
+        summary = analyzer.summarize_stored('AAPL', time_window='10d')
+        self.assertEqual(summary['message_count'], 10)
+        self.assertEqual(summary['analyzed_count'], 8)
+
+        history = analyzer.get_sentiment_history('AAPL', time_window='7d')
+        self.assertEqual(history['message_count'].max(), 7)
+        self.assertTrue((history['average_sentiment'].dropna() == 1).all())
+
+class TestSentimentSeries(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        store = SentimentStore(os.path.join(self.tmpdir.name, 'sentiment.db'))
+        self.analyzer = SentimentAnalyzer(client=FakeClient([]), store=store)
+        # 周五、周末和周一的消息（UTC时间，交易所为纽约时区）
+        self.messages = pd.DataFrame({
+            'created_at': pd.to_datetime([
+                '2025-01-03 15:00', '2025-01-03 16:00', '2025-01-04 12:00',
+                '2025-01-06 03:00', '2025-01-06 20:00', '2025-01-09 12:00'
+            ], utc=True),
+            'sentiment': ['Bullish', 'Bullish', 'Bullish', None, 'Bearish', 'Bullish']
+        })
+        self.index = ['2025-01-03', '2025-01-06', '2025-01-07', '2025-01-08']
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_bucketing_and_decay(self):
+        series = self.analyzer.calculate_sentiment_series(self.messages, self.index, halflife='1d')
+        # 周末消息归入周一；最后一个交易日之后的消息丢弃；无标签消息不计
+        self.assertEqual(series['message_count'].tolist(), [2, 2, 0, 0])
+
+        dates = pd.to_datetime(self.index)
+        sums, counts = np.array([2.0, 0.0, 0.0, 0.0]), np.array([2.0, 2.0, 0.0, 0.0])
+        for k in range(len(dates)):
+            decay = 0.5 ** ((dates[k] - dates[:k + 1]).days.to_numpy())
+            expected = (decay * sums[:k + 1]).sum() / (decay * counts[:k + 1]).sum()
+            self.assertAlmostEqual(series['sentiment'].iloc[k], expected)
+
+    def test_score_history_uses_series(self):
+        rng = np.random.default_rng(0)
+        index = pd.date_range('2025-01-01', periods=60, freq='B').strftime('%Y-%m-%d')
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 60)))
+        price_data = pd.DataFrame({
+            'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+            'Volume': rng.integers(1e6, 2e6, 60).astype(float)
+        }, index=index)
+        sentiment = pd.Series(np.linspace(-1, 1, 60), index=index)
+
+        history = MultiFactorModel().calculate_score_history(price_data, sentiment_series=sentiment)
+        self.assertGreater(history['sentiment'].iloc[-1], history['sentiment'].iloc[10])
+
+    def test_stored_series_feeds_score_history(self):
+        index = pd.date_range('2025-01-01', periods=40, freq='B').strftime('%Y-%m-%d')
+        rng = np.random.default_rng(1)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 40)))
+        price_data = pd.DataFrame({
+            'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+            'Volume': rng.integers(1e6, 2e6, 40).astype(float)
+        }, index=index)
+        created_at = pd.to_datetime(index[5:]) + pd.Timedelta(hours=15)
+        self.analyzer.store.add_messages('AAPL', [
+            {'id': i + 1, 'body': 'x', 'created_at': t.strftime('%Y-%m-%dT%H:%M:%SZ'),
+             'entities': {'sentiment': {'basic': 'Bullish' if i > 20 else 'Bearish'}}}
+            for i, t in enumerate(created_at)
+        ])
+
+        series = self.analyzer.get_sentiment_series('AAPL', price_data, halflife='1d')
+        model = MultiFactorModel()
+        history = model.calculate_score_history(price_data, sentiment_series=series)
+        expected = model.calculate_score_history(price_data, sentiment_series=series['sentiment'])
+        pd.testing.assert_frame_equal(history, expected)
+        self.assertGreater(history['sentiment'].iloc[-1], history['sentiment'].iloc[15])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+from stock_analyzer.sentiment_analyzer import SentimentAnalyzer
+from stock_analyzer.sentiment_store import SentimentStore
+from stock_analyzer.stocktwits_client import (
+    HourlyRateLimiter, StockTwitsClient, StockTwitsError, parse_created_at
+)
+from stock_analyzer.stocktwits_stub import StockTwitsStubServer, client_config, generate_messages
+
+class TestStockTwitsClient(unittest.TestCase):
+    def start_server(self, client_options=None, **options):
+        server = StockTwitsStubServer(port=0, latency=0, retry_after=0, seed=0, **options)
+        server.start()
+        self.addCleanup(server.stop)
+        settings = {'backoff': 0.01, 'max_retries': 5, **(client_options or {})}
+        client = StockTwitsClient(client_config(server.base_url, **settings))
+        self.addCleanup(client.close)
+        return server, client
+
+    def test_pagination_covers_time_window(self):
+        server, client = self.start_server(messages_per_symbol=200)
+        messages = client.fetch_messages('AAPL', time_window='7d')
+
+        cutoff = datetime.now(timezone.utc) - timedelta(days=7)
+        expected = [m['id'] for m in server.streams['AAPL'] if parse_created_at(m['created_at']) >= cutoff]
+        self.assertEqual([m['id'] for m in messages], expected)
+        self.assertGreater(server.stats['requests'], 1)
+
+    def test_since_fetches_only_newer(self):
+        server, client = self.start_server()
+        server.set_messages('AAPL', generate_messages('AAPL', 50))
+        messages = client.fetch_messages('AAPL', since=40)
+        self.assertEqual(sorted(m['id'] for m in messages), list(range(41, 51)))
+
+    def test_retries_rate_limits_and_errors(self):
+        server, client = self.start_server(rate_limit_rate=0.2, error_rate=0.2)
+        results = client.fetch_many(['AAPL', 'MSFT', 'GOOG'], time_window='30d')
+        for symbol, messages in results.items():
+            self.assertEqual(len(messages), len(server.streams[symbol]))
+        self.assertGreater(server.stats['rate_limited'] + server.stats['errors'], 0)
+
+    def test_pagination_stops_at_max_pages(self):
+        server, client = self.start_server({'max_pages': 2}, page_size=20)
+        messages = client.fetch_messages('AAPL', time_window='30d')
+        self.assertEqual([m['id'] for m in messages], list(range(200, 161, -1)))  # 第2页包含max边界消息（去重）
+        self.assertEqual(server.stats['requests'], 2)
+
+    def test_sync_backlog_larger_than_max_pages(self):
+        server, client = self.start_server({'max_pages': 2}, page_size=20)
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        store = SentimentStore(os.path.join(tmpdir.name, 'sentiment.db'))
+        analyzer = SentimentAnalyzer(client=client, store=store)
+
+        messages = generate_messages('AAPL', 150, span='1d')
+        server.set_messages('AAPL', messages[-10:])
+        self.assertEqual(analyzer.sync('AAPL'), 10)
+        # 积压的140条消息超过max_pages×page_size，仍需全部同步，不留缺口
+        server.set_messages('AAPL', messages)
+        self.assertEqual(analyzer.sync('AAPL'), 140)
+        self.assertEqual(store.last_id('AAPL'), 150)
+        self.assertEqual(len(store.load('AAPL')), 150)
+
+    def test_backoff_doubles_until_retries_exhausted(self):
+        server, client = self.start_server({'backoff': 0.05, 'max_retries': 2}, error_rate=1.0)
+        start = time.perf_counter()
+        with self.assertRaises(StockTwitsError) as raised:
+            client.fetch_messages('AAPL')
+        self.assertEqual(raised.exception.status_code, 503)
+        self.assertEqual(server.stats['requests'], 3)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05 + 0.1 + 0.2)
+
+    def test_rate_limited_requests_honor_retry_after(self):
+        server, client = self.start_server({'max_retries': 1}, rate_limit_rate=1.0)
+        with mock.patch('stock_analyzer.stocktwits_client.asyncio.sleep', new=mock.AsyncMock()) as sleep:
+            with self.assertRaises(StockTwitsError) as raised:
+                client.fetch_messages('AAPL')
+        self.assertEqual(raised.exception.status_code, 429)
+        self.assertEqual(server.stats['rate_limited'], 2)
+        # Retry-After: 0 优先于退避时间
+        self.assertEqual([c.args[0] for c in sleep.await_args_list], [0.0, 0.0])
+
+    def test_hourly_limit_delays_requests(self):
+        server, client = self.start_server({'requests_per_hour': 2}, page_size=20)
+        server.set_messages('AAPL', generate_messages('AAPL', 50))
+        with mock.patch('stock_analyzer.stocktwits_client.asyncio.sleep', new=mock.AsyncMock()) as sleep:
+            messages = client.fetch_messages('AAPL', time_window='30d')
+        self.assertEqual(len(messages), 50)
+        waits = [c.args[0] for c in sleep.await_args_list]
+        self.assertEqual(len(waits), 1)  # 第3个请求等待一小时窗口
+        self.assertAlmostEqual(waits[0], 3600, delta=5)
+
+    def test_rate_limiter_window(self):
+        limiter = HourlyRateLimiter(2, period=3600)
+        self.assertEqual([limiter.reserve(), limiter.reserve()], [0.0, 0.0])
+        self.assertAlmostEqual(limiter.reserve(), 3600, delta=1)
+        self.assertAlmostEqual(limiter.reserve(), 3600, delta=1)
+        self.assertAlmostEqual(limiter.reserve(), 7200, delta=1)
+
+    def test_sync_api_inside_event_loop_raises(self):
+        server, client = self.start_server()
+
+        async def call_sync():
+            client.fetch_messages('AAPL')
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(call_sync())
+        self.assertEqual(server.stats['requests'], 0)
+
+    def test_analyzer_closes_only_own_client(self):
+        server, client = self.start_server()
+        with SentimentAnalyzer(client=client, use_store=False):
+            pass
+        self.assertEqual(client.fetch_messages('AAPL', since=199), [server.streams['AAPL'][0]])
+
+        with SentimentAnalyzer(use_store=False) as analyzer:
+            own_client = analyzer.client
+        with self.assertRaises(RuntimeError):
+            own_client._executor.submit(print)
+
+    def test_analyzer_against_stub(self):
+        server, client = self.start_server()
+        analyzer = SentimentAnalyzer(client=client, use_store=False)
+        self.assertEqual(analyzer.get_social_sentiment('AAPL')['status'], 'success')
+
+        server.error_rate = 1.0
+        self.assertIsNone(analyzer.get_social_sentiment('MSFT'))
+
+if __name__ == '__main__':
+    unittest.main()
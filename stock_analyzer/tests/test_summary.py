@@ -0,0 +1,50 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+import pandas as pd
+from stock_analyzer.summary import SummaryWriter
+
+def make_analysis(score):
+    return {
+        'final_score': score,
+        'category_scores': {'fundamental': 0.5, 'technical': score, 'risk': 0.4, 'sentiment': 0.0},
+        'raw_values': {'roe': 12.0, 'sharpe': 0.8},
+        'interpretation': '中性'
+    }
+
+class TestSummaryWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, filename):
+        path = os.path.join(self.tmpdir.name, filename)
+        writer = SummaryWriter(path, batch_size=2)
+        for i, score in enumerate([0.3, 0.7, 0.5]):
+            writer.append(f'S{i}', make_analysis(score), '2025-01-02')
+        # 达到batch_size的行已写入
+        self.assertEqual(len(writer.buffer), 1)
+        writer.append('S0', make_analysis(0.9), '2025-01-02')
+        return writer, writer.finalize()
+
+    def test_csv_streaming_and_ranking(self):
+        writer, ranking = self.write('summary.csv')
+        self.assertEqual(ranking['symbol'].tolist(), ['S0', 'S1', 'S2'])
+        self.assertEqual(ranking['rank'].tolist(), [1, 2, 3])
+        stored = pd.read_csv(writer.path)
+        self.assertEqual(stored['symbol'].tolist(), ['S0', 'S1', 'S2'])
+        self.assertAlmostEqual(stored.loc[0, 'technical'], 0.9)
+        self.assertAlmostEqual(stored.loc[0, 'roe'], 12.0)
+
+    def test_sqlite(self):
+        writer, ranking = self.write('summary.db')
+        self.assertEqual(ranking['final_score'].tolist(), [0.9, 0.7, 0.5])
+        with sqlite3.connect(writer.path) as conn:
+            rows = conn.execute("SELECT symbol FROM summary ORDER BY final_score DESC").fetchall()
+        self.assertEqual([r[0] for r in rows], ['S0', 'S1', 'S2'])
+
+if __name__ == '__main__':
+    unittest.main()
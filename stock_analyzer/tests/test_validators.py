@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+import pandas as pd
+from stock_analyzer.validators import DataValidator
+
+def make_price_data(seed, n=200):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2024-01-01', periods=n).strftime('%Y-%m-%d')
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    close[rng.integers(1, n, 3)] *= 1.5
+    volume = rng.integers(1e6, 2e6, n).astype(float)
+    volume[rng.integers(1, n, 2)] *= 20
+    return pd.DataFrame({
+        'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': volume
+    }, index=index)
+
+class TestDataValidator(unittest.TestCase):
+    def setUp(self):
+        self.validator = DataValidator()
+
+    def test_masks_match_pct_change(self):
+        price_data = make_price_data(0)
+        result = self.validator.validate_price_data(price_data)
+        self.assertTrue(result['valid'])
+
+        expected_returns = (price_data['Close'].pct_change().abs() > 0.2).to_numpy()
+        expected_volumes = (price_data['Volume'].pct_change().abs() > 10).to_numpy()
+        np.testing.assert_array_equal(result['masks']['abnormal_return'], expected_returns)
+        np.testing.assert_array_equal(result['masks']['abnormal_volume'], expected_volumes)
+        self.assertEqual(result['counts']['abnormal_return'], expected_returns.sum())
+
+        issue = next(w for w in result['warnings'] if w.code == 'abnormal_return')
+        first = np.flatnonzero(expected_returns)[0]
+        self.assertIn(price_data.index[first], str(issue))
+
+    def test_date_gap_and_missing_columns(self):
+        price_data = make_price_data(1, n=30).drop(index=make_price_data(1, n=30).index[5:12])
+        result = self.validator.validate_price_data(price_data)
+        self.assertEqual(result['counts']['date_gap'], 1)
+        self.assertFalse(self.validator.validate_price_data(price_data[['Close']])['valid'])
+
+    def test_empty_or_short_history_is_invalid(self):
+        for rows in (0, 19):
+            result = self.validator.validate_price_data(make_price_data(2, n=30).iloc[:rows])
+            self.assertFalse(result['valid'])
+        self.assertTrue(self.validator.validate_price_data(make_price_data(2, n=20))['valid'])
+
+    def test_panel_matches_single(self):
+        panel = {f'S{seed}': make_price_data(seed) for seed in range(4)}
+        close = pd.DataFrame({s: p['Close'] for s, p in panel.items()})
+        volume = pd.DataFrame({s: p['Volume'] for s, p in panel.items()})
+        result = self.validator.validate_price_panel(close, volume)
+
+        for i, (symbol, price_data) in enumerate(panel.items()):
+            single = self.validator.validate_price_data(price_data)
+            np.testing.assert_array_equal(result['masks']['abnormal_return'][:, i], single['masks']['abnormal_return'])
+            self.assertEqual(result['counts'].loc[symbol, 'abnormal_volume'], single['counts']['abnormal_volume'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import copy
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from stock_analyzer.config import CACHE_CONFIG, FACTOR_CONFIG
+from stock_analyzer.market_regime import MarketRegimeService
+from stock_analyzer.weight_adjuster import STATE_FIELDS, WeightAdjuster
+from stock_analyzer.weights import CompiledWeights
+
+def make_price_data(seed, drift=0.0, n=120):
+    rng = np.random.default_rng(seed)
+    close = pd.Series(100 * np.exp(np.cumsum(rng.normal(drift, 0.03, n))))
+    volume = pd.Series(rng.integers(1e6, 3e6, n).astype(float))
+    return pd.DataFrame({'Close': close, 'Volume': volume})
+
+class TestCompiledWeights(unittest.TestCase):
+    def test_roundtrip_and_immutability(self):
+        weights = CompiledWeights.from_config(FACTOR_CONFIG['weights'])
+        self.assertEqual(weights.to_dict(), FACTOR_CONFIG['weights'])
+        with self.assertRaises(ValueError):
+            weights.category_weights[0] = 1.0
+        with self.assertRaises(AttributeError):
+            weights.categories = ()
+
+    def test_scale_returns_new_vector(self):
+        weights = CompiledWeights.from_config(FACTOR_CONFIG['weights'])
+        scaled = weights.scale({'risk': 2.0}).normalized()
+        self.assertIsNot(scaled, weights)
+        self.assertAlmostEqual(scaled.category_weights.sum(), 1.0)
+        self.assertAlmostEqual(weights.weight('risk'), 0.2)
+
+class TestWeightAdjuster(unittest.TestCase):
+    def test_adjustment_is_order_independent(self):
+        original = copy.deepcopy(FACTOR_CONFIG['weights'])
+        adjuster = WeightAdjuster()
+        bull = make_price_data(0, drift=0.02)
+        first = adjuster.get_adjusted_weights(bull)
+        for seed in range(1, 5):
+            adjuster.get_adjusted_weights(make_price_data(seed, drift=-0.02))
+        self.assertEqual(adjuster.get_adjusted_weights(bull), first)
+        self.assertEqual(FACTOR_CONFIG['weights'], original)
+
+    def test_batch_matches_single_symbol(self):
+        adjuster = WeightAdjuster()
+        panel = {
+            f'S{seed}': make_price_data(seed, drift=drift)
+            for seed, drift in enumerate([0.02, -0.02, 0.0, 0.01, -0.01])
+        }
+        closes = pd.DataFrame({s: p['Close'] for s, p in panel.items()})
+        volumes = pd.DataFrame({s: p['Volume'] for s, p in panel.items()})
+
+        batch = adjuster.get_adjusted_weights_batch(closes, volumes)
+        self.assertEqual(list(batch.index), list(panel))
+        for symbol, price_data in panel.items():
+            single = adjuster.get_adjusted_vector(price_data)
+            np.testing.assert_allclose(batch.loc[symbol].to_numpy(), single.category_weights)
+
+    def test_batch_incomplete_history_uses_base_weights(self):
+        adjuster = WeightAdjuster()
+        panel = {'FULL': make_price_data(0, drift=0.02), 'SHORT': make_price_data(1, drift=0.02, n=10),
+                 'GAP': make_price_data(2, drift=-0.02)}
+        panel['GAP'].loc[115, 'Close'] = np.nan  # 最近窗口内缺失
+        panel['GAP'].loc[119, 'Volume'] = 1.0  # 成交量指标仍有效（缩量）
+        closes = pd.DataFrame({s: p['Close'] for s, p in panel.items()})
+        volumes = pd.DataFrame({s: p['Volume'] for s, p in panel.items()})
+
+        batch = adjuster.get_adjusted_weights_batch(closes, volumes)
+        for symbol in ('SHORT', 'GAP'):
+            np.testing.assert_allclose(batch.loc[symbol].to_numpy(), adjuster.base_vector.category_weights)
+        np.testing.assert_allclose(
+            adjuster.get_adjusted_vector(panel['SHORT']).category_weights, adjuster.base_vector.category_weights
+        )
+        np.testing.assert_allclose(
+            batch.loc['FULL'].to_numpy(), adjuster.get_adjusted_vector(panel['FULL']).category_weights
+        )
+
+    def test_series_matches_single_and_uses_configured_windows(self):
+        adjuster = WeightAdjuster()
+        price_data = make_price_data(3, drift=0.01)
+        for windows in ({}, {'trend_short_window': 10, 'trend_long_window': 40}):
+            with mock.patch.dict(FACTOR_CONFIG['market_state'], windows):
+                series = adjuster.analyze_market_state_series(price_data).iloc[-1]
+                single = adjuster.analyze_market_state(price_data)
+                close = price_data['Close']
+                short_window, long_window = adjuster._trend_windows()
+                expected = close.iloc[-short_window:].mean() / close.iloc[-long_window:].mean() - 1
+            self.assertAlmostEqual(single['trend_strength'], expected)
+            for key in ('trend_strength', 'volatility', 'volume_trend', 'market_type'):
+                self.assertEqual(series[key], single[key])
+
+class CountingFetcher:
+    def __init__(self, price_data):
+        self.price_data = price_data
+        self.calls = 0
+
+    def get_stock_data(self, symbol, start_date, end_date=None):
+        self.calls += 1
+        return {'price_data': self.price_data}
+
+class TestMarketRegimeService(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_config = mock.patch.dict(
+            CACHE_CONFIG['regime_cache'], {'enabled': True, 'path': self.tmpdir.name}
+        )
+        self.cache_config.start()
+        MarketRegimeService._regime_cache.clear()
+        self.price_data = make_price_data(7, drift=0.01)
+        self.price_data.index = pd.bdate_range('2024-01-01', periods=len(self.price_data)).strftime('%Y-%m-%d')
+
+    def tearDown(self):
+        MarketRegimeService._regime_cache.clear()
+        self.cache_config.stop()
+        self.tmpdir.cleanup()
+
+    def test_daily_cache_hit_and_miss(self):
+        fetcher = CountingFetcher(self.price_data)
+        service = MarketRegimeService('SPY', data_fetcher=fetcher)
+        regime = service.get_regime_series()
+        service.get_regime_series()
+        self.assertEqual(fetcher.calls, 1)  # 进程内缓存命中
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 1)
+
+        # 新进程：从磁盘缓存读取，不再请求
+        MarketRegimeService._regime_cache.clear()
+        pd.testing.assert_frame_equal(MarketRegimeService('SPY', data_fetcher=fetcher).get_regime_series(), regime)
+        self.assertEqual(fetcher.calls, 1)
+
+        # 其他基准指数未命中
+        MarketRegimeService('QQQ', data_fetcher=fetcher).get_regime_series()
+        self.assertEqual(fetcher.calls, 2)
+
+    def test_matches_per_stock_adjustment(self):
+        service = MarketRegimeService('SPY', data_fetcher=CountingFetcher(self.price_data))
+        adjuster = WeightAdjuster()
+        np.testing.assert_allclose(
+            service.get_adjusted_vector().category_weights,
+            adjuster.get_adjusted_vector(self.price_data).category_weights
+        )
+        # 指定日期时与截至该日的个股行情一致，同一交易日的权重只计算一次
+        date = self.price_data.index[80]
+        weights = service.get_adjusted_vector(date)
+        self.assertIs(service.get_adjusted_vector(date), weights)
+        np.testing.assert_allclose(
+            weights.category_weights,
+            adjuster.get_adjusted_vector(self.price_data.loc[:date]).category_weights
+        )
+
+    def test_market_state_skips_incomplete_rows(self):
+        price_data = self.price_data.copy()
+        price_data.loc[price_data.index[-1], 'Volume'] = np.nan
+        service = MarketRegimeService('SPY', data_fetcher=CountingFetcher(price_data))
+        state = service.get_market_state()
+        # 最新交易日成交量缺失，取最近一个所有状态字段都完整的交易日
+        self.assertEqual(state['date'], price_data.index[-2])
+        for field in STATE_FIELDS:
+            self.assertFalse(np.isnan(state[field]), field)
+
+if __name__ == '__main__':
+    unittest.main()
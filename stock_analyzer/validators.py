@@ -2,6 +2,46 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+class ValidationIssue:
+    """
+    验证发现的一类异常
+    只保存布尔掩码对应的位置和数值，文字描述在打印时才生成（最多列出limit处）。
+    """
+    __slots__ = ('code', 'label', 'rows', 'columns', 'values', 'index', 'column_labels', 'value_format')
+
+    def __init__(self, code, label, rows, values, index, columns=None, column_labels=None,
+                 value_format='{:+.2%}'):
+        self.code = code
+        self.label = label
+        self.rows = rows
+        self.columns = columns
+        self.values = values
+        self.index = index
+        self.column_labels = column_labels
+        self.value_format = value_format
+
+    @property
+    def count(self):
+        return len(self.rows)
+
+    def format(self, limit=5):
+        """生成文字描述"""
+        items = []
+        for i in range(min(limit, self.count)):
+            location = str(self.index[self.rows[i]])
+            if self.columns is not None:
+                location = f"{self.column_labels[self.columns[i]]}@{location}"
+            items.append(f"{location} {self.value_format.format(self.values[i])}")
+        more = f" 等{self.count}处" if self.count > limit else f" 共{self.count}处"
+        return f"{self.label}: {', '.join(items)}{more}"
+
+    def __str__(self):
+        return self.format()
+
+    def __repr__(self):
+        return self.format()
+
+
 class DataValidator:
     def __init__(self):
         # 定义异常检测阈值
@@ -20,6 +60,12 @@ class DataValidator:
             'volume': {
                 'min_volume': 1000,       # 最小成交量
                 'max_volume_change': 10   # 最大成交量变化倍数
+            },
+            'date': {
+                'max_gap_days': 5         # 最大日期间隔（天）
+            },
+            'history': {
+                'min_rows': 20            # 最少K线数（不足时无法计算均线、回撤等指标，如退市股票）
             }
         }
         
@@ -29,13 +75,13 @@ class DataValidator:
         params:
             price_data: pd.DataFrame - 包含OHLCV的DataFrame
         returns:
-            dict - 验证结果和异常信息
+            dict - valid、errors、warnings（ValidationIssue，打印时才格式化），
+                   masks（各类异常的布尔掩码）和counts（各类异常数量）
         """
         if not isinstance(price_data, pd.DataFrame):
             return {'valid': False, 'errors': ['价格数据格式错误']}
             
         errors = []
-        warnings = []
         
         # 检查必要的列
         required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
@@ -43,30 +89,93 @@ class DataValidator:
         if missing_columns:
             errors.append(f'缺少必要的列: {missing_columns}')
             return {'valid': False, 'errors': errors}
-            
-        # 检查数据连续性
-        date_index = pd.DatetimeIndex(price_data.index)
-        date_gaps = date_index[1:] - date_index[:-1]
-        large_gaps = date_gaps[date_gaps > timedelta(days=5)]
-        if not large_gaps.empty:
-            warnings.append(f'发现数据缺失: {large_gaps}')
-            
-        # 检查价格异常
-        daily_returns = price_data['Close'].pct_change()
-        abnormal_returns = daily_returns[abs(daily_returns) > self.thresholds['price']['max_daily_change']]
-        if not abnormal_returns.empty:
-            warnings.append(f'发现异常价格变动: {abnormal_returns}')
-            
-        # 检查成交量异常
-        volume_change = price_data['Volume'].pct_change()
-        abnormal_volumes = volume_change[abs(volume_change) > self.thresholds['volume']['max_volume_change']]
-        if not abnormal_volumes.empty:
-            warnings.append(f'发现异常成交量: {abnormal_volumes}')
-            
+        
+        # 检查数据长度（空数据或历史过短）
+        min_rows = self.thresholds['history']['min_rows']
+        if len(price_data) < min_rows:
+            errors.append(f'价格数据不足: {len(price_data)}条，至少需要{min_rows}条')
+            return {'valid': False, 'errors': errors}
+        
+        result = self.validate_price_panel(
+            price_data[['Close']], price_data[['Volume']]
+        )
+        # 单只股票的掩码和位置降为一维
+        for issue in result['warnings']:
+            issue.columns = None
+        result['masks'] = {
+            name: mask[:, 0] if mask.ndim == 2 else mask
+            for name, mask in result['masks'].items()
+        }
+        result['counts'] = {name: int(mask.sum()) for name, mask in result['masks'].items()}
+        return result
+    
+    def validate_price_panel(self, close, volume=None):
+        """
+        一次性验证多只股票的价格数据（向量化）
+        params:
+            close: pd.DataFrame - 收盘价矩阵，行为交易日、列为股票代码
+            volume: pd.DataFrame - 成交量矩阵，与close形状一致
+        returns:
+            dict - valid、errors、warnings（ValidationIssue）、masks（交易日×股票的布尔掩码，
+                   date_gap为一维）和counts（股票×异常类型的数量）
+        """
+        if not isinstance(close, pd.DataFrame):
+            return {'valid': False, 'errors': ['价格数据格式错误']}
+        
+        index = close.index
+        symbols = close.columns
+        frames = [close] if volume is None else [close, volume]
+        values = np.hstack([f.to_numpy(dtype=float) for f in frames])
+        
+        # 收盘价和成交量的变化率在同一次计算中得到
+        change = np.full_like(values, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change[1:] = values[1:] / values[:-1] - 1
+        abs_change = np.abs(change)
+        n = len(symbols)
+        thresholds = np.repeat(
+            [self.thresholds['price']['max_daily_change'], self.thresholds['volume']['max_volume_change']][:len(frames)],
+            n
+        )
+        abnormal = abs_change > thresholds
+        
+        masks = {'abnormal_return': abnormal[:, :n]}
+        if volume is not None:
+            masks['abnormal_volume'] = abnormal[:, n:]
+        
+        # 检查数据连续性（所有股票共享交易日索引）
+        dates = pd.DatetimeIndex(index).values.astype('datetime64[ns]').astype(np.int64)
+        gaps = np.zeros(len(dates))
+        gaps[1:] = np.diff(dates) / (24 * 3600 * 1e9)
+        masks['date_gap'] = gaps > self.thresholds['date']['max_gap_days']
+        
+        warnings = []
+        gap_rows = np.flatnonzero(masks['date_gap'])
+        if len(gap_rows):
+            warnings.append(ValidationIssue(
+                'date_gap', '发现数据缺失', gap_rows, gaps[gap_rows], index, value_format='间隔{:.0f}天'
+            ))
+        labels = {'abnormal_return': '发现异常价格变动', 'abnormal_volume': '发现异常成交量'}
+        for name, label in labels.items():
+            if name not in masks:
+                continue
+            rows, columns = np.nonzero(masks[name])
+            if len(rows):
+                offset = n if name == 'abnormal_volume' else 0
+                warnings.append(ValidationIssue(
+                    name, label, rows, change[rows, columns + offset], index, columns, symbols
+                ))
+        
+        counts = pd.DataFrame(
+            {name: mask.sum(axis=0) for name, mask in masks.items() if mask.ndim == 2},
+            index=symbols
+        )
         return {
-            'valid': len(errors) == 0,
-            'errors': errors,
-            'warnings': warnings
+            'valid': True,
+            'errors': [],
+            'warnings': warnings,
+            'masks': masks,
+            'counts': counts
         }
         
     def validate_financial_data(self, financial_data):
@@ -2,13 +2,47 @@ import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from .config import FACTOR_CONFIG
+from .logger import log
+from .weights import CompiledWeights
+
+# 各市场状态下的类别权重调整系数
+MARKET_WEIGHT_MULTIPLIERS = {
+    # 稳定牛市：增加技术面和情绪面权重
+    'STEADY_BULL': {'technical': 1.2, 'sentiment': 1.2, 'fundamental': 0.8},
+    # 波动牛市：增加风险控制权重
+    'VOLATILE_BULL': {'risk': 1.3, 'technical': 1.1},
+    # 稳定熊市：增加基本面权重
+    'STEADY_BEAR': {'fundamental': 1.3, 'risk': 1.2, 'technical': 0.7},
+    # 波动熊市：大幅增加风险控制权重
+    'VOLATILE_BEAR': {'risk': 1.5, 'fundamental': 1.2, 'technical': 0.6},
+}
+
+# 波动率调整：高波动增加风险控制权重，低波动增加技术面权重
+HIGH_VOLATILITY = 0.4
+LOW_VOLATILITY = 0.1
+VOLATILITY_WEIGHT_MULTIPLIERS = {
+    'high': {'risk': 1.3, 'technical': 0.8},
+    'low': {'technical': 1.2, 'risk': 0.8},
+}
+
+# 成交量调整：放量增加技术面和情绪面权重，缩量增加基本面权重
+EXPANDING_VOLUME = 0.5
+SHRINKING_VOLUME = -0.5
+VOLUME_WEIGHT_MULTIPLIERS = {
+    'expanding': {'technical': 1.2, 'sentiment': 1.1},
+    'shrinking': {'fundamental': 1.2, 'technical': 0.9},
+}
+
+# 判断市场状态所需的指标，任一缺失时不调整权重
+STATE_FIELDS = ('trend_strength', 'volatility', 'volume_trend')
 
 class WeightAdjuster:
     def __init__(self):
         self.config = FACTOR_CONFIG
         self.base_weights = self.config['weights']
+        self.base_vector = CompiledWeights.from_config(self.base_weights)
         
-    def analyze_market_state(self, price_data, window=20):
+    def analyze_market_state(self, price_data, window=None):
         """
         分析市场状态
         params:
@@ -18,12 +52,16 @@ class WeightAdjuster:
             dict - 市场状态分析结果
         """
         try:
+            if window is None:
+                window = self.config['market_state']['window']
+            
             # 计算收益率
             returns = price_data['Close'].pct_change()
             
             # 计算趋势强度
-            ma_short = price_data['Close'].rolling(window=5).mean()
-            ma_long = price_data['Close'].rolling(window=20).mean()
+            short_window, long_window = self._trend_windows()
+            ma_short = price_data['Close'].rolling(window=short_window).mean()
+            ma_long = price_data['Close'].rolling(window=long_window).mean()
             trend_strength = (ma_short.iloc[-1] / ma_long.iloc[-1] - 1)
             
             # 计算波动率
@@ -42,104 +80,220 @@ class WeightAdjuster:
             }
             
         except Exception as e:
-            print(f"市场状态分析错误: {str(e)}")
+            log(f"市场状态分析错误: {str(e)}", 'error')
             return None
     
+    def _trend_windows(self):
+        """趋势强度的短期、长期均线窗口"""
+        market_config = self.config['market_state']
+        return market_config['trend_short_window'], market_config['trend_long_window']
+    
+    def analyze_market_state_series(self, price_data, window=None):
+        """
+        向量化计算每个交易日的市场状态
+        params:
+            price_data: pd.DataFrame - 价格数据
+            window: int - 分析窗口（默认取配置）
+        returns:
+            pd.DataFrame - 每个交易日的趋势强度、波动率、成交量趋势和市场状态
+        """
+        if window is None:
+            window = self.config['market_state']['window']
+        
+        close = price_data['Close']
+        returns = close.pct_change()
+        short_window, long_window = self._trend_windows()
+        trend_strength = close.rolling(window=short_window).mean() / close.rolling(window=long_window).mean() - 1
+        volatility = returns.rolling(window=window).std() * np.sqrt(252)
+        volume = price_data['Volume']
+        volume_trend = volume / volume.rolling(window=window).mean() - 1
+        
+        return pd.DataFrame({
+            'trend_strength': trend_strength,
+            'volatility': volatility,
+            'volume_trend': volume_trend,
+            'market_type': self.classify_market_series(trend_strength, volatility)
+        }, index=price_data.index)
+    
+    def analyze_market_state_batch(self, closes, volumes, window=None):
+        """
+        向量化计算一组股票最新交易日的市场状态
+        params:
+            closes: pd.DataFrame - 行为交易日、列为股票代码的收盘价
+            volumes: pd.DataFrame - 与closes对齐的成交量
+            window: int - 分析窗口（默认取配置）
+        returns:
+            pd.DataFrame - 行为股票代码的趋势强度、波动率、成交量趋势和市场状态
+        """
+        if window is None:
+            window = self.config['market_state']['window']
+        
+        # 只需最近的窗口数据（多取一行用于计算收益率）；窗口内有缺失值时结果为NaN，与rolling一致
+        short_window, long_window = self._trend_windows()
+        close_values = closes.to_numpy(dtype=float)
+        volume_values = volumes.to_numpy(dtype=float)
+        if len(close_values) < max(window + 1, long_window):
+            nan = np.full(close_values.shape[1], np.nan)
+            trend_strength, volatility, volume_trend = nan, nan, nan
+        else:
+            trend_strength = close_values[-short_window:].mean(axis=0) / close_values[-long_window:].mean(axis=0) - 1
+            recent = close_values[-(window + 1):]
+            returns = recent[1:] / recent[:-1] - 1
+            volatility = returns.std(axis=0, ddof=1) * np.sqrt(252)
+            volume_trend = volume_values[-1] / volume_values[-window:].mean(axis=0) - 1
+        
+        return pd.DataFrame({
+            'trend_strength': trend_strength,
+            'volatility': volatility,
+            'volume_trend': volume_trend,
+            'market_type': self.classify_market_series(trend_strength, volatility)
+        }, index=closes.columns)
+    
+    def get_adjusted_weights_batch(self, closes, volumes, window=None):
+        """
+        批量获取一组股票的综合调整权重
+        params:
+            closes: pd.DataFrame - 行为交易日、列为股票代码的收盘价
+            volumes: pd.DataFrame - 与closes对齐的成交量
+            window: int - 分析窗口（默认取配置）
+        returns:
+            pd.DataFrame - 股票代码×类别的权重矩阵（每行归一化）
+        """
+        state = self.analyze_market_state_batch(closes, volumes, window)
+        base = self.base_vector
+        
+        # 市场状态系数：按状态查表得到 股票数×类别数 的系数矩阵
+        market_types = list(MARKET_WEIGHT_MULTIPLIERS)
+        market_table = np.vstack(
+            [base.multiplier_vector(MARKET_WEIGHT_MULTIPLIERS[t]) for t in market_types] +
+            [np.ones(len(base.categories))]  # 震荡市不调整
+        )
+        type_index = pd.Index(market_types).get_indexer(state['market_type'])
+        multipliers = market_table[type_index]  # -1（未列出的状态）对应最后一行
+        
+        # 波动率系数
+        volatility = state['volatility'].to_numpy()[:, None]
+        multipliers = multipliers * np.where(
+            volatility > HIGH_VOLATILITY,
+            base.multiplier_vector(VOLATILITY_WEIGHT_MULTIPLIERS['high']),
+            np.where(volatility < LOW_VOLATILITY, base.multiplier_vector(VOLATILITY_WEIGHT_MULTIPLIERS['low']), 1.0)
+        )
+        
+        # 成交量系数
+        volume_trend = state['volume_trend'].to_numpy()[:, None]
+        multipliers = multipliers * np.where(
+            volume_trend > EXPANDING_VOLUME,
+            base.multiplier_vector(VOLUME_WEIGHT_MULTIPLIERS['expanding']),
+            np.where(volume_trend < SHRINKING_VOLUME, base.multiplier_vector(VOLUME_WEIGHT_MULTIPLIERS['shrinking']), 1.0)
+        )
+        
+        # 各步骤都是按类别缩放，最后统一归一化与逐步归一化结果一致
+        weights = base.category_weights * multipliers
+        weights = weights / weights.sum(axis=1, keepdims=True)
+        
+        # 历史不足或窗口内有缺失值的股票无法判断市场状态，使用基础权重（与单只股票的路径一致）
+        incomplete = state[list(STATE_FIELDS)].isna().any(axis=1).to_numpy()
+        weights[incomplete] = base.category_weights
+        return pd.DataFrame(weights, index=state.index, columns=base.categories)
+    
+    def classify_market_series(self, trend_strength, volatility):
+        """
+        向量化分类市场状态（与_classify_market规则一致）
+        params:
+            trend_strength: array-like - 趋势强度
+            volatility: array-like - 年化波动率
+        returns:
+            np.ndarray - 市场状态
+        """
+        thresholds = self.config['market_state']
+        trend_strength = np.asarray(trend_strength, dtype=float)
+        volatile = np.asarray(volatility, dtype=float) > thresholds['volatility_threshold']
+        bull = trend_strength > thresholds['bull_threshold']
+        bear = trend_strength < thresholds['bear_threshold']
+        return np.select(
+            [bull & volatile, bull, bear & volatile, bear, volatile],
+            ['VOLATILE_BULL', 'STEADY_BULL', 'VOLATILE_BEAR', 'STEADY_BEAR', 'VOLATILE_SIDEWAYS'],
+            default='STEADY_SIDEWAYS'
+        )
+    
     def _classify_market(self, trend_strength, volatility):
         """
         根据趋势强度和波动率分类市场状态
         """
+        volatile = volatility > self.config['market_state']['volatility_threshold']
         if trend_strength > self.config['market_state']['bull_threshold']:
-            if volatility > 0.3:
+            if volatile:
                 return 'VOLATILE_BULL'
             return 'STEADY_BULL'
         elif trend_strength < self.config['market_state']['bear_threshold']:
-            if volatility > 0.3:
+            if volatile:
                 return 'VOLATILE_BEAR'
             return 'STEADY_BEAR'
         else:
-            if volatility > 0.3:
+            if volatile:
                 return 'VOLATILE_SIDEWAYS'
             return 'STEADY_SIDEWAYS'
     
-    def adjust_weights_by_market(self, market_state):
+    def adjust_weights_by_market(self, market_state, weights=None):
         """
         根据市场状态调整权重
+        params:
+            market_state: dict - 市场状态分析结果
+            weights: CompiledWeights - 待调整的权重，默认使用基础权重
+        returns:
+            CompiledWeights - 调整并归一化后的新权重
         """
-        adjusted_weights = self.base_weights.copy()
-        
-        market_type = market_state['market_type']
-        if market_type == 'STEADY_BULL':
-            # 稳定牛市：增加技术面和情绪面权重
-            self._adjust_category_weight(adjusted_weights, 'technical', 1.2)
-            self._adjust_category_weight(adjusted_weights, 'sentiment', 1.2)
-            self._adjust_category_weight(adjusted_weights, 'fundamental', 0.8)
-            
-        elif market_type == 'VOLATILE_BULL':
-            # 波动牛市：增加风险控制权重
-            self._adjust_category_weight(adjusted_weights, 'risk', 1.3)
-            self._adjust_category_weight(adjusted_weights, 'technical', 1.1)
-            
-        elif market_type == 'STEADY_BEAR':
-            # 稳定熊市：增加基本面权重
-            self._adjust_category_weight(adjusted_weights, 'fundamental', 1.3)
-            self._adjust_category_weight(adjusted_weights, 'risk', 1.2)
-            self._adjust_category_weight(adjusted_weights, 'technical', 0.7)
-            
-        elif market_type == 'VOLATILE_BEAR':
-            # 波动熊市：大幅增加风险控制权重
-            self._adjust_category_weight(adjusted_weights, 'risk', 1.5)
-            self._adjust_category_weight(adjusted_weights, 'fundamental', 1.2)
-            self._adjust_category_weight(adjusted_weights, 'technical', 0.6)
-            
-        # 重新归一化权重
-        self._normalize_weights(adjusted_weights)
-        return adjusted_weights
-    
-    def _adjust_category_weight(self, weights, category, factor):
-        """调整某个类别的权重"""
-        weights[category]['weight'] *= factor
-    
-    def _normalize_weights(self, weights):
-        """归一化权重"""
-        total_weight = sum(w['weight'] for w in weights.values())
-        for category in weights:
-            weights[category]['weight'] /= total_weight
+        if weights is None:
+            weights = self.base_vector
+        multipliers = MARKET_WEIGHT_MULTIPLIERS.get(market_state['market_type'], {})
+        return weights.scale(multipliers).normalized()
     
     def adjust_weights_by_volatility(self, weights, volatility):
-        """根据波动率调整权重"""
-        if volatility > 0.4:  # 高波动率
-            self._adjust_category_weight(weights, 'risk', 1.3)
-            self._adjust_category_weight(weights, 'technical', 0.8)
-        elif volatility < 0.1:  # 低波动率
-            self._adjust_category_weight(weights, 'technical', 1.2)
-            self._adjust_category_weight(weights, 'risk', 0.8)
-        
-        self._normalize_weights(weights)
-        return weights
+        """根据波动率调整权重，返回新权重"""
+        weights = CompiledWeights.coerce(weights)
+        if volatility > HIGH_VOLATILITY:  # 高波动率
+            weights = weights.scale(VOLATILITY_WEIGHT_MULTIPLIERS['high'])
+        elif volatility < LOW_VOLATILITY:  # 低波动率
+            weights = weights.scale(VOLATILITY_WEIGHT_MULTIPLIERS['low'])
+        return weights.normalized()
     
     def adjust_weights_by_volume(self, weights, volume_trend):
-        """根据成交量趋势调整权重"""
-        if volume_trend > 0.5:  # 放量
-            self._adjust_category_weight(weights, 'technical', 1.2)
-            self._adjust_category_weight(weights, 'sentiment', 1.1)
-        elif volume_trend < -0.5:  # 缩量
-            self._adjust_category_weight(weights, 'fundamental', 1.2)
-            self._adjust_category_weight(weights, 'technical', 0.9)
-        
-        self._normalize_weights(weights)
-        return weights
+        """根据成交量趋势调整权重，返回新权重"""
+        weights = CompiledWeights.coerce(weights)
+        if volume_trend > EXPANDING_VOLUME:  # 放量
+            weights = weights.scale(VOLUME_WEIGHT_MULTIPLIERS['expanding'])
+        elif volume_trend < SHRINKING_VOLUME:  # 缩量
+            weights = weights.scale(VOLUME_WEIGHT_MULTIPLIERS['shrinking'])
+        return weights.normalized()
     
     def get_adjusted_weights(self, price_data):
         """
         获取综合调整后的权重
+        returns:
+            dict - 新的嵌套权重字典（与FACTOR_CONFIG['weights']格式一致）
+        """
+        return self.get_adjusted_vector(price_data).to_dict()
+    
+    def get_adjusted_vector(self, price_data):
+        """
+        获取综合调整后的编译权重
+        returns:
+            CompiledWeights - 调整后的不可变权重
+        """
+        # 分析市场状态
+        market_state = self.analyze_market_state(price_data)
+        if not market_state or any(pd.isna(market_state[field]) for field in STATE_FIELDS):
+            # 历史不足时无法判断市场状态，使用基础权重
+            return self.base_vector
+        return self.adjust_weights_for_state(market_state)
+    
+    def adjust_weights_for_state(self, market_state):
+        """
+        根据已知的市场状态（趋势、波动率、成交量）综合调整权重
+        returns:
+            CompiledWeights - 调整后的不可变权重
         """
         try:
-            # 分析市场状态
-            market_state = self.analyze_market_state(price_data)
-            if not market_state:
-                return self.base_weights
-            
             # 根据市场状态调整权重
             weights = self.adjust_weights_by_market(market_state)
             
@@ -158,5 +312,5 @@ class WeightAdjuster:
             return weights
             
         except Exception as e:
-            print(f"权重调整错误: {str(e)}")
-            return self.base_weights 
\ No newline at end of file
+            log(f"权重调整错误: {str(e)}", 'error')
+            return self.base_vector
@@ -0,0 +1,135 @@
+import numpy as np
+
+def _frozen(values):
+    array = np.array(values, dtype=float)
+    array.setflags(write=False)
+    return array
+
+
+class CompiledWeights:
+    """
+    编译后的不可变权重
+    将FACTOR_CONFIG['weights']的嵌套字典按固定的类别/因子顺序编译为只读NumPy向量，
+    所有调整都返回新对象，不会修改共享配置。
+    """
+    __slots__ = ('categories', 'factors', 'category_weights', 'factor_weights')
+
+    def __init__(self, categories, factors, category_weights, factor_weights):
+        object.__setattr__(self, 'categories', tuple(categories))
+        object.__setattr__(self, 'factors', tuple(tuple(names) for names in factors))
+        object.__setattr__(self, 'category_weights', _frozen(category_weights))
+        object.__setattr__(self, 'factor_weights', tuple(_frozen(w) for w in factor_weights))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledWeights不可修改，请使用scale/normalized生成新权重")
+
+    def __reduce__(self):
+        # 支持pickle/deepcopy（用于进程池和缓存）
+        return (
+            CompiledWeights,
+            (self.categories, self.factors, self.category_weights, self.factor_weights)
+        )
+
+    @classmethod
+    def from_config(cls, weights):
+        """
+        从FACTOR_CONFIG['weights']格式的字典编译权重
+        params:
+            weights: dict - 嵌套权重配置
+        returns:
+            CompiledWeights - 编译后的权重
+        """
+        categories = list(weights)
+        factors = [list(weights[c]['factors']) for c in categories]
+        category_weights = [weights[c]['weight'] for c in categories]
+        factor_weights = [
+            [weights[c]['factors'][f] for f in names]
+            for c, names in zip(categories, factors)
+        ]
+        return cls(categories, factors, category_weights, factor_weights)
+
+    @classmethod
+    def coerce(cls, weights):
+        """接受CompiledWeights或嵌套字典"""
+        if isinstance(weights, cls):
+            return weights
+        return cls.from_config(weights)
+
+    def multiplier_vector(self, multipliers):
+        """将{类别: 系数}转换为按类别顺序排列的系数向量（未指定的类别为1）"""
+        return np.array([multipliers.get(c, 1.0) for c in self.categories], dtype=float)
+
+    def with_category_weights(self, category_weights):
+        """替换类别权重，返回新对象"""
+        return CompiledWeights(self.categories, self.factors, category_weights, self.factor_weights)
+
+    def scale(self, multipliers):
+        """
+        按类别调整权重
+        params:
+            multipliers: dict或array - {类别: 系数}或按类别顺序排列的系数向量
+        returns:
+            CompiledWeights - 调整后的新权重（未归一化）
+        """
+        if isinstance(multipliers, dict):
+            multipliers = self.multiplier_vector(multipliers)
+        return self.with_category_weights(self.category_weights * multipliers)
+
+    def normalized(self):
+        """类别权重归一化，返回新对象"""
+        total = self.category_weights.sum()
+        if total == 0:
+            return self
+        return self.with_category_weights(self.category_weights / total)
+
+    def weight(self, category):
+        """获取某个类别的权重"""
+        return float(self.category_weights[self.categories.index(category)])
+
+    @property
+    def factor_names(self):
+        """按固定顺序展开的因子名称"""
+        return [f for names in self.factors for f in names]
+
+    @property
+    def category_matrix(self):
+        """类别数×因子数的因子权重矩阵，因子得分矩阵与其转置相乘即得各类别得分"""
+        matrix = np.zeros((len(self.categories), len(self.factor_names)))
+        start = 0
+        for i, weights in enumerate(self.factor_weights):
+            matrix[i, start:start + len(weights)] = weights
+            start += len(weights)
+        return matrix
+
+    @property
+    def factor_vector(self):
+        """每个因子的有效权重（类别权重×类别内因子权重）"""
+        return self.category_weights @ self.category_matrix
+
+    def to_dict(self):
+        """转换为新的嵌套字典（与FACTOR_CONFIG['weights']格式一致）"""
+        return {
+            category: {
+                'weight': float(self.category_weights[i]),
+                'factors': {
+                    f: float(w) for f, w in zip(self.factors[i], self.factor_weights[i])
+                }
+            }
+            for i, category in enumerate(self.categories)
+        }
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, CompiledWeights)
+            and self.categories == other.categories
+            and self.factors == other.factors
+            and np.array_equal(self.category_weights, other.category_weights)
+            and all(np.array_equal(a, b) for a, b in zip(self.factor_weights, other.factor_weights))
+        )
+
+    def __hash__(self):
+        return hash((self.categories, self.factors, self.category_weights.tobytes()))
+
+    def __repr__(self):
+        weights = ', '.join(f"{c}={w:.3f}" for c, w in zip(self.categories, self.category_weights))
+        return f"CompiledWeights({weights})"